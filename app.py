@@ -1,55 +1,265 @@
-from fastapi import FastAPI, Body
+from fastapi import FastAPI, Body, HTTPException, Header, Request
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
+import os
 import sys
-from starlette.responses import RedirectResponse, Response
-from hate.pipeline.train_pipeline import TrainPipeline
+import hmac
+import math
+import time
+import asyncio
+from starlette.responses import RedirectResponse, Response, JSONResponse
 from hate.pipeline.prediction_pipeline import PredictionPipeline
+from hate.pipeline.batch_scheduler import MicroBatchScheduler
+from hate.pipeline.executor import InferenceExecutor, InferenceBusyError
+from hate.pipeline.training_job import TrainingJobManager
+from hate.pipeline.ndjson_stream import NdjsonScoringResponse
+from hate.pipeline.metrics import CONTENT_TYPE_LATEST, REQUEST_SECONDS, Gauge, Counter
+from hate.pipeline.worker_group import WORKER_GROUP, RELOAD_SIGNAL, FORCED_RELOAD_SIGNAL
 from hate.exception import CustomException
-from hate.constants import APP_HOST, APP_PORT  # Ensure these constants are defined appropriately
+from hate.logger import logging
+from hate.constants import APP_HOST, APP_PORT, MODEL_WATCH_INTERVAL_SECONDS, METRICS_SNAPSHOT_INTERVAL_SECONDS  # Ensure these constants are defined appropriately
+from hate.constants import CORS_ALLOW_ORIGINS, ADMIN_TOKEN_ENV, FORCED_RELOAD_MIN_INTERVAL_SECONDS
 from pydantic import BaseModel
+from typing import List
 
 app = FastAPI()
 
-# Enable CORS for all origins (you can restrict this to your frontend domain in production)
+# Set CORS_ALLOW_ORIGINS to your frontend domains in production; credentials are never sent to "*"
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # Change "*" to specific domains for production security
-    allow_credentials=True,
+    allow_origins=CORS_ALLOW_ORIGINS,
+    allow_credentials="*" not in CORS_ALLOW_ORIGINS,
     allow_methods=["*"],
     allow_headers=["*"],
 )
 
-# Create a global instance of PredictionPipeline to load the model only once
+# Create a global instance of PredictionPipeline; the model is loaded once, after startup
 prediction_pipeline = PredictionPipeline()
+# Blocking inference runs on a bounded thread pool, never on the event loop
+inference_executor = InferenceExecutor()
+# Concurrent /predict calls are grouped into a single forward pass
+batch_scheduler = MicroBatchScheduler(prediction_pipeline.predict_scores, executor=inference_executor)
+def reload_after_training(job_id: str):
+    # A successful job has pushed a new model; swap it in without a restart, here and in the other workers
+    try:
+        if prediction_pipeline.is_ready and prediction_pipeline.reload():
+            logging.info("Serving the model pushed by training job %s", job_id)
+            WORKER_GROUP.request_reload()
+    except Exception as e:
+        logging.error("Reloading after training job %s failed: %s", job_id, e)
+
+# Training runs as a background job in its own process; jobs are shared by all pre-forked workers
+training_jobs = TrainingJobManager(on_success=reload_after_training)
+
+# Queue and cache metrics are read at scrape time, so the hot path pays nothing for them
+Gauge("hate_batch_queue_depth", "Texts waiting for the next micro-batch").set_function(
+    lambda: batch_scheduler.queue_depth)
+Gauge("hate_inference_pending", "Inference calls running or waiting on the executor").set_function(
+    lambda: inference_executor.pending)
+Counter("hate_prediction_cache_hits_total", "Prediction cache hits").set_function(
+    lambda: getattr(prediction_pipeline.cache, "hits", 0))
+Counter("hate_prediction_cache_misses_total", "Prediction cache misses").set_function(
+    lambda: getattr(prediction_pipeline.cache, "misses", 0))
+Gauge("hate_prediction_cache_hit_rate", "Share of prediction cache lookups that were hits").set_function(
+    lambda: prediction_pipeline.cache_hit_rate())
+PREDICT_SECONDS = REQUEST_SECONDS.labels("/predict")
+PREDICT_BATCH_SECONDS = REQUEST_SECONDS.labels("/predict/batch")
+PREDICT_STREAM_SECONDS = REQUEST_SECONDS.labels("/predict/stream")
+
+async def load_prediction_artifacts():
+    # Pre-forked workers (hate.pipeline.prefork_server) inherit artifacts loaded by the master
+    if prediction_pipeline.is_ready:
+        return
+    try:
+        await asyncio.get_running_loop().run_in_executor(None, prediction_pipeline.load)
+    except Exception as e:
+        logging.error("Loading prediction artifacts failed: %s", e)
+
+async def watch_model_artifacts(interval: float):
+    # Reload once the served files have changed and then stayed unchanged for one interval,
+    # so a push still being copied is never loaded half-way
+    pending_version = None
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            if not prediction_pipeline.is_ready:
+                continue
+            version = prediction_pipeline.current_version()
+            if version == prediction_pipeline.bundle.version or version != pending_version:
+                pending_version = version
+                continue
+            await asyncio.get_running_loop().run_in_executor(None, prediction_pipeline.reload)
+        except Exception as e:
+            logging.error("Model watcher failed to reload: %s", e)
+
+async def reload_on_signal(force: bool):
+    # Another pre-forked worker reloaded the model; the master forwarded its signal here
+    try:
+        if prediction_pipeline.is_ready:
+            await asyncio.get_running_loop().run_in_executor(None, prediction_pipeline.reload, force)
+    except Exception as e:
+        logging.error("Reloading on the master's signal failed: %s", e)
+
+async def write_metric_snapshots(interval: float):
+    # Other workers read this snapshot when they answer /metrics
+    while True:
+        try:
+            WORKER_GROUP.write_metrics_snapshot()
+        except Exception as e:
+            logging.error("Writing the metric snapshot failed: %s", e)
+        await asyncio.sleep(interval)
+
+@app.on_event("startup")
+async def start_batch_scheduler():
+    await batch_scheduler.start()
+    # Load in the background so the server binds immediately; /ready reports when it is done
+    app.state.artifact_loader = asyncio.create_task(load_prediction_artifacts())
+    app.state.background_tasks = []
+    if MODEL_WATCH_INTERVAL_SECONDS > 0:
+        app.state.background_tasks.append(asyncio.create_task(watch_model_artifacts(MODEL_WATCH_INTERVAL_SECONDS)))
+    if WORKER_GROUP.active:
+        loop = asyncio.get_running_loop()
+        loop.add_signal_handler(RELOAD_SIGNAL, lambda: asyncio.ensure_future(reload_on_signal(False)))
+        loop.add_signal_handler(FORCED_RELOAD_SIGNAL, lambda: asyncio.ensure_future(reload_on_signal(True)))
+        app.state.background_tasks.append(
+            asyncio.create_task(write_metric_snapshots(METRICS_SNAPSHOT_INTERVAL_SECONDS)))
+
+@app.on_event("shutdown")
+async def stop_batch_scheduler():
+    for task in app.state.background_tasks:
+        task.cancel()
+    await batch_scheduler.stop()
+    inference_executor.shutdown()
+    training_jobs.shutdown()
 
 @app.get("/", tags=["authentication"])
 async def index():
     return RedirectResponse(url="/docs")
 
+@app.get("/health")
+async def health():
+    return {"status": "ok"}
+
+def ensure_ready():
+    if not prediction_pipeline.is_ready:
+        raise HTTPException(status_code=503, detail="Model is still loading")
+
+@app.get("/ready")
+async def ready():
+    if not prediction_pipeline.is_ready:
+        return JSONResponse(status_code=503, content={"ready": False})
+    return {"ready": True, "backend": prediction_pipeline.bundle.backend.name,
+            "model_path": prediction_pipeline.bundle.model_path,
+            "loaded_at": prediction_pipeline.bundle.loaded_at, "version": prediction_pipeline.bundle.version}
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return prediction_pipeline.cache_stats()
+
+# Without a configured admin token, admin routes only answer clients on this host
+ADMIN_TOKEN = os.environ.get(ADMIN_TOKEN_ENV)
+LOCAL_CLIENTS = {"127.0.0.1", "::1", "localhost"}
+
+def ensure_admin(request: Request, admin_token: str):
+    if ADMIN_TOKEN:
+        if not admin_token or not hmac.compare_digest(admin_token.encode("utf-8"), ADMIN_TOKEN.encode("utf-8")):
+            raise HTTPException(status_code=401, detail="Missing or invalid X-Admin-Token header")
+    elif request.client is None or request.client.host not in LOCAL_CLIENTS:
+        raise HTTPException(status_code=403, detail=f"Admin routes only accept local clients unless {ADMIN_TOKEN_ENV} is set")
+
+@app.post("/admin/reload")
+async def reload_model(request: Request, force: bool = False, x_admin_token: str = Header(None)):
+    ensure_admin(request, x_admin_token)
+    ensure_ready()
+    if force:
+        # A forced reload reloads every worker even when nothing changed; shared by all workers
+        wait = WORKER_GROUP.claim_forced_reload(FORCED_RELOAD_MIN_INTERVAL_SECONDS)
+        if wait > 0:
+            raise HTTPException(status_code=429, detail="A forced reload ran recently; try again later",
+                                headers={"Retry-After": str(math.ceil(wait))})
+    try:
+        # Loading and warm-up run off the event loop; requests keep using the old model meanwhile
+        reloaded = await asyncio.get_running_loop().run_in_executor(None, prediction_pipeline.reload, force)
+        # Pre-forked workers each hold their own model; the master makes the others follow
+        WORKER_GROUP.request_reload(force)
+        bundle = prediction_pipeline.bundle
+        return {"reloaded": reloaded, "version": bundle.version, "model_path": bundle.model_path,
+                "loaded_at": bundle.loaded_at}
+    except Exception as e:
+        logging.error("Reloading the model failed: %s", e)
+        raise HTTPException(status_code=500, detail="Reloading the model failed; still serving the previous model")
+
+@app.get("/metrics")
+async def metrics():
+    # Under the pre-fork server, every worker's metrics, labelled with its pid
+    return Response(WORKER_GROUP.render_metrics(), media_type=CONTENT_TYPE_LATEST)
+
 @app.get("/train")
-async def training():
+async def training(force: bool = False):
     try:
-        train_pipeline = TrainPipeline()
-        train_pipeline.run_pipeline()
-        return Response("Training successful !!")
+        # Unchanged stages are reused from the stage manifest unless force=true
+        job = training_jobs.submit(force=force)
+        return JSONResponse(status_code=202, content={"job_id": job.job_id, "state": job.state,
+                                                      "status_url": f"/train/status?job_id={job.job_id}"})
     except Exception as e:
         return Response(f"Error Occurred! {e}")
 
+@app.get("/train/status")
+async def training_status(job_id: str = None):
+    status = training_jobs.status(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="No training job found")
+    return status
+
 # Define a Pydantic model for prediction requests
 class PredictionRequest(BaseModel):
     text: str
 
 @app.post("/predict")
 async def predict_route(request: PredictionRequest):
+    ensure_ready()
+    start = time.perf_counter()
     try:
         # Extract text from the request body
         input_text = request.text
-        # Run the prediction pipeline using the global instance
-        result = prediction_pipeline.run_pipeline(input_text)
+        # Score the text as part of the next micro-batch
+        prediction_score = await batch_scheduler.submit(input_text)
+        result = prediction_pipeline.label_for(prediction_score)
+        PREDICT_SECONDS.observe(time.perf_counter() - start)
         return {"prediction": result}
+    except InferenceBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+class BatchPredictionRequest(BaseModel):
+    texts: List[str]
+
+@app.post("/predict/batch")
+async def predict_batch_route(request: BatchPredictionRequest):
+    ensure_ready()
+    start = time.perf_counter()
+    try:
+        # Clean, tokenize, pad and score the whole list in one pass
+        results = await inference_executor.run(prediction_pipeline.predict_batch, request.texts)
+        PREDICT_BATCH_SECONDS.observe(time.perf_counter() - start)
+        return {"predictions": results}
+    except InferenceBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise CustomException(e, sys) from e
 
+async def score_texts(texts):
+    return await inference_executor.run(prediction_pipeline.predict_scores, texts)
+
+@app.post("/predict/stream")
+async def predict_stream_route():
+    # Newline-delimited JSON in ("text" or {"text": ..., "id": ...} per line), one result line out per input line.
+    # The response reads the body while results stream back, so neither side holds the whole payload.
+    ensure_ready()
+    start = time.perf_counter()
+    return NdjsonScoringResponse(score_texts, prediction_pipeline.label_for,
+                                 on_complete=lambda: PREDICT_STREAM_SECONDS.observe(time.perf_counter() - start))
+
 if __name__ == "__main__":
     uvicorn.run(app, host=APP_HOST, port=APP_PORT)
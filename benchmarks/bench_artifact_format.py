@@ -0,0 +1,57 @@
+"""
+Write/read timing and disk size of each artifact format on data/dataset.zip.
+
+    python -m benchmarks.bench_artifact_format --replicate 1
+"""
+import os
+import time
+import tempfile
+import argparse
+from zipfile import ZipFile
+from benchmarks.common import print_table
+
+
+def load_dataset(zip_path: str, replicate: int):
+    import pandas as pd
+    frames = []
+    with ZipFile(zip_path) as zip_ref:
+        for member in zip_ref.namelist():
+            with zip_ref.open(member) as handle:
+                frames.append(pd.read_csv(handle, usecols=["tweet"]))
+    return pd.concat(frames * replicate, ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--zip", default=os.path.join("data", "dataset.zip"))
+    parser.add_argument("--replicate", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    from hate.constants import ARTIFACT_FILE_EXTENSIONS
+    from hate.utils.main_utils import save_frame, load_frame
+
+    df = load_dataset(args.zip, args.replicate)
+    df["label"] = (df.index % 2).astype("int64")
+    print(f"{len(df)} rows")
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for artifact_format, extension in ARTIFACT_FILE_EXTENSIONS.items():
+            path = os.path.join(tmp_dir, "final" + extension)
+            write_times, read_times = [], []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                save_frame(df, path, artifact_format=artifact_format)
+                write_times.append(time.perf_counter() - start)
+                start = time.perf_counter()
+                load_frame(path, artifact_format=artifact_format)
+                read_times.append(time.perf_counter() - start)
+            rows.append({"format": artifact_format, "write_ms": min(write_times) * 1000,
+                         "read_ms": min(read_times) * 1000, "size_mb": os.path.getsize(path) / 2 ** 20})
+
+    print_table(rows, ["format", "write_ms", "read_ms", "size_mb"])
+
+
+if __name__ == "__main__":
+    main()
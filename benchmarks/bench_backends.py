@@ -0,0 +1,65 @@
+"""
+Memory per worker and latency of each inference backend.
+
+Every backend is measured in a fresh interpreter so the resident set size
+reflects what one API worker would hold with only that backend loaded.
+
+    python -m benchmarks.bench_backends --backends keras numpy --batch-sizes 1 32 256
+"""
+import sys
+import json
+import argparse
+import subprocess
+from benchmarks.common import print_table
+
+PROBE = """
+import json, time, resource
+import numpy as np
+from benchmarks.common import synthetic_texts, time_call
+
+def rss_mb():
+    with open("/proc/self/status") as handle:
+        for line in handle:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+from hate.pipeline.prediction_pipeline import PredictionPipeline
+baseline = rss_mb()
+pipeline = PredictionPipeline(backend_name={backend!r})
+pipeline.cache = None  # measure the backend, not the response cache
+start = time.perf_counter()
+pipeline.load()
+load_s = time.perf_counter() - start
+pipeline.predict_scores(["warm up"])
+result = {{"backend": {backend!r}, "load_ms": load_s * 1000, "rss_mb": rss_mb(),
+           "rss_delta_mb": rss_mb() - baseline, "latency_ms": {{}}}}
+for batch_size in {batch_sizes!r}:
+    texts = synthetic_texts(batch_size)
+    result["latency_ms"][batch_size] = time_call(pipeline.predict_scores, texts) * 1000
+print(json.dumps(result))
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=["keras", "numpy"])
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 32, 256])
+    args = parser.parse_args()
+
+    rows = []
+    for backend in args.backends:
+        code = PROBE.format(backend=backend, batch_sizes=args.batch_sizes)
+        output = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        row = {key: result[key] for key in ("backend", "load_ms", "rss_mb", "rss_delta_mb")}
+        for batch_size, latency in result["latency_ms"].items():
+            row[f"batch_{batch_size}_ms"] = latency
+        rows.append(row)
+
+    columns = ["backend", "load_ms", "rss_mb", "rss_delta_mb"] + [f"batch_{size}_ms" for size in args.batch_sizes]
+    print_table(rows, columns)
+
+
+if __name__ == "__main__":
+    main()
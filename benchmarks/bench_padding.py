@@ -0,0 +1,84 @@
+"""
+Fixed MAX_LEN padding against length-aware padding.
+
+Training: one epoch of the masked model on synthetic tweet-length sequences,
+with full-width batches and with length-bucketed batches.
+Inference: predict_scores latency with and without trimming the padding.
+
+    python -m benchmarks.bench_padding --rows 20000 --skip-inference
+"""
+import time
+import argparse
+import numpy as np
+from benchmarks.common import synthetic_texts, time_call, print_table
+
+
+def synthetic_sequences(rows: int, vocab_size: int, max_tokens: int, maxlen: int, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    padded = np.zeros((rows, maxlen), dtype=np.int32)
+    lengths = rng.integers(1, max_tokens + 1, size=rows)
+    for row, length in enumerate(lengths):
+        padded[row, maxlen - length:] = rng.integers(1, vocab_size, size=length)
+    return padded, rng.integers(0, 2, size=rows)
+
+
+def bench_training(rows: int, max_tokens: int) -> list:
+    from hate.constants import MAX_LEN, MAX_WORDS
+    from hate.ml.model import ModelArchitecture
+    from hate.components.model_trainer import ModelTrainer
+    from hate.entity.config_entity import ModelTrainerConfig
+
+    padded, labels = synthetic_sequences(rows, MAX_WORDS, max_tokens, MAX_LEN)
+    results = []
+    for bucketed in (False, True):
+        config = ModelTrainerConfig()
+        config.EPOCH = 1
+        config.BUCKET_BY_LENGTH = bucketed
+        trainer = ModelTrainer(data_transformation_artifacts=None, model_trainer_config=config)
+        model = ModelArchitecture().get_model()
+        start = time.perf_counter()
+        trainer.fit_model(model, padded, labels)
+        results.append({"stage": "train epoch", "mode": "bucketed" if bucketed else f"fixed {MAX_LEN}",
+                        "seconds": time.perf_counter() - start})
+    return results
+
+
+def bench_inference(backend: str, batch_sizes: list) -> list:
+    from hate.pipeline.prediction_pipeline import PredictionPipeline, PREDICTION_CONFIG
+
+    pipeline = PredictionPipeline(backend_name=backend)
+    pipeline.cache = None  # measure the model, not the response cache
+    pipeline.load()
+    if not pipeline.bundle.backend.supports_masking:
+        print("The loaded model does not mask padding; inference always uses MAX_LEN")
+    results = []
+    for batch_size in batch_sizes:
+        texts = synthetic_texts(batch_size)
+        for trim in (False, True):
+            PREDICTION_CONFIG.TRIM_PADDING = trim
+            pipeline.predict_scores(texts)
+            results.append({"stage": f"predict batch {batch_size}", "mode": "trimmed" if trim else "fixed",
+                            "seconds": time_call(pipeline.predict_scores, texts)})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--max-tokens", type=int, default=30)
+    parser.add_argument("--backend", default="keras")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 64, 512])
+    parser.add_argument("--skip-training", action="store_true")
+    parser.add_argument("--skip-inference", action="store_true")
+    args = parser.parse_args()
+
+    rows = []
+    if not args.skip_training:
+        rows += bench_training(args.rows, args.max_tokens)
+    if not args.skip_inference:
+        rows += bench_inference(args.backend, args.batch_sizes)
+    print_table(rows, ["stage", "mode", "seconds"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Speedup curve of DataTransformation.clean_tweets by worker count on the tweets
+from data/dataset.zip (optionally replicated to simulate a larger corpus).
+
+    python -m benchmarks.bench_parallel_transformation --replicate 4 --workers 1 2 4 8
+"""
+import os
+import time
+import argparse
+from zipfile import ZipFile
+from benchmarks.common import print_table
+
+
+def load_tweets(zip_path: str, replicate: int):
+    import pandas as pd
+    frames = []
+    with ZipFile(zip_path) as zip_ref:
+        for member in zip_ref.namelist():
+            with zip_ref.open(member) as handle:
+                frames.append(pd.read_csv(handle, usecols=["tweet"]))
+    tweets = pd.concat(frames * replicate, ignore_index=True)["tweet"]
+    return tweets
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--zip", default=os.path.join("data", "dataset.zip"))
+    parser.add_argument("--replicate", type=int, default=1)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument("--chunk-size", type=int, default=None)
+    args = parser.parse_args()
+
+    from hate.components.data_transforamation import DataTransformation
+    from hate.entity.config_entity import DataTransformationConfig
+
+    tweets = load_tweets(args.zip, args.replicate)
+    print(f"{len(tweets)} tweets")
+
+    rows, serial_time, serial_output = [], None, None
+    for workers in sorted(set(args.workers)):
+        config = DataTransformationConfig()
+        config.WORKERS = workers
+        if args.chunk_size:
+            config.CHUNK_SIZE = args.chunk_size
+        transformation = DataTransformation(data_transformation_config=config, data_ingestion_artifacts=None)
+
+        start = time.perf_counter()
+        cleaned = transformation.clean_tweets(tweets)
+        elapsed = time.perf_counter() - start
+
+        if serial_time is None:
+            serial_time, serial_output = elapsed, cleaned
+        rows.append({"workers": workers, "seconds": elapsed, "tweets_per_s": len(tweets) / elapsed,
+                     "speedup": serial_time / elapsed, "matches_first": bool(cleaned.equals(serial_output))})
+
+    print_table(rows, ["workers", "seconds", "tweets_per_s", "speedup", "matches_first"])
+
+
+if __name__ == "__main__":
+    main()
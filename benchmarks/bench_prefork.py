@@ -0,0 +1,103 @@
+"""
+Memory and throughput of 1..N serving workers.
+
+Starts the server in each mode and worker count, drives /predict over HTTP
+and reports per-worker RSS and PSS (proportional set size, which splits
+shared pages between the processes that map them) from /proc. Linux only.
+
+    python -m benchmarks.bench_prefork --workers 1 2 4 --modes prefork uvicorn --requests 2000
+
+prefork: python -m hate.pipeline.prefork_server (model loaded once, then fork)
+uvicorn: uvicorn app:app --workers N (every worker loads its own model)
+"""
+import os
+import sys
+import time
+import argparse
+import subprocess
+import urllib.error
+import urllib.request
+from benchmarks.common import synthetic_texts, print_table
+from benchmarks.load_benchmark import run_http
+
+
+def memory_kb(pid: int) -> dict:
+    """
+    Rss and Pss of a process in kB, from /proc/<pid>/smaps_rollup.
+    """
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as handle:
+        for line in handle:
+            name, _, rest = line.partition(":")
+            if name in ("Rss", "Pss"):
+                values[name] = int(rest.split()[0])
+    return values
+
+
+def child_pids(pid: int) -> list:
+    children = []
+    for task in os.listdir(f"/proc/{pid}/task"):
+        with open(f"/proc/{pid}/task/{task}/children") as handle:
+            children.extend(int(child) for child in handle.read().split())
+    return children
+
+
+def server_command(mode: str, workers: int, port: int) -> list:
+    if mode == "prefork":
+        return [sys.executable, "-m", "hate.pipeline.prefork_server", "--workers", str(workers), "--port", str(port)]
+    return [sys.executable, "-m", "uvicorn", "app:app", "--workers", str(workers), "--port", str(port),
+            "--log-level", "warning"]
+
+
+def wait_until_ready(base_url: str, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"{base_url}/ready") as response:
+                if response.status == 200:
+                    return
+        except (urllib.error.URLError, ConnectionError):
+            pass
+        time.sleep(0.5)
+    raise TimeoutError(f"{base_url} was not ready after {timeout:.0f}s")
+
+
+def bench(mode: str, workers: int, port: int, texts: list, concurrency: int, timeout: float) -> dict:
+    base_url = f"http://127.0.0.1:{port}"
+    server = subprocess.Popen(server_command(mode, workers, port))
+    try:
+        wait_until_ready(base_url, timeout)
+        # Every worker reports ready on its own; give the slowest one time to load.
+        time.sleep(2 if mode == "prefork" else 10)
+        result = run_http(f"{base_url}/predict", texts, [concurrency])[0]
+        pids = child_pids(server.pid) or [server.pid]
+        memory = [memory_kb(pid) for pid in pids]
+        return {"mode": mode, "workers": workers, "throughput_rps": result["throughput_rps"],
+                "p95_ms": result["p95_ms"],
+                "rss_mb_per_worker": sum(m["Rss"] for m in memory) / len(memory) / 1024,
+                "pss_mb_per_worker": sum(m["Pss"] for m in memory) / len(memory) / 1024,
+                "total_pss_mb": sum(m["Pss"] for m in memory) / 1024}
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--modes", nargs="+", default=["prefork", "uvicorn"], choices=["prefork", "uvicorn"])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--timeout", type=float, default=180)
+    args = parser.parse_args()
+
+    texts = synthetic_texts(args.requests)
+    rows = [bench(mode, workers, args.port, texts, args.concurrency, args.timeout)
+            for mode in args.modes for workers in args.workers]
+    print_table(rows, ["mode", "workers", "throughput_rps", "p95_ms", "rss_mb_per_worker", "pss_mb_per_worker",
+                       "total_pss_mb"])
+
+
+if __name__ == "__main__":
+    main()
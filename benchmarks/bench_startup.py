@@ -0,0 +1,68 @@
+"""
+Import-time and startup benchmark for the API process.
+
+Measures, in fresh interpreters, how long `import app` takes and how long
+PredictionPipeline.load() takes afterwards, and checks that importing the
+app does not pull in the training stack or TensorFlow. Exits non-zero when
+a guard fails, so it can run in CI.
+
+    python -m benchmarks.bench_startup --runs 5 --max-import-seconds 2.0
+"""
+import sys
+import json
+import argparse
+import subprocess
+from benchmarks.common import percentile
+
+# Modules that must not be imported before the model is loaded.
+FORBIDDEN_AT_IMPORT = ["tensorflow", "keras", "pandas", "sklearn", "hate.pipeline.train_pipeline"]
+
+PROBE = """
+import sys, json, time
+start = time.perf_counter()
+import app
+import_s = time.perf_counter() - start
+loaded = sorted(name for name in {forbidden!r} if name in sys.modules)
+load_s = None
+if {load}:
+    start = time.perf_counter()
+    app.prediction_pipeline.load()
+    load_s = time.perf_counter() - start
+print(json.dumps({{"import_s": import_s, "load_s": load_s, "forbidden_loaded": loaded}}))
+"""
+
+
+def probe(load: bool) -> dict:
+    code = PROBE.format(forbidden=FORBIDDEN_AT_IMPORT, load=load)
+    output = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--load", action="store_true", help="Also time loading the model and tokenizer")
+    parser.add_argument("--max-import-seconds", type=float, default=None)
+    args = parser.parse_args()
+
+    results = [probe(args.load) for _ in range(args.runs)]
+    import_times = [result["import_s"] for result in results]
+    print(f"import app: median {percentile(import_times, 50) * 1000:.0f} ms, "
+          f"max {max(import_times) * 1000:.0f} ms over {args.runs} runs")
+    if args.load:
+        load_times = [result["load_s"] for result in results]
+        print(f"PredictionPipeline.load: median {percentile(load_times, 50) * 1000:.0f} ms")
+
+    failures = []
+    forbidden = sorted({name for result in results for name in result["forbidden_loaded"]})
+    if forbidden:
+        failures.append(f"importing app loaded {', '.join(forbidden)}")
+    if args.max_import_seconds is not None and percentile(import_times, 50) > args.max_import_seconds:
+        failures.append(f"median import time exceeds {args.max_import_seconds:.2f} s")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
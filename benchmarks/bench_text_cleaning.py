@@ -0,0 +1,65 @@
+"""
+Micro-benchmark: the original per-call concat_data_cleaning against TextNormalizer.
+
+    python -m benchmarks.bench_text_cleaning --texts 20000
+"""
+import re
+import time
+import string
+import argparse
+from benchmarks.common import synthetic_texts, print_table
+
+
+def legacy_concat_data_cleaning(words):
+    # Verbatim copy of DataTransformation.concat_data_cleaning before TextNormalizer.
+    import nltk
+    from nltk.corpus import stopwords
+    stemmer = nltk.SnowballStemmer("english")
+    stopword = set(stopwords.words('english'))
+    words = str(words).lower()
+    words = re.sub(r'\[.*?\]', '', words)
+    words = re.sub(r'https?://\S+|www\.\S+', '', words)
+    words = re.sub(r'<.*?>+', '', words)
+    words = re.sub('[%s]' % re.escape(string.punctuation), '', words)
+    words = re.sub('\n', '', words)
+    words = re.sub(r'\w*\d\w*', '', words)
+    words = [word for word in words.split(' ') if words not in stopword]
+    words = " ".join(words)
+    words = [stemmer.stem(word) for word in words.split(' ')]
+    words = " ".join(words)
+    return words
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--texts", type=int, default=20000)
+    args = parser.parse_args()
+
+    from hate.components.text_normalizer import TextNormalizer
+    texts = synthetic_texts(args.texts)
+
+    rows = []
+    start = time.perf_counter()
+    for text in texts:
+        legacy_concat_data_cleaning(text)
+    legacy_time = time.perf_counter() - start
+    rows.append({"implementation": "legacy concat_data_cleaning", "seconds": legacy_time,
+                 "texts_per_s": len(texts) / legacy_time, "speedup": 1.0})
+
+    start = time.perf_counter()
+    normalizer = TextNormalizer()
+    build_time = time.perf_counter() - start
+    start = time.perf_counter()
+    for text in texts:
+        normalizer.normalize(text)
+    normalizer_time = time.perf_counter() - start
+    rows.append({"implementation": "TextNormalizer.normalize", "seconds": normalizer_time,
+                 "texts_per_s": len(texts) / normalizer_time, "speedup": legacy_time / normalizer_time})
+
+    print_table(rows, ["implementation", "seconds", "texts_per_s", "speedup"])
+    print(f"TextNormalizer build time: {build_time * 1000:.1f} ms")
+    print(f"Stem cache: {normalizer.stem_cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Startup time and per-request latency of the pickled Keras Tokenizer against
+the exported VocabTokenizer, plus an id parity check.
+
+    python -m benchmarks.bench_tokenizer --tokenizer tokenizer.pickle --vocab tokenizer.vocab
+"""
+import os
+import time
+import pickle
+import argparse
+import tempfile
+from benchmarks.common import synthetic_texts, time_call, print_table
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokenizer", default="tokenizer.pickle")
+    parser.add_argument("--vocab", default=None, help="Exported vocabulary; exported to a temp file when omitted")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 64, 1024])
+    args = parser.parse_args()
+
+    from keras.utils import pad_sequences
+    from hate.constants import MAX_LEN
+    from hate.ml.tokenizer import VocabTokenizer, export_vocabulary
+
+    start = time.perf_counter()
+    with open(args.tokenizer, "rb") as handle:
+        keras_tokenizer = pickle.load(handle)
+    pickle_load_ms = (time.perf_counter() - start) * 1000
+
+    vocab_path = args.vocab
+    if vocab_path is None:
+        vocab_path = os.path.join(tempfile.mkdtemp(), "tokenizer.vocab")
+        export_vocabulary(keras_tokenizer, vocab_path)
+
+    start = time.perf_counter()
+    vocab_tokenizer = VocabTokenizer.load(vocab_path)
+    vocab_load_ms = (time.perf_counter() - start) * 1000
+
+    print(f"pickle.load:          {pickle_load_ms:.1f} ms ({os.path.getsize(args.tokenizer) / 2 ** 20:.2f} MB)")
+    print(f"VocabTokenizer.load:  {vocab_load_ms:.1f} ms ({os.path.getsize(vocab_path) / 2 ** 20:.2f} MB)")
+
+    rows = []
+    for batch_size in args.batch_sizes:
+        texts = synthetic_texts(batch_size)
+        keras_s = time_call(lambda: pad_sequences(keras_tokenizer.texts_to_sequences(texts), maxlen=MAX_LEN))
+        vocab_s = time_call(lambda: vocab_tokenizer.texts_to_padded(texts, MAX_LEN))
+        rows.append({"batch_size": batch_size, "keras_ms": keras_s * 1000, "vocab_ms": vocab_s * 1000,
+                     "speedup": keras_s / vocab_s, "identical_ids": vocab_tokenizer.matches(keras_tokenizer, texts)})
+    print_table(rows, ["batch_size", "keras_ms", "vocab_ms", "speedup", "identical_ids"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import time
+import math
+import random
+
+SAMPLE_WORDS = ["you", "are", "such", "a", "great", "idiot", "love", "this", "game", "so", "much",
+                "hate", "people", "like", "that", "trash", "lol", "happy", "day", "everyone", "stupid",
+                "http://t.co/abc", "@user", "#tbt", "rt", "!!!", "<b>", "2nite", "[video]"]
+
+
+def synthetic_texts(count: int, min_words: int = 3, max_words: int = 25, seed: int = 42) -> list:
+    """
+    Generates tweet-like strings that exercise every cleaning regex.
+    """
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(SAMPLE_WORDS) for _ in range(rng.randint(min_words, max_words)))
+            for _ in range(count)]
+
+
+def dataset_texts(count: int, zip_path: str = "data/dataset.zip", seed: int = 42) -> list:
+    """
+    Tweets sampled reproducibly from every CSV member of the dataset ZIP,
+    repeating rows when count exceeds the dataset.
+    """
+    import pandas as pd
+    from zipfile import ZipFile
+    from hate.constants import TWEET
+    with ZipFile(zip_path) as zip_ref:
+        tweets = [pd.read_csv(zip_ref.open(member), usecols=[TWEET])[TWEET]
+                  for member in sorted(zip_ref.namelist()) if member.endswith(".csv")]
+    tweets = pd.concat(tweets, ignore_index=True).dropna().astype(str)
+    return tweets.sample(n=count, replace=count > len(tweets), random_state=seed).tolist()
+
+
+def peak_rss_mb(pid="self") -> float:
+    """
+    Peak resident set size (VmHWM) of a process in MB. Linux only.
+    """
+    with open(f"/proc/{pid}/status") as handle:
+        for line in handle:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def percentile(values, pct: float) -> float:
+    """
+    Nearest-rank percentile of a list of numbers.
+    """
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    rank = max(0, math.ceil(pct / 100.0 * len(ordered)) - 1)
+    return ordered[rank]
+
+
+def summarize_latencies(latencies_s: list, wall_time_s: float) -> dict:
+    """
+    Summarizes per-request latencies (seconds) into throughput and percentiles (ms).
+    """
+    return {
+        "requests": len(latencies_s),
+        "throughput_rps": len(latencies_s) / wall_time_s if wall_time_s else float("nan"),
+        "p50_ms": percentile(latencies_s, 50) * 1000,
+        "p95_ms": percentile(latencies_s, 95) * 1000,
+        "p99_ms": percentile(latencies_s, 99) * 1000,
+        "max_ms": max(latencies_s) * 1000 if latencies_s else float("nan"),
+    }
+
+
+def time_call(fn, *args, repeat: int = 5, **kwargs) -> float:
+    """
+    Returns the best wall time in seconds of fn(*args, **kwargs) over `repeat` runs.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def print_table(rows: list, columns: list) -> None:
+    """
+    Prints a list of dicts as an aligned text table.
+    """
+    widths = [max(len(col), *(len(_fmt(row.get(col))) for row in rows)) for col in columns]
+    print("  ".join(col.ljust(width) for col, width in zip(columns, widths)))
+    for row in rows:
+        print("  ".join(_fmt(row.get(col)).ljust(width) for col, width in zip(columns, widths)))
+
+
+def _fmt(value) -> str:
+    if isinstance(value, float):
+        return f"{value:.2f}"
+    return str(value)
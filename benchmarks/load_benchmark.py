@@ -0,0 +1,104 @@
+"""
+Load benchmark for the /predict path.
+
+In-process mode (default) compares scoring each request on its own against the
+micro-batching scheduler, at several client concurrency levels:
+
+    python -m benchmarks.load_benchmark --requests 2000 --concurrency 1 8 32 64
+
+HTTP mode drives a running server instead:
+
+    python -m benchmarks.load_benchmark --url http://localhost:8080/predict --concurrency 32
+"""
+import json
+import time
+import asyncio
+import argparse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from benchmarks.common import synthetic_texts, summarize_latencies, print_table
+
+
+async def _drive(submit, texts, concurrency: int) -> dict:
+    latencies = []
+    pending = iter(texts)
+
+    async def client():
+        for text in pending:
+            start = time.perf_counter()
+            await submit(text)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return summarize_latencies(latencies, time.perf_counter() - start)
+
+
+async def run_in_process(texts, concurrency_levels, max_batch_size, max_wait_ms, use_cache) -> list:
+    from hate.pipeline.prediction_pipeline import PredictionPipeline
+    from hate.pipeline.batch_scheduler import MicroBatchScheduler
+
+    pipeline = PredictionPipeline()
+    if not use_cache:
+        pipeline.cache = None
+    pipeline.load()
+    pipeline.predict_scores(texts[:1])  # warm up the model
+
+    async def unbatched(text):
+        return pipeline.predict_scores([text])[0]
+
+    rows = []
+    for concurrency in concurrency_levels:
+        rows.append({"mode": "unbatched", "concurrency": concurrency,
+                     **await _drive(unbatched, texts, concurrency)})
+
+        scheduler = MicroBatchScheduler(pipeline.predict_scores, max_batch_size, max_wait_ms)
+        await scheduler.start()
+        try:
+            rows.append({"mode": "micro-batch", "concurrency": concurrency,
+                         **await _drive(scheduler.submit, texts, concurrency)})
+        finally:
+            await scheduler.stop()
+    return rows
+
+
+def run_http(url, texts, concurrency_levels) -> list:
+    def post(text):
+        request = urllib.request.Request(url, data=json.dumps({"text": text}).encode(),
+                                         headers={"Content-Type": "application/json"})
+        start = time.perf_counter()
+        with urllib.request.urlopen(request) as response:
+            response.read()
+        return time.perf_counter() - start
+
+    rows = []
+    for concurrency in concurrency_levels:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            start = time.perf_counter()
+            latencies = list(pool.map(post, texts))
+            wall = time.perf_counter() - start
+        rows.append({"mode": "http", "concurrency": concurrency, **summarize_latencies(latencies, wall)})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 64])
+    parser.add_argument("--max-batch-size", type=int, default=None)
+    parser.add_argument("--max-wait-ms", type=float, default=None)
+    parser.add_argument("--no-cache", action="store_true", help="Disable the prediction cache in-process")
+    parser.add_argument("--url", default=None, help="Benchmark a running server instead of in-process")
+    args = parser.parse_args()
+
+    texts = synthetic_texts(args.requests)
+    if args.url:
+        rows = run_http(args.url, texts, args.concurrency)
+    else:
+        rows = asyncio.run(run_in_process(texts, args.concurrency, args.max_batch_size, args.max_wait_ms,
+                                          use_cache=not args.no_cache))
+    print_table(rows, ["mode", "concurrency", "requests", "throughput_rps", "p50_ms", "p95_ms", "p99_ms", "max_ms"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+"""
+Benchmark suite for the whole serving stack, with a JSON baseline and a
+regression check.
+
+Each case runs in a fresh interpreter, so imports and earlier cases do
+not skew its peak memory, and runs --repeat times; the median of every
+metric is kept. Inputs are fixed-seed synthetic texts or tweets sampled
+from data/dataset.zip.
+
+    python -m benchmarks.suite --save benchmarks/baseline.json
+    python -m benchmarks.suite --compare benchmarks/baseline.json --threshold 0.15
+
+With --compare, the exit status is 1 when any metric is worse than the
+baseline by more than the threshold: a higher latency or peak memory, or a
+lower throughput.
+
+Cases:
+  clean       TextNormalizer.normalize (concat_data_cleaning)
+  tokenize    texts_to_padded of the served tokenizer, as the pipeline calls it
+  pad         pad_ids (pad_sequences), trimmed when PREDICTION_TRIM_PADDING is set
+  forward     pad + backend.predict of the served model
+  pipeline    PredictionPipeline.predict_scores end to end, without the cache
+  route       POST /predict through the ASGI app in-process, under concurrent clients
+  route_http  POST /predict over HTTP against a uvicorn server, under concurrent clients
+"""
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import platform
+import statistics
+import subprocess
+from datetime import datetime
+from benchmarks.common import synthetic_texts, dataset_texts, summarize_latencies, peak_rss_mb, print_table
+
+CASES = ("clean", "tokenize", "pad", "forward", "pipeline", "route", "route_http")
+DEFAULT_CASES = ("clean", "tokenize", "pad", "forward", "pipeline", "route")
+# Baselines are only comparable when these settings match
+SETTINGS = ("input", "texts", "single_calls", "batch_size", "concurrency", "backend")
+
+
+def measure(fn, items: list, single_calls: int, batch_size: int) -> dict:
+    """
+    Latency percentiles of single-item calls and throughput of batch_size calls over every item.
+    """
+    fn(items[:batch_size])  # warm up
+    latencies = []
+    for item in items[:single_calls]:
+        start = time.perf_counter()
+        fn([item])
+        latencies.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    for offset in range(0, len(items), batch_size):
+        fn(items[offset:offset + batch_size])
+    wall = time.perf_counter() - start
+    summary = summarize_latencies(latencies, wall)
+    return {"p50_ms": summary["p50_ms"], "p95_ms": summary["p95_ms"], "p99_ms": summary["p99_ms"],
+            "throughput_per_s": len(items) / wall if wall else float("nan")}
+
+
+async def asgi_post(app, path: str, payload: dict) -> int:
+    """
+    Sends one POST through the ASGI app without a socket.
+    :return: The response status code.
+    """
+    body = json.dumps(payload).encode("utf-8")
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+             "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+             "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+             "client": ("127.0.0.1", 0), "server": ("127.0.0.1", 80)}
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    status = []
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        # The client never disconnects; the app stops waiting once it has responded.
+        await asyncio.get_running_loop().create_future()
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+
+    await app(scope, receive, send)
+    return status[0]
+
+
+async def drive(post, texts: list, concurrency: int) -> dict:
+    latencies = []
+    pending = iter(texts)
+
+    async def client():
+        for text in pending:
+            start = time.perf_counter()
+            status = await post(text)
+            if status != 200:
+                raise RuntimeError(f"/predict answered {status}")
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return summarize_latencies(latencies, time.perf_counter() - start)
+
+
+def concurrency_metrics(rows: dict) -> dict:
+    metrics = {}
+    for concurrency, summary in rows.items():
+        for name in ("p50_ms", "p95_ms", "p99_ms", "throughput_rps"):
+            metrics[f"c{concurrency}_{name}"] = summary[name]
+    return metrics
+
+
+def run_case(case: str, texts: list, args) -> dict:
+    """
+    Runs one case in this process.
+    :return: Its metrics, plus the peak RSS of the process (or of the server for route_http).
+    """
+    from hate.constants import MAX_LEN
+    from hate.ml.padding import pad_ids
+    from hate.components.text_normalizer import get_text_normalizer
+    from hate.pipeline.prediction_pipeline import (PredictionPipeline, PREDICTION_CONFIG, load_tokenizer,
+                                                   tokenizer_paths)
+
+    if case == "clean":
+        normalizer = get_text_normalizer()
+        return {**measure(lambda batch: [normalizer.normalize(text) for text in batch], texts,
+                          args.single_calls, args.batch_size), "peak_rss_mb": peak_rss_mb()}
+
+    if case in ("tokenize", "pad"):
+        normalizer = get_text_normalizer()
+        tokenizer = load_tokenizer(*tokenizer_paths())
+        cleaned = [normalizer.normalize(text) for text in texts]
+        if case == "tokenize":
+            trim = PREDICTION_CONFIG.TRIM_PADDING
+            metrics = measure(lambda batch: tokenizer.texts_to_padded(batch, MAX_LEN, trim=trim), cleaned,
+                              args.single_calls, args.batch_size)
+        else:
+            sequences = tokenizer.texts_to_sequences(cleaned)
+            metrics = measure(lambda batch: pad_ids(batch, MAX_LEN, trim=PREDICTION_CONFIG.TRIM_PADDING), sequences,
+                              args.single_calls, args.batch_size)
+        return {**metrics, "peak_rss_mb": peak_rss_mb()}
+
+    if case in ("forward", "pipeline"):
+        pipeline = PredictionPipeline()
+        pipeline.cache = None
+        pipeline.load()
+        if case == "pipeline":
+            metrics = measure(pipeline.predict_scores, texts, args.single_calls, args.batch_size)
+        else:
+            bundle = pipeline.bundle
+            trim = PREDICTION_CONFIG.TRIM_PADDING and bundle.backend.supports_masking
+            sequences = bundle.tokenizer.texts_to_sequences([pipeline.text_normalizer.normalize(text)
+                                                             for text in texts])
+            metrics = measure(lambda batch: bundle.backend.predict(pad_ids(batch, MAX_LEN, trim=trim),
+                                                                   batch_size=len(batch)),
+                              sequences, args.single_calls, args.batch_size)
+        return {**metrics, "peak_rss_mb": peak_rss_mb()}
+
+    if case == "route":
+        import app as app_module
+        app_module.prediction_pipeline.cache = None
+        app_module.prediction_pipeline.load()
+
+        async def run() -> dict:
+            await app_module.app.router.startup()
+            try:
+                post = lambda text: asgi_post(app_module.app, "/predict", {"text": text})
+                await drive(post, texts[:args.batch_size], args.concurrency[-1])  # warm up
+                return {concurrency: await drive(post, texts, concurrency) for concurrency in args.concurrency}
+            finally:
+                await app_module.app.router.shutdown()
+
+        return {**concurrency_metrics(asyncio.run(run())), "peak_rss_mb": peak_rss_mb()}
+
+    if case == "route_http":
+        from benchmarks.load_benchmark import run_http
+        from benchmarks.bench_prefork import wait_until_ready
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        # The prediction cache is left on: a fresh server only misses on each text's first request.
+        server = subprocess.Popen([sys.executable, "-m", "uvicorn", "app:app", "--port", str(port),
+                                   "--log-level", "warning"])
+        try:
+            base_url = f"http://127.0.0.1:{port}"
+            wait_until_ready(base_url, timeout=180)
+            url = f"{base_url}/predict"
+            run_http(url, texts[:args.batch_size], [args.concurrency[-1]])  # warm up
+            rows = {concurrency: run_http(url, texts, [concurrency])[0] for concurrency in args.concurrency}
+            return {**concurrency_metrics(rows), "peak_rss_mb": peak_rss_mb(server.pid)}
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+    raise ValueError(f"Unknown case {case!r}")
+
+
+def run_isolated(case: str, args) -> dict:
+    """
+    Runs one case --repeat times, each in a fresh interpreter, and keeps the median of every metric.
+    """
+    command = [sys.executable, "-m", "benchmarks.suite", "--run-case", case, "--input", args.input,
+               "--texts", str(args.texts), "--single-calls", str(args.single_calls),
+               "--batch-size", str(args.batch_size), "--concurrency", *map(str, args.concurrency)]
+    env = dict(os.environ, PYTHONHASHSEED="0")
+    runs = []
+    for _ in range(args.repeat):
+        output = subprocess.run(command, check=True, capture_output=True, text=True, env=env).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    return {name: statistics.median(run[name] for run in runs) for name in runs[0]}
+
+
+def lower_is_better(metric: str) -> bool:
+    return "throughput" not in metric
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list:
+    """
+    One row per metric present in both results, with the relative change in
+    the "worse" direction and whether it exceeds threshold.
+    """
+    rows = []
+    for case, metrics in current["results"].items():
+        for metric, value in metrics.items():
+            reference = baseline["results"].get(case, {}).get(metric)
+            if not reference:
+                continue
+            change = (value - reference) / reference
+            worse_by = change if lower_is_better(metric) else -change
+            rows.append({"case": case, "metric": metric, "baseline": reference, "current": value,
+                         "change_pct": change * 100, "regressed": worse_by > threshold})
+    return rows
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=list(DEFAULT_CASES))
+    parser.add_argument("--input", choices=["synthetic", "dataset"], default="synthetic")
+    parser.add_argument("--texts", type=int, default=5000)
+    parser.add_argument("--single-calls", type=int, default=500, help="Single-item calls timed for percentiles")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 32])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--save", default=None, help="Write the results as a baseline JSON file")
+    parser.add_argument("--compare", default=None, help="Baseline JSON file to check the results against")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Allowed relative regression, e.g. 0.15")
+    parser.add_argument("--run-case", choices=CASES, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_case:
+        texts = synthetic_texts(args.texts) if args.input == "synthetic" else dataset_texts(args.texts)
+        print(json.dumps(run_case(args.run_case, texts, args)))
+        return
+
+    from hate.constants import INFERENCE_BACKEND
+    settings = {"input": args.input, "texts": args.texts, "single_calls": args.single_calls,
+                "batch_size": args.batch_size, "concurrency": args.concurrency, "backend": INFERENCE_BACKEND}
+    baseline = None
+    if args.compare:
+        with open(args.compare) as handle:
+            baseline = json.load(handle)
+        mismatched = [name for name in SETTINGS if baseline["settings"].get(name) != settings[name]]
+        if mismatched:
+            parser.error(f"Settings {mismatched} differ from the baseline {args.compare}; results are not comparable")
+
+    results = {}
+    for case in args.cases:
+        print(f"Running {case} ({args.repeat} runs)", flush=True)
+        results[case] = run_isolated(case, args)
+    current = {"created": datetime.now().isoformat(timespec="seconds"), "git_commit": git_commit(),
+               "python": platform.python_version(), "platform": platform.platform(),
+               "cpu_count": os.cpu_count(), "settings": settings, "results": results}
+
+    print_table([{"case": case, "metric": metric, "value": value}
+                 for case, metrics in results.items() for metric, value in metrics.items()],
+                ["case", "metric", "value"])
+    if args.save:
+        os.makedirs(os.path.dirname(args.save) or ".", exist_ok=True)
+        with open(args.save, "w") as handle:
+            json.dump(current, handle, indent=2)
+        print(f"Saved baseline to {args.save}")
+    if baseline is not None:
+        rows = compare(baseline, current, args.threshold)
+        print()
+        print_table(rows, ["case", "metric", "baseline", "current", "change_pct", "regressed"])
+        regressions = [row for row in rows if row["regressed"]]
+        if regressions:
+            print(f"{len(regressions)} metrics regressed by more than {args.threshold:.0%} against {args.compare}")
+            sys.exit(1)
+        print(f"No regression beyond {args.threshold:.0%} against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
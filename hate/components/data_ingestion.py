@@ -31,7 +31,7 @@ class DataIngestion:
             # Ensure that the required directory for storing artifacts exists
             os.makedirs(self.data_ingestion_config.DATA_INGESTION_ARTIFACTS_DIR, exist_ok=True)
 
-            logging.info(f"Found ZIP file locally at {self.ZIP_FILE_PATH}")
+            logging.info("Found ZIP file locally at %s", self.ZIP_FILE_PATH)
             logging.info("Exited the get_data_locally method of Data ingestion class")
 
         except Exception as e:
@@ -55,6 +55,26 @@ class DataIngestion:
         except Exception as e:
             raise CustomException(e, sys) from e
 
+    def locate_zip_members(self):
+        """
+        Streaming mode: checks the dataset members are present in the ZIP
+        without extracting anything, and returns their member names.
+        """
+        logging.info("Entered the locate_zip_members method of Data ingestion class")
+        try:
+            members = (self.data_ingestion_config.IMBALANCE_DATA_MEMBER, self.data_ingestion_config.RAW_DATA_MEMBER)
+            with ZipFile(self.ZIP_FILE_PATH, 'r') as zip_ref:
+                names = set(zip_ref.namelist())
+            missing = [member for member in members if member not in names]
+            if missing:
+                raise FileNotFoundError(f"{missing} not found in {self.ZIP_FILE_PATH}")
+
+            logging.info("Exited the locate_zip_members method of Data ingestion class")
+            return members
+
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
     def initiate_data_ingestion(self) -> DataIngestionArtifacts:
         """
         Main function that handles the entire data ingestion process.
@@ -66,18 +86,27 @@ class DataIngestion:
             self.get_data_locally()
             logging.info("Fetched the data locally")
 
-            # Step 2: Unzip and clean the dataset
-            imbalance_data_file_path, raw_data_file_path = self.unzip_and_clean()
-            logging.info("Unzipped file and split into train and valid datasets")
-
-            # Step 3: Create a DataIngestionArtifacts object with extracted file paths
-            data_ingestion_artifacts = DataIngestionArtifacts(
-                imbalance_data_file_path=imbalance_data_file_path,
-                raw_data_file_path=raw_data_file_path
-            )
+            if self.data_ingestion_config.INGESTION_MODE == "stream":
+                # Step 2: Leave the data in the ZIP; DataTransformation reads it in chunks
+                imbalance_data_file_path, raw_data_file_path = self.locate_zip_members()
+                data_ingestion_artifacts = DataIngestionArtifacts(
+                    imbalance_data_file_path=imbalance_data_file_path,
+                    raw_data_file_path=raw_data_file_path,
+                    zip_file_path=self.ZIP_FILE_PATH
+                )
+            else:
+                # Step 2: Unzip and clean the dataset
+                imbalance_data_file_path, raw_data_file_path = self.unzip_and_clean()
+                logging.info("Unzipped file and split into train and valid datasets")
+
+                # Step 3: Create a DataIngestionArtifacts object with extracted file paths
+                data_ingestion_artifacts = DataIngestionArtifacts(
+                    imbalance_data_file_path=imbalance_data_file_path,
+                    raw_data_file_path=raw_data_file_path
+                )
 
             logging.info("Exited the initiate_data_ingestion method of Data ingestion class")
-            logging.info(f"Data ingestion artifact: {data_ingestion_artifacts}")
+            logging.info("Data ingestion artifact: %s", data_ingestion_artifacts)
 
             return data_ingestion_artifacts
 
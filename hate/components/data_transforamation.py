@@ -1,16 +1,28 @@
 import os
-import re
 import sys
-import string
+import multiprocessing
 import pandas as pd
-import nltk
-from nltk.corpus import stopwords
+from zipfile import ZipFile
+from itertools import chain
+from concurrent.futures import ProcessPoolExecutor
 from sklearn.model_selection import train_test_split
-from hate.logger import logging 
+from hate.logger import logging, LogSampler
 from hate.exception import CustomException
 from hate.entity.config_entity import DataTransformationConfig
+from hate.components.text_normalizer import get_text_normalizer
+from hate.utils.main_utils import load_frame, save_frame, FrameAppender
 from hate.entity.artifact_entity import DataIngestionArtifacts, DataTransformationArtifacts
 
+# concat_data_cleaning runs once per tweet, so its messages are sampled
+ROW_LOG = LogSampler()
+
+
+def _clean_tweet_chunk(tweets: list) -> list:
+    # Runs inside a worker process; each worker builds its own normalizer once.
+    normalizer = get_text_normalizer()
+    return [normalizer.normalize(tweet) for tweet in tweets]
+
+
 """Read the jupiter notebook experiment for the data transformation and implement the same in the below class"""
 class DataTransformation:
     def __init__(self,data_transformation_config: DataTransformationConfig,data_ingestion_artifacts:DataIngestionArtifacts):
@@ -20,10 +32,11 @@ class DataTransformation:
     def imbalance_data_cleaning(self):
         try:
             logging.info("Entered into the imbalance_data_cleaning function")
-            imbalance_data=pd.read_csv(self.data_ingestion_artifacts.imbalance_data_file_path)
-            imbalance_data.drop(self.data_transformation_config.ID,axis=self.data_transformation_config.AXIS , 
-            inplace = self.data_transformation_config.INPLACE)
-            logging.info(f"Exited the imbalance data_cleaning function and returned imbalance data {imbalance_data}")
+            imbalance_data=load_frame(self.data_ingestion_artifacts.imbalance_data_file_path,
+                                      artifact_format=self.data_ingestion_artifacts.artifact_format)
+            imbalance_data = self.clean_imbalance_frame(imbalance_data)
+            logging.info("Exited the imbalance data_cleaning function and returned imbalance data of shape %s",
+                         imbalance_data.shape)
             return imbalance_data 
         except Exception as e:
             raise CustomException(e,sys) from e 
@@ -34,34 +47,45 @@ class DataTransformation:
         
         try:
             logging.info("Entered into the raw_data_cleaning function")
-            raw_data = pd.read_csv(self.data_ingestion_artifacts.raw_data_file_path)
-            raw_data.drop(self.data_transformation_config.DROP_COLUMNS,axis = self.data_transformation_config.AXIS,
-            inplace = self.data_transformation_config.INPLACE)
-
-            raw_data[raw_data[self.data_transformation_config.CLASS]==0][self.data_transformation_config.CLASS]=1
-            
-            # replace the value of 0 to 1
-            raw_data[self.data_transformation_config.CLASS].replace({0:1},inplace=True)
-
-            # Let's replace the value of 2 to 0.
-            raw_data[self.data_transformation_config.CLASS].replace({2:0}, inplace = True)
-
-            # Let's change the name of the 'class' to label
-            raw_data.rename(columns={self.data_transformation_config.CLASS:self.data_transformation_config.LABEL},inplace =True)
-            logging.info(f"Exited the raw_data_cleaning function and returned the raw_data {raw_data}")
+            raw_data = load_frame(self.data_ingestion_artifacts.raw_data_file_path,
+                                  artifact_format=self.data_ingestion_artifacts.artifact_format)
+            raw_data = self.clean_raw_frame(raw_data)
+            logging.info("Exited the raw_data_cleaning function and returned the raw_data of shape %s", raw_data.shape)
             return raw_data
 
         except Exception as e:
             raise CustomException(e,sys) from e
         
+    def clean_imbalance_frame(self, imbalance_data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Column cleanup of the imbalanced data; works on the whole file or on a chunk of it.
+        """
+        imbalance_data.drop(self.data_transformation_config.ID,axis=self.data_transformation_config.AXIS , 
+        inplace = self.data_transformation_config.INPLACE)
+        return imbalance_data
+
+    def clean_raw_frame(self, raw_data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Column cleanup and relabelling of the raw data; works on the whole file or on a chunk of it.
+        """
+        raw_data.drop(self.data_transformation_config.DROP_COLUMNS,axis = self.data_transformation_config.AXIS,
+        inplace = self.data_transformation_config.INPLACE)
+
+        # 0 (hate speech) and 1 (offensive) become 1, 2 (neither) becomes 0. Assigned back:
+        # an inplace replace on the column is a no-op under pandas Copy-on-Write.
+        raw_data[self.data_transformation_config.CLASS] = raw_data[self.data_transformation_config.CLASS].replace({0: 1, 2: 0})
+
+        # Let's change the name of the 'class' to label
+        raw_data.rename(columns={self.data_transformation_config.CLASS:self.data_transformation_config.LABEL},inplace =True)
+        return raw_data
+
     def concat_dataframe(self):
         try:
             logging.info("Entered into the concat_dataframe function")
             # Let's concatinate both the data into a single data frame.
             frame = [self.raw_data_cleaning(), self.imbalance_data_cleaning()]
             df = pd.concat(frame)
-            print(df.head())
-            logging.info(f"returned the concatinated dataframe {df}")
+            logging.info("returned the concatinated dataframe of shape %s", df.shape)
             return df
 
         except Exception as e:
@@ -71,41 +95,98 @@ class DataTransformation:
 
     def concat_data_cleaning(self, words):
         try:
-            logging.info("Entered into the concat_data_cleaning function")
-            # Let's apply stemming and stopwords on the data
-            stemmer = nltk.SnowballStemmer("english")
-            stopword = set(stopwords.words('english'))
-            words = str(words).lower()
-            words = re.sub('\[.*?\]', '', words)
-            words = re.sub('https?://\S+|www\.\S+', '', words)
-            words = re.sub('<.*?>+', '', words)
-            words = re.sub('[%s]' % re.escape(string.punctuation), '', words)
-            words = re.sub('\n', '', words)
-            words = re.sub('\w*\d\w*', '', words)
-            words = [word for word in words.split(' ') if words not in stopword]
-            words=" ".join(words)
-            words = [stemmer.stem(word) for word in words.split(' ')]
-            words=" ".join(words)
-            logging.info("Exited the concat_data_cleaning function")
+            # Let's apply regex cleaning, stopwords and stemming on the data
+            words = get_text_normalizer().normalize(words)
+            ROW_LOG.debug("Cleaned a tweet in concat_data_cleaning")
             return words 
 
         except Exception as e:
             raise CustomException(e, sys) from e
     
 
+    def _cleaning_pool(self) -> ProcessPoolExecutor:
+        # spawn, not fork: the training process may already have TensorFlow threads running.
+        return ProcessPoolExecutor(max_workers=self.data_transformation_config.WORKERS,
+                                   mp_context=multiprocessing.get_context("spawn"))
+
+    def clean_tweets(self, tweets: pd.Series, pool: ProcessPoolExecutor = None) -> pd.Series:
+        """
+        Applies concat_data_cleaning to every tweet. With more than one worker the
+        column is sharded into CHUNK_SIZE slices and cleaned on a process pool;
+        the result is identical to the serial path, in the same order.
+        :param pool: Process pool to reuse across calls; a temporary one is created when None.
+        """
+        try:
+            workers = self.data_transformation_config.WORKERS
+            chunk_size = self.data_transformation_config.CHUNK_SIZE
+            if workers <= 1 or len(tweets) <= chunk_size:
+                logging.info("Cleaning tweets serially")
+                return tweets.apply(self.concat_data_cleaning)
+
+            logging.info("Cleaning %d tweets on %d processes in chunks of %d", len(tweets), workers, chunk_size)
+            values = tweets.tolist()
+            chunks = [values[start:start + chunk_size] for start in range(0, len(values), chunk_size)]
+            if pool is not None:
+                cleaned = list(chain.from_iterable(pool.map(_clean_tweet_chunk, chunks)))
+            else:
+                with self._cleaning_pool() as pool:
+                    cleaned = list(chain.from_iterable(pool.map(_clean_tweet_chunk, chunks)))
+            return pd.Series(cleaned, index=tweets.index, name=tweets.name)
+
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def stream_transformation(self) -> int:
+        """
+        Streaming counterpart of concat_dataframe + clean_tweets + save_frame.
+        Reads both CSV members straight out of the dataset ZIP in
+        STREAMING_CHUNK_SIZE rows, cleans each chunk and appends it to the
+        transformed artifact, so peak memory is bounded by the chunk size.
+        Rows come out in the same order as the in-memory path.
+        :return: Number of rows written.
+        """
+        try:
+            logging.info("Entered the stream_transformation method of Data transformation class")
+            members = [(self.data_ingestion_artifacts.raw_data_file_path, self.clean_raw_frame),
+                       (self.data_ingestion_artifacts.imbalance_data_file_path, self.clean_imbalance_frame)]
+            columns = [self.data_transformation_config.LABEL, self.data_transformation_config.TWEET]
+            pool = self._cleaning_pool() if self.data_transformation_config.WORKERS > 1 else None
+            try:
+                with ZipFile(self.data_ingestion_artifacts.zip_file_path, 'r') as zip_ref, \
+                        FrameAppender(self.data_transformation_config.TRANSFORMED_FILE_PATH,
+                                      artifact_format=self.data_transformation_config.ARTIFACT_FORMAT) as appender:
+                    for member, clean_frame in members:
+                        with zip_ref.open(member) as handle:
+                            for chunk in pd.read_csv(handle, chunksize=self.data_transformation_config.STREAMING_CHUNK_SIZE):
+                                chunk = clean_frame(chunk)[columns]
+                                chunk[self.data_transformation_config.TWEET] = self.clean_tweets(
+                                    chunk[self.data_transformation_config.TWEET], pool=pool)
+                                appender.append(chunk)
+                        logging.info("Streamed %s, %d rows written so far", member, appender.rows)
+            finally:
+                if pool is not None:
+                    pool.shutdown()
+            logging.info("Exited the stream_transformation method of Data transformation class")
+            return appender.rows
+
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
     def initiate_data_transformation(self) -> DataTransformationArtifacts:
         try:
             logging.info("Entered the initiate_data_transformation method of Data transformation class")
-            self.imbalance_data_cleaning()
-            self.raw_data_cleaning()
-            df = self.concat_dataframe()
-            df[self.data_transformation_config.TWEET]=df[self.data_transformation_config.TWEET].apply(self.concat_data_cleaning)
-
             os.makedirs(self.data_transformation_config.DATA_TRANSFORMATION_ARTIFACTS_DIR, exist_ok=True)
-            df.to_csv(self.data_transformation_config.TRANSFORMED_FILE_PATH,index=False,header=True)
+            if self.data_ingestion_artifacts.zip_file_path:
+                self.stream_transformation()
+            else:
+                df = self.concat_dataframe()
+                df[self.data_transformation_config.TWEET]=self.clean_tweets(df[self.data_transformation_config.TWEET])
+                save_frame(df, self.data_transformation_config.TRANSFORMED_FILE_PATH,
+                           artifact_format=self.data_transformation_config.ARTIFACT_FORMAT, index=False)
 
             data_transformation_artifact = DataTransformationArtifacts(
-                transformed_data_path = self.data_transformation_config.TRANSFORMED_FILE_PATH
+                transformed_data_path = self.data_transformation_config.TRANSFORMED_FILE_PATH,
+                artifact_format = self.data_transformation_config.ARTIFACT_FORMAT
             )
             logging.info("returning the DataTransformationArtifacts")
             return data_transformation_artifact
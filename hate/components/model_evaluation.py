@@ -3,13 +3,16 @@ import sys
 import keras
 import pickle
 import numpy as np
-import pandas as pd
 from keras.utils import pad_sequences
 from keras.preprocessing.text import Tokenizer
-from sklearn.metrics import confusion_matrix
 from hate.logger import logging
 from hate.exception import CustomException
-from hate.constants import MAX_LEN
+from hate.constants import MAX_LEN, TWEET, LABEL
+from hate.utils.main_utils import load_frame
+from hate.utils.sequence_cache import SequenceCache
+from hate.ml.bucketing import LengthBucketedSequence
+from hate.ml.evaluation import binary_classification_metrics
+from hate.ml.backends import NumpyBackend, NUMPY_MANIFEST_NAME
 from hate.entity.config_entity import ModelEvaluationConfig
 from hate.entity.artifact_entity import ModelEvaluationArtifacts, ModelTrainerArtifacts, DataTransformationArtifacts
 
@@ -28,6 +31,8 @@ class ModelEvaluation:
         self.evaluation_config = evaluation_config
         self.trainer_artifacts = trainer_artifacts
         self.transformation_artifacts = transformation_artifacts
+        self.sequence_cache = SequenceCache(self.evaluation_config.SEQUENCE_CACHE_DIR)
+        self._test_data = None
 
     def fetch_best_model_path(self) -> str:
         """
@@ -45,56 +50,99 @@ class ModelEvaluation:
 
     def _load_test_data(self):
         """
-        Loads the test data and prepares the text sequences.
+        Loads the test data and prepares the text sequences, once per
+        ModelEvaluation; the candidate and the best model share the result.
         :return: A tuple of (padded_test_sequences, y_test, tokenizer)
         """
+        if self._test_data is not None:
+            return self._test_data
         try:
             # Load test data
-            x_test = pd.read_csv(self.trainer_artifacts.x_test_path, index_col=0)
-            y_test = pd.read_csv(self.trainer_artifacts.y_test_path, index_col=0)
+            artifact_format = self.trainer_artifacts.artifact_format
+            x_test = load_frame(self.trainer_artifacts.x_test_path, artifact_format=artifact_format, index=True)
+            y_test = load_frame(self.trainer_artifacts.y_test_path, artifact_format=artifact_format, index=True)
 
             # Load tokenizer from pickle file
-            with open('tokenizer.pickle', 'rb') as handle:
+            with open(self.evaluation_config.TOKENIZER_PATH, 'rb') as handle:
                 tokenizer = pickle.load(handle)
 
             # Convert tweet column to string and prepare sequences
-            x_test = x_test['tweet'].astype(str).squeeze()
-            y_test = y_test.squeeze()
+            x_test = x_test[TWEET].astype(str)
+            y_test = y_test[LABEL].to_numpy()
 
-            test_sequences = tokenizer.texts_to_sequences(x_test)
-            padded_sequences = pad_sequences(test_sequences, maxlen=MAX_LEN)
+            # Across runs, an unchanged test set also reuses the cached matrix
+            padded_sequences = self.sequence_cache.get_padded_sequences(
+                tokenizer, x_test, MAX_LEN,
+                lambda tokenizer, texts: pad_sequences(tokenizer.texts_to_sequences(texts), maxlen=MAX_LEN))
 
-            return padded_sequences, y_test, tokenizer
+            self._test_data = (padded_sequences, y_test, tokenizer)
+            return self._test_data
         except Exception as e:
             raise CustomException(e, sys) from e
 
-    def evaluate_model(self, model) -> float:
+    def predict_scores(self, model, padded_sequences) -> np.ndarray:
         """
-        Evaluates the given model on the test dataset.
+        One batched forward pass over the test set. Models that mask padding
+        are fed length-bucketed batches trimmed to their longest row, and the
+        scores are put back in row order.
+        """
+        batch_size = self.evaluation_config.BATCH_SIZE
+        if not any(getattr(layer, "mask_zero", False) for layer in model.layers):
+            return np.asarray(model.predict(padded_sequences, batch_size=batch_size, verbose=0)).reshape(-1)
+        batches = LengthBucketedSequence(padded_sequences, np.zeros(len(padded_sequences)), batch_size, shuffle=False)
+        bucketed_scores = np.asarray(model.predict(batches, verbose=0)).reshape(-1)
+        scores = np.empty(len(padded_sequences), dtype=bucketed_scores.dtype)
+        scores[np.concatenate([np.sort(rows) for rows in batches.batches])] = bucketed_scores
+        return scores
+
+    def evaluate_model(self, model) -> dict:
+        """
+        Evaluates the given model on the test dataset with a single predict;
+        every metric is computed from those scores.
         :param model: Keras model to evaluate.
-        :return: Evaluation metric (accuracy or loss depending on model.compile) of the model.
+        :return: Metrics from binary_classification_metrics (loss, accuracy, precision,
+                 recall, f1, auc, confusion_matrix).
         """
         try:
             padded_sequences, y_test, _ = self._load_test_data()
+            scores = self.predict_scores(model, padded_sequences)
+            metrics = binary_classification_metrics(y_test, scores, threshold=self.evaluation_config.THRESHOLD)
+            logging.info("Evaluation metrics: %s", metrics)
+            return metrics
+        except Exception as e:
+            raise CustomException(e, sys) from e
 
-            # Evaluate the model on test data
-            evaluation_score = model.evaluate(padded_sequences, y_test, verbose=0)
-            logging.info(f"Evaluation score: {evaluation_score}")
-
-            # Get predictions and compute confusion matrix
-            predictions = model.predict(padded_sequences)
-            predicted_labels = [0 if pred[0] < 0.5 else 1 for pred in predictions]
-            conf_matrix = confusion_matrix(y_test, predicted_labels)
-            logging.info(f"Confusion Matrix: {conf_matrix}")
-
-            return evaluation_score
+    def evaluate_quantized_weights(self, reference_metrics: dict):
+        """
+        Scores the test set with the int8 weights ModelTrainer exported next to
+        the trained model and reports how far each metric moved from the Keras model.
+        :param reference_metrics: evaluate_model output for the trained Keras model.
+        :return: None without a quantized export, else a dict with the quantization
+                 mode, its metrics and the per-metric delta (quantized - Keras).
+        """
+        try:
+            weights_dir = os.path.join(os.path.dirname(self.trainer_artifacts.trained_model_path),
+                                       self.evaluation_config.QUANTIZED_WEIGHTS_DIR_NAME)
+            if not os.path.isfile(os.path.join(weights_dir, NUMPY_MANIFEST_NAME)):
+                return None
+            backend = NumpyBackend(weights_dir)
+            padded_sequences, y_test, _ = self._load_test_data()
+            # Rows of similar length share a forward pass, which then skips their common padding.
+            order = np.argsort(np.count_nonzero(padded_sequences, axis=1), kind="stable")
+            scores = np.empty(len(order), dtype=np.float32)
+            scores[order] = backend.predict(padded_sequences[order], batch_size=self.evaluation_config.BATCH_SIZE)
+            metrics = binary_classification_metrics(y_test, scores, threshold=self.evaluation_config.THRESHOLD)
+            delta = {name: value - reference_metrics[name] for name, value in metrics.items()
+                     if isinstance(value, float)}
+            logging.info("Quantized (%s) weights metric delta vs Keras: %s", backend.quantization, delta)
+            return {"quantization": backend.quantization, "metrics": metrics, "delta": delta}
         except Exception as e:
             raise CustomException(e, sys) from e
 
     def initiate_model_evaluation(self) -> ModelEvaluationArtifacts:
         """
         Initiates the model evaluation process:
-         - Loads the currently trained model and evaluates it.
+         - Loads the currently trained model and evaluates it, and its int8 weights if exported.
          - Fetches the best model (if available) from storage and evaluates it.
          - Compares the evaluation metrics and decides whether to accept the new model.
         :return: ModelEvaluationArtifacts with the decision.
@@ -102,8 +150,11 @@ class ModelEvaluation:
         logging.info("Initiating model evaluation process")
         try:
             # Load the currently trained model and evaluate it
+            metric = self.evaluation_config.METRIC
             trained_model = keras.models.load_model(self.trainer_artifacts.trained_model_path)
-            trained_model_score = self.evaluate_model(trained_model)
+            trained_model_metrics = self.evaluate_model(trained_model)
+            quantized_model_metrics = self.evaluate_quantized_weights(trained_model_metrics)
+            best_model_metrics = None
 
             # Fetch best model path from cloud storage
             best_model_path = self.fetch_best_model_path()
@@ -115,17 +166,20 @@ class ModelEvaluation:
             else:
                 # Load and evaluate the best model
                 best_model = keras.models.load_model(best_model_path)
-                best_model_score = self.evaluate_model(best_model)
+                best_model_metrics = self.evaluate_model(best_model)
 
                 # Accept the new model only if it outperforms the best model
-                if trained_model_score > best_model_score:
+                if trained_model_metrics[metric] > best_model_metrics[metric]:
                     accept_new_model = True
                     logging.info("Newly trained model outperforms the best model. New model accepted.")
                 else:
                     accept_new_model = False
                     logging.info("Newly trained model did not outperform the best model. New model rejected.")
 
-            evaluation_artifact = ModelEvaluationArtifacts(is_model_accepted=accept_new_model)
+            evaluation_artifact = ModelEvaluationArtifacts(is_model_accepted=accept_new_model,
+                                                           trained_model_metrics=trained_model_metrics,
+                                                           best_model_metrics=best_model_metrics,
+                                                           quantized_model_metrics=quantized_model_metrics)
             logging.info("Model evaluation process completed")
             return evaluation_artifact
 
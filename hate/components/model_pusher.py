@@ -0,0 +1,68 @@
+import os
+import sys
+import shutil
+from hate.logger import logging
+from hate.exception import CustomException
+from hate.entity.config_entity import ModelPusherConfig
+from hate.entity.artifact_entity import ModelPusherArtifacts, ModelTrainerArtifacts
+
+
+class ModelPusher:
+    def __init__(self, model_pusher_config: ModelPusherConfig, model_trainer_artifacts: ModelTrainerArtifacts):
+        """
+        Publishes an accepted model to the directory the API serves from.
+        :param model_pusher_config: Configuration for model pushing.
+        :param model_trainer_artifacts: Artifacts produced by the model training stage.
+        """
+        self.model_pusher_config = model_pusher_config
+        self.model_trainer_artifacts = model_trainer_artifacts
+
+    @staticmethod
+    def _atomic_copy(source: str, destination: str) -> None:
+        # A reader sees either the old file or the new one, never a partial copy.
+        tmp_path = f"{destination}.{os.getpid()}.tmp"
+        shutil.copyfile(source, tmp_path)
+        os.replace(tmp_path, destination)
+
+    def _files_to_push(self) -> list:
+        """
+        (source, destination) pairs, model last: the API's watcher treats a
+        changed model file as the end of a push.
+        """
+        config = self.model_pusher_config
+        files = []
+        model_dir = os.path.dirname(self.model_trainer_artifacts.trained_model_path)
+        for dir_name in (config.NUMPY_WEIGHTS_DIR_NAME, config.QUANTIZED_WEIGHTS_DIR_NAME):
+            weights_dir = os.path.join(model_dir, dir_name)
+            if os.path.isdir(weights_dir):
+                for file_name in sorted(os.listdir(weights_dir)):
+                    files.append((os.path.join(weights_dir, file_name),
+                                  os.path.join(config.PREDICT_MODEL_DIR, dir_name, file_name)))
+        for path in (config.TOKENIZER_PATH, config.VOCAB_PATH, self.model_trainer_artifacts.trained_texts_path):
+            if path and os.path.exists(path):
+                files.append((path, os.path.join(config.PREDICT_MODEL_DIR, os.path.basename(path))))
+        files.append((self.model_trainer_artifacts.trained_model_path,
+                      os.path.join(config.PREDICT_MODEL_DIR, config.MODEL_NAME)))
+        return files
+
+    def initiate_model_pusher(self) -> ModelPusherArtifacts:
+        """
+        Copies the model, its float and int8 NumPy weights, its tokenizer pair and the hashes
+        of its training texts into PREDICT_MODEL_DIR.
+        :return: ModelPusherArtifacts listing the pushed files.
+        """
+        logging.info("Entered initiate_model_pusher method of ModelPusher class")
+        try:
+            pushed_files = []
+            for source, destination in self._files_to_push():
+                os.makedirs(os.path.dirname(destination), exist_ok=True)
+                self._atomic_copy(source, destination)
+                pushed_files.append(destination)
+
+            model_pusher_artifacts = ModelPusherArtifacts(predict_model_dir=self.model_pusher_config.PREDICT_MODEL_DIR,
+                                                          pushed_files=pushed_files)
+            logging.info("Pushed %d files to %s", len(pushed_files), self.model_pusher_config.PREDICT_MODEL_DIR)
+            logging.info("Exited initiate_model_pusher method of ModelPusher class")
+            return model_pusher_artifacts
+        except Exception as e:
+            raise CustomException(e, sys) from e
@@ -1,16 +1,21 @@
 import os 
 import sys
 import pickle
-import pandas as pd
+import numpy as np
 from hate.logger import logging
 from hate.constants import *
 from hate.exception import CustomException
-from sklearn.model_selection import train_test_split
 from keras.preprocessing.text import Tokenizer
 from keras.utils import pad_sequences
 from hate.entity.config_entity import ModelTrainerConfig
 from hate.entity.artifact_entity import ModelTrainerArtifacts,DataTransformationArtifacts
 from hate.ml.model import ModelArchitecture
+from hate.ml.tokenizer import VocabTokenizer, export_vocabulary
+from hate.ml.export import export_and_check
+from hate.ml.bucketing import LengthBucketedSequence
+from hate.ml.input_pipeline import TextDatasetBuilder, configure_training_threads
+from hate.utils.main_utils import load_frame, save_frame, text_hashes, split_by_text_hash
+from hate.utils.sequence_cache import SequenceCache
 
 class ModelTrainer:
     def __init__(self,data_transformation_artifacts: DataTransformationArtifacts,
@@ -18,22 +23,23 @@ class ModelTrainer:
 
         self.data_transformation_artifacts = data_transformation_artifacts
         self.model_trainer_config = model_trainer_config
+        self.sequence_cache = SequenceCache(self.model_trainer_config.SEQUENCE_CACHE_DIR)
 
     
-    def spliting_data(self,csv_path):
+    def spliting_data(self,data_path):
         try:
             logging.info("Entered the spliting_data function")
             logging.info("Reading the data")
-            df = pd.read_csv(csv_path, index_col=False)
+            df = load_frame(data_path, artifact_format=self.data_transformation_artifacts.artifact_format,
+                            columns=[TWEET, LABEL])
             logging.info("Splitting the data into x and y")
             x = df[TWEET]
             y = df[LABEL]
 
-            logging.info("Applying train_test_split on the data")
-            x_train,x_test,y_train,y_test = train_test_split(x,y, test_size=0.3,random_state = 42)
-            print(len(x_train),len(y_train))
-            print(len(x_test),len(y_test))
-            print(type(x_train),type(y_train))
+            logging.info("Splitting the data by text hash")
+            x_train,x_test,y_train,y_test = split_by_text_hash(x, y, self.model_trainer_config.TEST_SIZE,
+                                                               self.model_trainer_config.RANDOM_STATE)
+            logging.info("Split into %d train and %d test rows", len(x_train), len(x_test))
             logging.info("Exited the spliting the data function")
             return x_train,x_test,y_train,y_test
 
@@ -45,12 +51,13 @@ class ModelTrainer:
     def tokenizing(self,x_train):
         try:
             logging.info("Applying tokenization on the data")
-            tokenizer = Tokenizer(num_words=self.model_trainer_config.MAX_WORDS)
-            tokenizer.fit_on_texts(x_train)
-            sequences = tokenizer.texts_to_sequences(x_train)
-            logging.info(f"converting text to sequences: {sequences}")
-            sequences_matrix = pad_sequences(sequences,maxlen=self.model_trainer_config.MAX_LEN)
-            logging.info(f" The sequence matrix is: {sequences_matrix}")
+            # Unchanged training data reuses both the fitted tokenizer and the matrix
+            tokenizer = self.sequence_cache.get_fitted_tokenizer(x_train, self.model_trainer_config.MAX_WORDS,
+                                                                 self._fit_tokenizer)
+            sequences_matrix = self.sequence_cache.get_padded_sequences(tokenizer, x_train,
+                                                                        self.model_trainer_config.MAX_LEN,
+                                                                        self._texts_to_padded)
+            logging.info("The sequence matrix has shape %s", sequences_matrix.shape)
             return sequences_matrix,tokenizer
         except Exception as e:
             raise CustomException(e, sys) from e
@@ -58,6 +65,158 @@ class ModelTrainer:
 
     
 
+    def _fit_tokenizer(self, texts):
+        tokenizer = Tokenizer(num_words=self.model_trainer_config.MAX_WORDS)
+        tokenizer.fit_on_texts(texts)
+        return tokenizer
+
+    def _texts_to_padded(self, tokenizer, texts):
+        sequences = tokenizer.texts_to_sequences(texts)
+        logging.debug("Converted %d texts to sequences", len(sequences))
+        return pad_sequences(sequences,maxlen=self.model_trainer_config.MAX_LEN)
+
+    def export_tokenizer(self, tokenizer, sample_texts) -> None:
+        """
+        Pickles the Keras tokenizer and exports the compact vocabulary file used
+        at serve time, checking that both give identical ids on sample_texts.
+        """
+        try:
+            # Replaced atomically, like the vocabulary: a running server may be reading the old one
+            tmp_path = f"{self.model_trainer_config.TOKENIZER_PATH}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as handle:
+                pickle.dump(tokenizer, handle, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.model_trainer_config.TOKENIZER_PATH)
+            vocab_size = export_vocabulary(tokenizer, self.model_trainer_config.VOCAB_PATH)
+            if not VocabTokenizer.load(self.model_trainer_config.VOCAB_PATH).matches(
+                    tokenizer, list(sample_texts), maxlen=self.model_trainer_config.MAX_LEN):
+                raise ValueError("Exported vocabulary does not reproduce the Keras tokenizer ids")
+            logging.info("Exported %d words to %s", vocab_size, self.model_trainer_config.VOCAB_PATH)
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def fit_model(self, model, sequences_matrix, y_train, epochs: int = None):
+        """
+        Trains the model with early stopping and checkpointing. When the model
+        masks padding and BUCKET_BY_LENGTH is set, batches are bucketed by
+        length and padded only to their longest sequence; otherwise every
+        batch uses the full MAX_LEN matrix.
+        :param epochs: Maximum number of epochs; EPOCH when None.
+        """
+        try:
+            config = self.model_trainer_config
+            epochs = epochs or config.EPOCH
+            callbacks = self._callbacks()
+            masks_padding = self._masks_padding(model)
+            if not (config.BUCKET_BY_LENGTH and masks_padding):
+                return model.fit(sequences_matrix, y_train,
+                                 batch_size=config.BATCH_SIZE,
+                                 epochs=epochs,
+                                 validation_split=config.VALIDATION_SPLIT,
+                                 callbacks=callbacks)
+
+            # Same split as Keras' validation_split: the last fraction of the rows.
+            labels = np.asarray(y_train)
+            split_at = int(len(labels) * (1 - config.VALIDATION_SPLIT))
+            train_batches = LengthBucketedSequence(sequences_matrix[:split_at], labels[:split_at], config.BATCH_SIZE)
+            validation_batches = LengthBucketedSequence(sequences_matrix[split_at:], labels[split_at:],
+                                                        config.BATCH_SIZE, shuffle=False)
+            logging.info("Training on %d length-bucketed batches", len(train_batches))
+            return model.fit(train_batches, epochs=epochs, validation_data=validation_batches, callbacks=callbacks)
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    @staticmethod
+    def _masks_padding(model) -> bool:
+        return any(getattr(layer, "mask_zero", False) for layer in model.layers)
+
+    def _callbacks(self) -> list:
+        config = self.model_trainer_config
+        os.makedirs(os.path.dirname(config.CHECKPOINT_PATH), exist_ok=True)
+        return ModelArchitecture().get_callbacks(config.CHECKPOINT_PATH, config.EARLY_STOPPING_PATIENCE)
+
+    def fit_dataset(self, model, tokenizer, texts, labels, epochs: int = None):
+        """
+        Trains the model from a tf.data pipeline that tokenizes and pads the
+        cleaned texts in parallel while the previous steps train, instead of
+        from a pre-built sequence matrix.
+        """
+        try:
+            config = self.model_trainer_config
+            builder = TextDatasetBuilder(tokenizer, maxlen=config.MAX_LEN, mask_padding=self._masks_padding(model),
+                                         num_parallel_calls=config.TFDATA_NUM_PARALLEL_CALLS,
+                                         threads=config.TFDATA_THREADS, shuffle_buffer=config.TFDATA_SHUFFLE_BUFFER,
+                                         cache=config.TFDATA_CACHE, seed=config.RANDOM_STATE)
+            train_dataset, validation_dataset = builder.build_train_validation(texts, labels, config.BATCH_SIZE,
+                                                                               config.VALIDATION_SPLIT)
+            logging.info("Training from a tf.data pipeline over %d texts", len(texts))
+            return model.fit(train_dataset, epochs=epochs or config.EPOCH, validation_data=validation_dataset,
+                             callbacks=self._callbacks())
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def fit_texts(self, model, tokenizer, texts, labels, epochs: int = None):
+        """
+        Trains the model on cleaned texts with the input mode selected by TRAINING_INPUT.
+        """
+        if self.model_trainer_config.TRAINING_INPUT == "tf_data":
+            return self.fit_dataset(model, tokenizer, texts, labels, epochs)
+        sequences_matrix = self.sequence_cache.get_padded_sequences(tokenizer, texts, self.model_trainer_config.MAX_LEN,
+                                                                    self._texts_to_padded)
+        return self.fit_model(model, sequences_matrix, labels, epochs)
+
+    def load_trained_hashes(self) -> np.ndarray:
+        # Hashes pushed with the warm-start model; a rejected run never reaches them.
+        path = self.model_trainer_config.WARM_START_TRAINED_TEXTS_PATH
+        return np.load(path) if os.path.exists(path) else np.empty(0, dtype=np.uint64)
+
+    def save_trained_hashes(self, hashes: np.ndarray) -> None:
+        np.save(self.model_trainer_config.TRAINED_TEXTS_PATH, np.unique(hashes))
+
+    def can_warm_start(self) -> bool:
+        config = self.model_trainer_config
+        if config.TRAINING_MODE != "warm_start":
+            return False
+        if os.path.exists(config.WARM_START_MODEL_PATH) and os.path.exists(config.WARM_START_TOKENIZER_PATH):
+            return True
+        logging.info("No model and tokenizer to warm start from at %s, training from scratch",
+                     config.WARM_START_MODEL_PATH)
+        return False
+
+    def select_unseen_rows(self, x_train, y_train, trained_hashes: np.ndarray):
+        """
+        Keeps the rows the warm-start model was not trained on, plus a random
+        WARM_START_REPLAY_FRACTION of the seen ones so it does not forget them.
+        Rows stay in their shuffled order, so the validation split mixes both.
+        """
+        seen = np.isin(text_hashes(x_train), trained_hashes)
+        rng = np.random.default_rng(self.model_trainer_config.RANDOM_STATE)
+        replay = seen & (rng.random(len(seen)) < self.model_trainer_config.WARM_START_REPLAY_FRACTION)
+        keep = ~seen | replay
+        logging.info("Warm start: %d new rows, %d replayed of %d seen", int((~seen).sum()), int(replay.sum()),
+                     int(seen.sum()))
+        return x_train[keep], y_train[keep]
+
+    def warm_start(self, x_train, y_train):
+        """
+        Fine-tunes the serving model on the training rows it has not seen yet,
+        keeping its tokenizer so the embedding rows keep their meaning. Words
+        outside the existing vocabulary are dropped, as at serve time.
+        :return: The fine-tuned model and the unchanged tokenizer.
+        """
+        config = self.model_trainer_config
+        logging.info("Warm starting from %s", config.WARM_START_MODEL_PATH)
+        model = ModelArchitecture().load_for_fine_tuning(config.WARM_START_MODEL_PATH,
+                                                         config.WARM_START_LEARNING_RATE)
+        # The tokenizer pushed with the model: the working-directory copy is rewritten by every run.
+        with open(config.WARM_START_TOKENIZER_PATH, 'rb') as handle:
+            tokenizer = pickle.load(handle)
+        x_new, y_new = self.select_unseen_rows(x_train, y_train, self.load_trained_hashes())
+        if len(x_new) == 0:
+            logging.info("Warm start: no new rows, keeping the current weights")
+            return model, tokenizer
+        self.fit_texts(model, tokenizer, x_new, y_new, epochs=config.WARM_START_EPOCH)
+        return model, tokenizer
+
     def initiate_model_trainer(self,) -> ModelTrainerArtifacts:
         logging.info("Entered initiate_model_trainer method of ModelTrainer class")
 
@@ -71,34 +230,56 @@ class ModelTrainer:
 
         try:
             logging.info("Entered the initiate_model_trainer function ")
-            x_train,x_test,y_train,y_test = self.spliting_data(csv_path=self.data_transformation_artifacts.transformed_data_path)
-            model_architecture = ModelArchitecture()   
-            model = model_architecture.get_model()
-            logging.info(f"Xtrain size is : {x_train.shape}")
-            logging.info(f"Xtest size is : {x_test.shape}")
-            sequences_matrix,tokenizer =self.tokenizing(x_train)
-            logging.info("Entered into model training")
-            model.fit(sequences_matrix, y_train, 
-                        batch_size=self.model_trainer_config.BATCH_SIZE, 
-                        epochs = self.model_trainer_config.EPOCH, 
-                        validation_split=self.model_trainer_config.VALIDATION_SPLIT, 
-                        )
+            configure_training_threads(self.model_trainer_config.TRAIN_INTRA_OP_THREADS,
+                                       self.model_trainer_config.TRAIN_INTER_OP_THREADS)
+            x_train,x_test,y_train,y_test = self.spliting_data(data_path=self.data_transformation_artifacts.transformed_data_path)
+            logging.info("Xtrain size is : %s", x_train.shape)
+            logging.info("Xtest size is : %s", x_test.shape)
+            if self.can_warm_start():
+                # Models trained before the split went by text hash may have seen some test rows
+                trained = np.isin(text_hashes(x_test), self.load_trained_hashes())
+                if trained.any():
+                    logging.info("Warm start: dropping %d test rows the model was trained on", int(trained.sum()))
+                    x_test, y_test = x_test[~trained], y_test[~trained]
+                model, tokenizer = self.warm_start(x_train, y_train)
+                trained_hashes = np.concatenate([self.load_trained_hashes(), text_hashes(x_train)])
+            else:
+                model_architecture = ModelArchitecture()   
+                model = model_architecture.get_model()
+                logging.info("Entered into model training")
+                if self.model_trainer_config.TRAINING_INPUT == "tf_data":
+                    tokenizer = self.sequence_cache.get_fitted_tokenizer(x_train, self.model_trainer_config.MAX_WORDS,
+                                                                         self._fit_tokenizer)
+                    self.fit_dataset(model, tokenizer, x_train, y_train)
+                else:
+                    sequences_matrix,tokenizer =self.tokenizing(x_train)
+                    self.fit_model(model, sequences_matrix, y_train)
+                trained_hashes = text_hashes(x_train)
             logging.info("Model training finished")
         
-            with open('tokenizer.pickle', 'wb') as handle:
-                pickle.dump(tokenizer, handle, protocol=pickle.HIGHEST_PROTOCOL)
+            self.export_tokenizer(tokenizer, x_train[:1000])
             os.makedirs(self.model_trainer_config.TRAINED_MODEL_DIR,exist_ok=True)
+            # Written next to the candidate model; it only replaces the warm-start hashes once pushed.
+            self.save_trained_hashes(trained_hashes)
 
             logging.info("saving the model")
             model.save(self.model_trainer_config.TRAINED_MODEL_PATH)
-            x_test.to_csv(self.model_trainer_config.X_TEST_DATA_PATH)
-            y_test.to_csv(self.model_trainer_config.Y_TEST_DATA_PATH)
-            x_train.to_csv(self.model_trainer_config.X_TRAIN_DATA_PATH)
+            export_and_check(model, self.model_trainer_config.NUMPY_WEIGHTS_DIR)
+            if self.model_trainer_config.WEIGHT_QUANTIZATION != "none":
+                export_and_check(model, self.model_trainer_config.QUANTIZED_WEIGHTS_DIR,
+                                 quantization=self.model_trainer_config.WEIGHT_QUANTIZATION)
+            artifact_format = self.model_trainer_config.ARTIFACT_FORMAT
+            save_frame(x_test, self.model_trainer_config.X_TEST_DATA_PATH, artifact_format=artifact_format, index=True)
+            save_frame(y_test, self.model_trainer_config.Y_TEST_DATA_PATH, artifact_format=artifact_format, index=True)
+            save_frame(x_train, self.model_trainer_config.X_TRAIN_DATA_PATH, artifact_format=artifact_format, index=True)
 
             model_trainer_artifacts = ModelTrainerArtifacts(
                 trained_model_path = self.model_trainer_config.TRAINED_MODEL_PATH,
                 x_test_path = self.model_trainer_config.X_TEST_DATA_PATH,
-                y_test_path = self.model_trainer_config.Y_TEST_DATA_PATH)
+                y_test_path = self.model_trainer_config.Y_TEST_DATA_PATH,
+                artifact_format = artifact_format,
+                x_train_path = self.model_trainer_config.X_TRAIN_DATA_PATH,
+                trained_texts_path = self.model_trainer_config.TRAINED_TEXTS_PATH)
             logging.info("Returning the ModelTrainerArtifacts")
             return model_trainer_artifacts
 
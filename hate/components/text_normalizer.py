@@ -0,0 +1,67 @@
+import re
+import sys
+import string
+import functools
+import nltk
+from nltk.corpus import stopwords
+from hate.exception import CustomException
+from hate.constants import CLEANING_LANGUAGE, STEM_CACHE_SIZE
+
+
+class TextNormalizer:
+    # Compiled once at import instead of on every call.
+    BRACKETS_PATTERN = re.compile(r'\[.*?\]')
+    URL_PATTERN = re.compile(r'https?://\S+|www\.\S+')
+    HTML_PATTERN = re.compile(r'<.*?>+')
+    DIGIT_WORD_PATTERN = re.compile(r'\w*\d\w*')
+    # Drops every punctuation character and newline in a single str.translate pass.
+    PUNCTUATION_TABLE = str.maketrans('', '', string.punctuation + '\n')
+
+    def __init__(self, language: str = CLEANING_LANGUAGE, stem_cache_size: int = STEM_CACHE_SIZE):
+        """
+        Reusable implementation of the tweet cleaning from the experiment notebook.
+        Build it once and call normalize() per text.
+        :param language: Language used for the stopword list and the Snowball stemmer.
+        :param stem_cache_size: Number of distinct tokens whose stem is memoized.
+        """
+        try:
+            self.stopwords = frozenset(self._load_stopwords(language))
+            self.stemmer = nltk.SnowballStemmer(language)
+            # Tweets reuse a small vocabulary, so most stems come from the cache.
+            self._stem = functools.lru_cache(maxsize=stem_cache_size)(self.stemmer.stem)
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    @staticmethod
+    def _load_stopwords(language: str) -> list:
+        try:
+            return stopwords.words(language)
+        except LookupError:
+            nltk.download('stopwords', quiet=True)
+            return stopwords.words(language)
+
+    def normalize(self, text) -> str:
+        """
+        Lowercases the text, strips bracketed text, URLs, HTML tags, punctuation
+        and words containing digits, removes stopwords and stems what is left.
+        """
+        text = str(text).lower()
+        text = self.BRACKETS_PATTERN.sub('', text)
+        text = self.URL_PATTERN.sub('', text)
+        text = self.HTML_PATTERN.sub('', text)
+        text = text.translate(self.PUNCTUATION_TABLE)
+        text = self.DIGIT_WORD_PATTERN.sub('', text)
+        stem = self._stem
+        stopword = self.stopwords
+        return " ".join([stem(word) for word in text.split() if word not in stopword])
+
+    def stem_cache_info(self):
+        return self._stem.cache_info()
+
+
+@functools.lru_cache(maxsize=None)
+def get_text_normalizer() -> TextNormalizer:
+    """
+    Returns the process-wide TextNormalizer, building it on first use.
+    """
+    return TextNormalizer()
@@ -9,38 +9,109 @@ ZIP_FILE_NAME = 'dataset.zip'
 ZIP_FILE_PATH = "data/dataset.zip"
 LABEL = 'label'
 TWEET = 'tweet'
+# Format of the data artifacts handed between stages: "parquet" or "csv"
+ARTIFACT_FORMAT = 'parquet'
+ARTIFACT_FILE_EXTENSIONS = {'parquet': '.parquet', 'csv': '.csv'}
+# Padded sequence matrices are cached here across runs (not per TIMESTAMP)
+SEQUENCE_CACHE_DIR = os.path.join("artifacts", "cache", "sequences")
+# Manifest of pipeline stage results, used to skip stages whose inputs and config did not change
+STAGE_CACHE_DIR = os.path.join("artifacts", "cache", "stages")
+STAGE_MANIFEST_NAME = "manifest.json"
+# Bump to invalidate every cached stage, e.g. after changing what a stage computes
+STAGE_MANIFEST_VERSION = 1
+
+
+# Logging constants
+LOG_DIR = "logs"
+# Overridden by the HATE_LOG_LEVEL environment variable
+LOG_LEVEL = "INFO"
+# "text" or "json" (one structured record per line)
+LOG_FORMAT = "text"
+# Per-row and per-request messages are only logged once every LOG_SAMPLE_EVERY calls
+LOG_SAMPLE_EVERY = 1000
 
 
 # Data ingestion constants
 DATA_INGESTION_ARTIFACTS_DIR = "DataIngestionArtifacts"
 DATA_INGESTION_IMBALANCE_DATA_DIR = "imbalanced_data.csv"
 DATA_INGESTION_RAW_DATA_DIR = "raw_data.csv"
+# "extract" unzips the dataset to disk; "stream" reads the CSV members straight out of the ZIP in chunks
+INGESTION_MODE = "extract"
 
 
 # Data transformation constants 
 DATA_TRANSFORMATION_ARTIFACTS_DIR = 'DataTransformationArtifacts'
-TRANSFORMED_FILE_NAME = "final.csv"
+TRANSFORMED_FILE_NAME = "final"
 DATA_DIR = "data"
 ID = 'id'
 AXIS = 1
 INPLACE = True
 DROP_COLUMNS = ['Unnamed: 0','count','hate_speech','offensive_language','neither']
 CLASS = 'class'
+CLEANING_LANGUAGE = 'english'
+STEM_CACHE_SIZE = 100000
+TRANSFORMATION_WORKERS = os.cpu_count() or 1
+TRANSFORMATION_CHUNK_SIZE = 5000
+# Rows read from a ZIP member per chunk in streaming mode; bounds peak memory
+STREAMING_CHUNK_SIZE = 50000
 
 
 # Model training constants
 MODEL_TRAINER_ARTIFACTS_DIR = 'ModelTrainerArtifacts'
 TRAINED_MODEL_DIR = 'trained_model'
 TRAINED_MODEL_NAME = 'model.h5'
-X_TEST_FILE_NAME = 'x_test.csv'
-Y_TEST_FILE_NAME = 'y_test.csv'
-
-X_TRAIN_FILE_NAME = 'x_train.csv'
+X_TEST_FILE_NAME = 'x_test'
+Y_TEST_FILE_NAME = 'y_test'
+
+X_TRAIN_FILE_NAME = 'x_train'
+NUMPY_WEIGHTS_DIR_NAME = 'numpy_weights'
+QUANTIZED_WEIGHTS_DIR_NAME = 'numpy_weights_int8'
+# Version 2 adds int8 weights with "<name>_scale" files; version 1 exports still load
+NUMPY_WEIGHTS_FORMAT_VERSION = 2
+# Largest allowed score difference between an exported backend and Keras
+PARITY_TOLERANCE = 1e-4
+# Post-training quantization exported next to the float weights: "none", "embeddings"
+# (int8 embedding table with per-row scales) or "all" (int8 LSTM and Dense kernels too)
+WEIGHT_QUANTIZATION = 'embeddings'
+# Same check for quantized exports; catches a broken export, not a small accuracy loss
+QUANTIZATION_PARITY_TOLERANCE = 0.05
 
 RANDOM_STATE = 42
+# Share of rows held out for evaluation, picked by text hash so a text keeps its side as the data grows
+TEST_SIZE = 0.3
 EPOCH = 20
 BATCH_SIZE = 128
 VALIDATION_SPLIT = 0.2
+# Train on batches of similar length, each padded only to its longest sequence
+BUCKET_BY_LENGTH = True
+# Stop once val_loss has not improved for this many epochs and keep the best weights
+EARLY_STOPPING_PATIENCE = 3
+CHECKPOINT_FILE_NAME = 'checkpoint.weights.h5'
+# "full" trains a new network and tokenizer; "warm_start" fine-tunes the serving
+# model with its existing vocabulary on rows it has not been trained on yet
+TRAINING_MODE = 'full'
+WARM_START_EPOCH = 5
+WARM_START_LEARNING_RATE = 1e-4
+# Share of already-seen training rows mixed back into a warm start, against forgetting
+WARM_START_REPLAY_FRACTION = 0.1
+# Hashes of the texts a model was trained on; written next to the trained model and
+# pushed with it, so a warm start only skips rows the serving model has really seen
+TRAINED_TEXTS_FILE_NAME = 'trained_texts.npy'
+# "numpy" feeds a pre-built padded matrix; "tf_data" tokenizes and pads in a tf.data pipeline
+TRAINING_INPUT = 'numpy'
+# Parallel tokenization calls in the tf.data pipeline; -1 autotunes
+TFDATA_NUM_PARALLEL_CALLS = -1
+# Private tf.data thread pool size; 0 shares TensorFlow's default pool
+TFDATA_THREADS = 0
+TFDATA_SHUFFLE_BUFFER = 10000
+# "none", "memory" (holds every tokenized row in RAM), or a directory for an on-disk
+# cache of tokenized rows, which keeps memory bounded whatever the data size
+TFDATA_CACHE = os.path.join("artifacts", "cache", "tfdata")
+# Rows the tf.data source hands to TensorFlow at a time
+TFDATA_SOURCE_CHUNK_SIZE = 1024
+# TensorFlow op thread pools for training; 0 uses every core
+TRAIN_INTRA_OP_THREADS = 0
+TRAIN_INTER_OP_THREADS = 0
 
 
 # Model Architecture constants
@@ -49,14 +120,89 @@ MAX_LEN = 300
 LOSS = 'binary_crossentropy'
 METRICS = ['accuracy']
 ACTIVATION = 'sigmoid'
+# Mask padding id 0 in the Embedding so padded length does not change scores
+MASK_PADDING = True
+# Padded widths are rounded up to a multiple of this to limit distinct batch shapes
+PADDING_MULTIPLE = 8
 
 
 # Model  Evaluation constants
 MODEL_EVALUATION_ARTIFACTS_DIR = 'ModelEvaluationArtifacts'
 BEST_MODEL_DIR = "best_Model"
 MODEL_EVALUATION_FILE_NAME = 'loss.csv'
+# Metric the candidate must beat the best model on (higher is better, so not "loss")
+EVALUATION_METRIC = 'accuracy'
+EVALUATION_THRESHOLD = 0.5
+EVALUATION_BATCH_SIZE = 1024
 
 
 MODEL_NAME = 'model.h5'
 APP_HOST = "0.0.0.0"
 APP_PORT = 8080
+# Origins allowed by CORS; credentials are only allowed with an explicit list, never with "*"
+CORS_ALLOW_ORIGINS = ["*"]
+# When this environment variable is set, /admin/reload requires its value in the
+# X-Admin-Token header; otherwise the route only accepts clients on this host
+ADMIN_TOKEN_ENV = "HATE_ADMIN_TOKEN"
+# Minimum seconds between two forced reloads, across every pre-forked worker
+FORCED_RELOAD_MIN_INTERVAL_SECONDS = 60
+# Worker processes forked by hate.pipeline.prefork_server after the model is loaded once
+SERVING_WORKERS = os.cpu_count() or 1
+# Backend of pre-forked workers: "numpy" is loaded once in the master and shared; keras
+# is not fork-safe, so each worker then loads its own copy of the model
+PREFORK_INFERENCE_BACKEND = "numpy"
+# Files the pre-forked workers share: per-worker metric snapshots merged by /metrics
+PREFORK_STATE_DIR = os.path.join("artifacts", "serving")
+# Seconds between the metric snapshots each pre-forked worker writes
+METRICS_SNAPSHOT_INTERVAL_SECONDS = 5
+# Training job states, one JSON file per job, shared by every API process
+TRAINING_JOBS_DIR = os.path.join("artifacts", "training_jobs")
+
+
+# Prediction constants
+PREDICT_MODEL_DIR = os.path.join("artifacts", "PredictModel")
+TOKENIZER_PATH = "tokenizer.pickle"
+VOCAB_PATH = "tokenizer.vocab"
+VOCAB_FORMAT_VERSION = 2
+# Inference backend used by the API: "keras" or "numpy" (no TensorFlow at serve time)
+INFERENCE_BACKEND = "keras"
+# Weights the numpy backend serves: "float32" or "int8" (the WEIGHT_QUANTIZATION export)
+INFERENCE_WEIGHTS = "float32"
+# Rows per NumPy forward pass; bounds the (rows, MAX_LEN, 4 * units) input projection
+NUMPY_BACKEND_MAX_ROWS = 64
+# Trim each inference batch to its longest sequence when the model masks padding
+PREDICTION_TRIM_PADDING = True
+# Score cache keyed on the normalized text: "memory", "sqlite" (shared by workers) or "none"
+PREDICTION_CACHE_BACKEND = "memory"
+PREDICTION_CACHE_SIZE = 100000
+PREDICTION_CACHE_TTL_SECONDS = 3600
+PREDICTION_CACHE_PATH = os.path.join("artifacts", "cache", "predictions.sqlite")
+PREDICTION_THRESHOLD = 0.5
+PREDICTION_MAX_BATCH_SIZE = 64
+PREDICTION_MAX_WAIT_MS = 5
+PREDICTION_CHUNK_SIZE = 512
+INFERENCE_MAX_WORKERS = 2
+INFERENCE_MAX_PENDING = 1024
+# Texts scored by a freshly loaded model before it is swapped in
+PREDICTION_WARMUP_TEXTS = ["good morning",
+                           "this is a somewhat longer warm up sentence so that more than one padded width is built " * 4]
+# Seconds between checks of the PredictModel files for a new model; 0 disables the watcher
+MODEL_WATCH_INTERVAL_SECONDS = 0
+# /predict/stream: lines scored per micro-batch, longest accepted line, the wait before
+# retrying a batch the saturated inference executor turned away, and how long to keep
+# retrying before that batch's lines get error records
+STREAM_BATCH_SIZE = 256
+STREAM_MAX_LINE_BYTES = 1024 * 1024
+STREAM_BUSY_RETRY_SECONDS = 0.05
+STREAM_BUSY_TIMEOUT_SECONDS = 30
+
+
+# Bulk scoring constants
+# Rows read, scored and written per output part; progress is checkpointed after each part
+BULK_SCORING_CHUNK_SIZE = 50000
+# Rows per forward pass; rows are sorted by length first so each pass pads little
+BULK_SCORING_BATCH_SIZE = 1024
+# Processes that clean and tokenize the next chunk while the current one is scored
+BULK_SCORING_WORKERS = os.cpu_count() or 1
+BULK_SCORING_FILE_EXTENSIONS = {'parquet': '.parquet', 'csv': '.csv', 'jsonl': '.jsonl'}
+BULK_SCORING_PROGRESS_NAME = '_progress.json'
@@ -5,6 +5,10 @@ from dataclasses import dataclass
 class DataIngestionArtifacts:
     imbalance_data_file_path: str
     raw_data_file_path: str
+    # The raw files are extracted from the dataset ZIP as-is
+    artifact_format: str = "csv"
+    # Set in streaming mode: the file paths above are then member names inside this ZIP
+    zip_file_path: str = None
 
 
 
@@ -12,6 +16,7 @@ class DataIngestionArtifacts:
 @dataclass
 class DataTransformationArtifacts:
     transformed_data_path: str
+    artifact_format: str = "parquet"
 
 
 
@@ -19,11 +24,27 @@ class DataTransformationArtifacts:
 @dataclass
 class ModelTrainerArtifacts: 
     trained_model_path:str
-    x_test_path: list
-    y_test_path: list
+    x_test_path: str
+    y_test_path: str
+    artifact_format: str = "parquet"
+    x_train_path: str = None
+    # Hashes of the texts the model was trained on; ModelPusher publishes them with the model
+    trained_texts_path: str = None
 
 
 
 @dataclass
 class ModelEvaluationArtifacts:
-    is_model_accepted: bool 
+    is_model_accepted: bool
+    # Output of hate.ml.evaluation.binary_classification_metrics for each model
+    trained_model_metrics: dict = None
+    best_model_metrics: dict = None
+    # Metrics of the int8 NumPy export and their delta against trained_model_metrics
+    quantized_model_metrics: dict = None
+
+
+
+@dataclass
+class ModelPusherArtifacts:
+    predict_model_dir: str
+    pushed_files: list 
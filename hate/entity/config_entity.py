@@ -11,12 +11,20 @@ class DataIngestionConfig:
         self.NEW_DATA_ARTIFACTS_DIR: str = os.path.join(self.DATA_INGESTION_ARTIFACTS_DIR,DATA_INGESTION_RAW_DATA_DIR)
         self.ZIP_FILE_DIR = os.path.join(self.DATA_INGESTION_ARTIFACTS_DIR)
         self.ZIP_FILE_PATH = os.path.join(self.DATA_INGESTION_ARTIFACTS_DIR,self.ZIP_FILE_NAME)
+        self.INGESTION_MODE = INGESTION_MODE
+        self.IMBALANCE_DATA_MEMBER = DATA_INGESTION_IMBALANCE_DATA_DIR
+        self.RAW_DATA_MEMBER = DATA_INGESTION_RAW_DATA_DIR
 
 @dataclass
 class DataTransformationConfig:
+    # How the work is spread and chunked; the transformed data is the same whatever their values
+    RUNTIME_SETTINGS = ("WORKERS", "CHUNK_SIZE", "STREAMING_CHUNK_SIZE")
+
     def __init__(self):
         self.DATA_TRANSFORMATION_ARTIFACTS_DIR: str = os.path.join(os.getcwd(),ARTIFACTS_DIR,DATA_TRANSFORMATION_ARTIFACTS_DIR)
-        self.TRANSFORMED_FILE_PATH = os.path.join(self.DATA_TRANSFORMATION_ARTIFACTS_DIR,TRANSFORMED_FILE_NAME)
+        self.ARTIFACT_FORMAT = ARTIFACT_FORMAT
+        self.TRANSFORMED_FILE_PATH = os.path.join(self.DATA_TRANSFORMATION_ARTIFACTS_DIR,
+                                                  TRANSFORMED_FILE_NAME + ARTIFACT_FILE_EXTENSIONS[self.ARTIFACT_FORMAT])
         self.ID = ID
         self.AXIS = AXIS
         self.INPLACE = INPLACE 
@@ -24,15 +32,26 @@ class DataTransformationConfig:
         self.CLASS = CLASS 
         self.LABEL = LABEL
         self.TWEET = TWEET
+        self.WORKERS = TRANSFORMATION_WORKERS
+        self.CHUNK_SIZE = TRANSFORMATION_CHUNK_SIZE
+        self.STREAMING_CHUNK_SIZE = STREAMING_CHUNK_SIZE
 
 @dataclass
 class ModelTrainerConfig: 
+    # Thread pools and the tf.data cache location change how fast the model trains, not what it learns
+    RUNTIME_SETTINGS = ("TFDATA_NUM_PARALLEL_CALLS", "TFDATA_THREADS", "TFDATA_CACHE",
+                        "TRAIN_INTRA_OP_THREADS", "TRAIN_INTER_OP_THREADS")
+
     def __init__(self):
         self.TRAINED_MODEL_DIR: str = os.path.join(os.getcwd(),ARTIFACTS_DIR,MODEL_TRAINER_ARTIFACTS_DIR) 
         self.TRAINED_MODEL_PATH = os.path.join(self.TRAINED_MODEL_DIR,TRAINED_MODEL_NAME)
-        self.X_TEST_DATA_PATH = os.path.join(self.TRAINED_MODEL_DIR, X_TEST_FILE_NAME)
-        self.Y_TEST_DATA_PATH = os.path.join(self.TRAINED_MODEL_DIR, Y_TEST_FILE_NAME)
-        self.X_TRAIN_DATA_PATH = os.path.join(self.TRAINED_MODEL_DIR, X_TRAIN_FILE_NAME)
+        self.NUMPY_WEIGHTS_DIR = os.path.join(self.TRAINED_MODEL_DIR, NUMPY_WEIGHTS_DIR_NAME)
+        self.QUANTIZED_WEIGHTS_DIR = os.path.join(self.TRAINED_MODEL_DIR, QUANTIZED_WEIGHTS_DIR_NAME)
+        self.WEIGHT_QUANTIZATION = WEIGHT_QUANTIZATION
+        self.ARTIFACT_FORMAT = ARTIFACT_FORMAT
+        self.X_TEST_DATA_PATH = os.path.join(self.TRAINED_MODEL_DIR, X_TEST_FILE_NAME + ARTIFACT_FILE_EXTENSIONS[self.ARTIFACT_FORMAT])
+        self.Y_TEST_DATA_PATH = os.path.join(self.TRAINED_MODEL_DIR, Y_TEST_FILE_NAME + ARTIFACT_FILE_EXTENSIONS[self.ARTIFACT_FORMAT])
+        self.X_TRAIN_DATA_PATH = os.path.join(self.TRAINED_MODEL_DIR, X_TRAIN_FILE_NAME + ARTIFACT_FILE_EXTENSIONS[self.ARTIFACT_FORMAT])
         self.MAX_WORDS = MAX_WORDS
         self.MAX_LEN = MAX_LEN
         self.LOSS = LOSS
@@ -41,9 +60,32 @@ class ModelTrainerConfig:
         self.LABEL = LABEL
         self.TWEET = TWEET
         self.RANDOM_STATE = RANDOM_STATE
+        self.TEST_SIZE = TEST_SIZE
         self.EPOCH = EPOCH
         self.BATCH_SIZE = BATCH_SIZE
         self.VALIDATION_SPLIT = VALIDATION_SPLIT
+        self.BUCKET_BY_LENGTH = BUCKET_BY_LENGTH
+        self.SEQUENCE_CACHE_DIR = os.path.join(os.getcwd(), SEQUENCE_CACHE_DIR)
+        self.TOKENIZER_PATH = TOKENIZER_PATH
+        self.VOCAB_PATH = VOCAB_PATH
+        self.EARLY_STOPPING_PATIENCE = EARLY_STOPPING_PATIENCE
+        self.CHECKPOINT_PATH = os.path.join(self.TRAINED_MODEL_DIR, CHECKPOINT_FILE_NAME)
+        self.TRAINING_MODE = TRAINING_MODE
+        self.WARM_START_MODEL_PATH = os.path.join(PREDICT_MODEL_DIR, MODEL_NAME)
+        # The tokenizer and text hashes ModelPusher pushed with that model, not this run's outputs
+        self.WARM_START_TOKENIZER_PATH = os.path.join(PREDICT_MODEL_DIR, os.path.basename(TOKENIZER_PATH))
+        self.WARM_START_TRAINED_TEXTS_PATH = os.path.join(PREDICT_MODEL_DIR, TRAINED_TEXTS_FILE_NAME)
+        self.WARM_START_EPOCH = WARM_START_EPOCH
+        self.WARM_START_LEARNING_RATE = WARM_START_LEARNING_RATE
+        self.WARM_START_REPLAY_FRACTION = WARM_START_REPLAY_FRACTION
+        self.TRAINED_TEXTS_PATH = os.path.join(self.TRAINED_MODEL_DIR, TRAINED_TEXTS_FILE_NAME)
+        self.TRAINING_INPUT = TRAINING_INPUT
+        self.TFDATA_NUM_PARALLEL_CALLS = TFDATA_NUM_PARALLEL_CALLS
+        self.TFDATA_THREADS = TFDATA_THREADS
+        self.TFDATA_SHUFFLE_BUFFER = TFDATA_SHUFFLE_BUFFER
+        self.TFDATA_CACHE = TFDATA_CACHE
+        self.TRAIN_INTRA_OP_THREADS = TRAIN_INTRA_OP_THREADS
+        self.TRAIN_INTER_OP_THREADS = TRAIN_INTER_OP_THREADS
 
 @dataclass
 class ModelEvaluationConfig: 
@@ -51,8 +93,63 @@ class ModelEvaluationConfig:
         self.MODEL_EVALUATION_MODEL_DIR: str = os.path.join(os.getcwd(),ARTIFACTS_DIR, MODEL_EVALUATION_ARTIFACTS_DIR)
         self.BEST_MODEL_DIR_PATH: str = os.path.join(self.MODEL_EVALUATION_MODEL_DIR,BEST_MODEL_DIR)
         self.MODEL_NAME = MODEL_NAME 
+        self.TOKENIZER_PATH = TOKENIZER_PATH
+        self.SEQUENCE_CACHE_DIR = os.path.join(os.getcwd(), SEQUENCE_CACHE_DIR)
+        self.METRIC = EVALUATION_METRIC
+        self.THRESHOLD = EVALUATION_THRESHOLD
+        self.BATCH_SIZE = EVALUATION_BATCH_SIZE
+        self.QUANTIZED_WEIGHTS_DIR_NAME = QUANTIZED_WEIGHTS_DIR_NAME
 
+@dataclass
+class ModelPusherConfig:
+    def __init__(self):
+        self.PREDICT_MODEL_DIR: str = PREDICT_MODEL_DIR
+        self.MODEL_NAME = MODEL_NAME
+        self.NUMPY_WEIGHTS_DIR_NAME = NUMPY_WEIGHTS_DIR_NAME
+        self.QUANTIZED_WEIGHTS_DIR_NAME = QUANTIZED_WEIGHTS_DIR_NAME
+        self.TOKENIZER_PATH = TOKENIZER_PATH
+        self.VOCAB_PATH = VOCAB_PATH
 
+@dataclass
+class PredictionConfig:
+    def __init__(self):
+        self.MODEL_PATH: str = os.path.join(PREDICT_MODEL_DIR, MODEL_NAME)
+        self.TOKENIZER_PATH: str = TOKENIZER_PATH
+        self.VOCAB_PATH: str = VOCAB_PATH
+        self.BACKEND = INFERENCE_BACKEND
+        self.INFERENCE_WEIGHTS = INFERENCE_WEIGHTS
+        self.NUMPY_WEIGHTS_DIR: str = os.path.join(PREDICT_MODEL_DIR, QUANTIZED_WEIGHTS_DIR_NAME
+                                                   if INFERENCE_WEIGHTS == "int8" else NUMPY_WEIGHTS_DIR_NAME)
+        self.MAX_LEN = MAX_LEN
+        self.TRIM_PADDING = PREDICTION_TRIM_PADDING
+        self.PADDING_MULTIPLE = PADDING_MULTIPLE
+        self.THRESHOLD = PREDICTION_THRESHOLD
+        self.CACHE_BACKEND = PREDICTION_CACHE_BACKEND
+        self.CACHE_SIZE = PREDICTION_CACHE_SIZE
+        self.CACHE_TTL_SECONDS = PREDICTION_CACHE_TTL_SECONDS
+        self.CACHE_PATH = PREDICTION_CACHE_PATH
+        self.MAX_BATCH_SIZE = PREDICTION_MAX_BATCH_SIZE
+        self.MAX_WAIT_MS = PREDICTION_MAX_WAIT_MS
+        self.CHUNK_SIZE = PREDICTION_CHUNK_SIZE
+        self.INFERENCE_MAX_WORKERS = INFERENCE_MAX_WORKERS
+        self.INFERENCE_MAX_PENDING = INFERENCE_MAX_PENDING
+        # Written by ModelPusher next to the model; preferred over TOKENIZER_PATH/VOCAB_PATH when present
+        self.PUSHED_TOKENIZER_PATH: str = os.path.join(PREDICT_MODEL_DIR, os.path.basename(TOKENIZER_PATH))
+        self.PUSHED_VOCAB_PATH: str = os.path.join(PREDICT_MODEL_DIR, os.path.basename(VOCAB_PATH))
+        self.WARMUP_TEXTS = PREDICTION_WARMUP_TEXTS
+        self.WATCH_INTERVAL_SECONDS = MODEL_WATCH_INTERVAL_SECONDS
+        self.STREAM_BATCH_SIZE = STREAM_BATCH_SIZE
+        self.STREAM_MAX_LINE_BYTES = STREAM_MAX_LINE_BYTES
+        self.STREAM_BUSY_RETRY_SECONDS = STREAM_BUSY_RETRY_SECONDS
+        self.STREAM_BUSY_TIMEOUT_SECONDS = STREAM_BUSY_TIMEOUT_SECONDS
 
-
-
+@dataclass
+class BulkScoringConfig:
+    def __init__(self):
+        self.TEXT_COLUMN = TWEET
+        self.CHUNK_SIZE = BULK_SCORING_CHUNK_SIZE
+        self.BATCH_SIZE = BULK_SCORING_BATCH_SIZE
+        self.WORKERS = BULK_SCORING_WORKERS
+        self.FILE_EXTENSIONS = BULK_SCORING_FILE_EXTENSIONS
+        self.PROGRESS_NAME = BULK_SCORING_PROGRESS_NAME
+        self.OUTPUT_FORMAT = ARTIFACT_FORMAT
@@ -1,18 +1,109 @@
 import logging
 import os
+import json
+import queue
+import atexit
+import itertools
+import logging.handlers
 
 from from_root import from_root
 from datetime import datetime
+from hate.constants import LOG_DIR, LOG_LEVEL, LOG_FORMAT, LOG_SAMPLE_EVERY
 
-LOG_FILE = f"{datetime.now().strftime('%m_%d_%Y_%H_%M_%S')}.log"
-logs_path = os.path.join(os.getcwd(), "logs", LOG_FILE)
+def _log_file_name() -> str:
+    # One timestamped file per process, so spawned and forked workers never interleave writes
+    return f"{datetime.now().strftime('%m_%d_%Y_%H_%M_%S')}_{os.getpid()}.log"
+
+
+LOG_FILE = _log_file_name()
+logs_path = os.path.join(os.getcwd(), LOG_DIR)
 
 os.makedirs(logs_path, exist_ok=True)
 
 LOG_FILE_PATH = os.path.join(logs_path, LOG_FILE)
 
-logging.basicConfig(
-    filename=LOG_FILE_PATH,
-    format="[ %(asctime)s ] %(name)s - %(levelname)s - %(message)s",
-    level=logging.DEBUG,
-)
\ No newline at end of file
+TEXT_FORMAT = "[ %(asctime)s ] %(name)s - %(levelname)s - %(message)s"
+
+# Attributes every LogRecord has; anything else was passed through extra=
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class StructuredFormatter(logging.Formatter):
+    """
+    Formats a record as one JSON object per line, including any fields
+    passed with extra={...}.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "time": self.formatTime(record),
+            "logger": record.name,
+            "level": record.levelname,
+            "process": record.process,
+            "message": record.getMessage(),
+        }
+        payload.update({key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES})
+        if record.exc_info:
+            payload["exception"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+class LogSampler:
+    def __init__(self, every: int = LOG_SAMPLE_EVERY, logger: logging.Logger = None):
+        """
+        Emits only every `every`-th message, for per-row or per-request logs
+        that would otherwise dominate the log volume. Nothing is formatted
+        for skipped calls.
+        :param every: Sampling interval; 1 logs every call.
+        """
+        self.every = max(1, every)
+        self.logger = logger or logging.getLogger()
+        self._calls = itertools.count(1)
+
+    def log(self, level: int, msg: str, *args, **kwargs) -> None:
+        calls = next(self._calls)
+        if (calls - 1) % self.every or not self.logger.isEnabledFor(level):
+            return
+        extra = dict(kwargs.pop("extra", None) or {}, sampled_every=self.every, sampled_calls=calls)
+        self.logger.log(level, msg, *args, extra=extra, **kwargs)
+
+    def debug(self, msg: str, *args, **kwargs) -> None:
+        self.log(logging.DEBUG, msg, *args, **kwargs)
+
+    def info(self, msg: str, *args, **kwargs) -> None:
+        self.log(logging.INFO, msg, *args, **kwargs)
+
+
+def _configure_logging(log_file_path: str):
+    # Callers only enqueue the record; the file write happens on the listener thread.
+    file_handler = logging.FileHandler(log_file_path, delay=True)
+    file_handler.setFormatter(StructuredFormatter() if LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT))
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+
+    root = logging.getLogger()
+    root.setLevel(os.environ.get("HATE_LOG_LEVEL", LOG_LEVEL).upper())
+    root.addHandler(queue_handler)
+    listener.start()
+    return listener, queue_handler
+
+
+def flush_logs() -> None:
+    # Flush whatever is still queued when the process exits; only the current listener is running.
+    if LOG_LISTENER._thread is not None:
+        LOG_LISTENER.stop()
+
+
+def _reconfigure_after_fork() -> None:
+    # The listener thread does not survive fork; give the child its own file and listener.
+    global LOG_FILE, LOG_FILE_PATH, LOG_LISTENER, _QUEUE_HANDLER
+    logging.getLogger().removeHandler(_QUEUE_HANDLER)
+    LOG_FILE = _log_file_name()
+    LOG_FILE_PATH = os.path.join(logs_path, LOG_FILE)
+    LOG_LISTENER, _QUEUE_HANDLER = _configure_logging(LOG_FILE_PATH)
+
+
+LOG_LISTENER, _QUEUE_HANDLER = _configure_logging(LOG_FILE_PATH)
+atexit.register(flush_logs)
+os.register_at_fork(after_in_child=_reconfigure_after_fork)
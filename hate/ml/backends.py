@@ -0,0 +1,141 @@
+import os
+import sys
+import json
+import numpy as np
+from hate.logger import logging
+from hate.exception import CustomException
+from hate.constants import NUMPY_WEIGHTS_FORMAT_VERSION, NUMPY_BACKEND_MAX_ROWS
+from hate.ml.quantization import dequantize_columns
+
+# Manifest file written next to the exported .npy weight files
+NUMPY_MANIFEST_NAME = "manifest.json"
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    return 0.5 * (np.tanh(0.5 * x) + 1.0)
+
+
+def _hard_sigmoid(x: np.ndarray) -> np.ndarray:
+    return np.clip(0.2 * x + 0.5, 0.0, 1.0)
+
+
+ACTIVATIONS = {
+    "sigmoid": _sigmoid,
+    "hard_sigmoid": _hard_sigmoid,
+    "tanh": np.tanh,
+    "linear": lambda x: x,
+}
+
+
+class KerasBackend:
+    name = "keras"
+
+    def __init__(self, model_path: str):
+        """
+        Runs the saved Keras model with TensorFlow.
+        """
+        import keras
+        self.model_path = model_path
+        self.model = keras.models.load_model(model_path)
+        # Older models were trained without masking and need the full MAX_LEN padding.
+        self.supports_masking = any(getattr(layer, "mask_zero", False) for layer in self.model.layers)
+
+    def predict(self, padded: np.ndarray, batch_size: int) -> np.ndarray:
+        pred = self.model.predict(padded, batch_size=batch_size, verbose=0)
+        return np.asarray(pred, dtype=np.float32).reshape(len(padded), -1)[:, 0]
+
+
+class NumpyBackend:
+    name = "numpy"
+
+    def __init__(self, weights_dir: str):
+        """
+        Pure-NumPy forward pass of the Embedding -> LSTM -> Dense network built
+        by ModelArchitecture, using weights exported by hate.ml.export.
+        Weight files are memory-mapped, so TensorFlow is never imported.
+        A quantized int8 embedding table stays int8 in memory and only the
+        looked-up rows are scaled back; int8 kernels are small and are
+        dequantized once here.
+        """
+        try:
+            self.weights_dir = weights_dir
+            with open(os.path.join(weights_dir, NUMPY_MANIFEST_NAME)) as handle:
+                self.manifest = json.load(handle)
+            if not 1 <= self.manifest["version"] <= NUMPY_WEIGHTS_FORMAT_VERSION:
+                raise ValueError(f"Unsupported weights version {self.manifest['version']} in {weights_dir}")
+            weights = {name: np.load(os.path.join(weights_dir, file_name), mmap_mode="r")
+                       for name, file_name in self.manifest["weights"].items()}
+            self.quantization = self.manifest.get("quantization", "none")
+            self.embeddings = weights["embeddings"]
+            self.embedding_scales = weights.get("embeddings_scale")
+            self.lstm_kernel = self._float_weight(weights, "lstm_kernel")
+            self.lstm_recurrent_kernel = self._float_weight(weights, "lstm_recurrent_kernel")
+            self.lstm_bias = np.asarray(weights["lstm_bias"], dtype=np.float32)
+            self.dense_kernel = self._float_weight(weights, "dense_kernel")
+            self.dense_bias = np.asarray(weights["dense_bias"], dtype=np.float32)
+            self.units = self.manifest["lstm_units"]
+            self.supports_masking = self.manifest.get("mask_zero", False)
+            self.activation = ACTIVATIONS[self.manifest["lstm_activation"]]
+            self.recurrent_activation = ACTIVATIONS[self.manifest["lstm_recurrent_activation"]]
+            self.dense_activation = ACTIVATIONS[self.manifest["dense_activation"]]
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    @staticmethod
+    def _float_weight(weights: dict, name: str) -> np.ndarray:
+        if f"{name}_scale" in weights:
+            return dequantize_columns(weights[name], weights[f"{name}_scale"])
+        return np.asarray(weights[name], dtype=np.float32)
+
+    def embed(self, padded: np.ndarray) -> np.ndarray:
+        rows = np.asarray(self.embeddings[padded], dtype=np.float32)
+        if self.embedding_scales is not None:
+            rows *= self.embedding_scales[padded][..., None]
+        return rows
+
+    def _forward(self, padded: np.ndarray) -> np.ndarray:
+        batch, steps = padded.shape
+        units = self.units
+        # Input projection for every timestep at once: (batch, steps, 4 * units)
+        projected = self.embed(padded) @ self.lstm_kernel + self.lstm_bias
+        h = np.zeros((batch, units), dtype=np.float32)
+        c = np.zeros((batch, units), dtype=np.float32)
+        # With pre-padding, masked rows only differ in where their real tokens start.
+        starts = steps - np.count_nonzero(padded, axis=1) if self.supports_masking else np.zeros(batch, dtype=int)
+        for step in range(int(starts.min()) if batch else steps, steps):
+            z = projected[:, step] + h @ self.lstm_recurrent_kernel
+            # Keras gate order: input, forget, cell, output
+            i = self.recurrent_activation(z[:, :units])
+            f = self.recurrent_activation(z[:, units:2 * units])
+            g = self.activation(z[:, 2 * units:3 * units])
+            o = self.recurrent_activation(z[:, 3 * units:])
+            new_c = f * c + i * g
+            new_h = o * self.activation(new_c)
+            if self.supports_masking and step < starts.max():
+                # Masked timesteps carry the previous state over, as in Keras.
+                active = (step >= starts)[:, None]
+                new_c = np.where(active, new_c, c)
+                new_h = np.where(active, new_h, h)
+            c, h = new_c, new_h
+        return self.dense_activation(h @ self.dense_kernel + self.dense_bias)[:, 0]
+
+    def predict(self, padded: np.ndarray, batch_size: int) -> np.ndarray:
+        padded = np.asarray(padded)
+        if len(padded) == 0:
+            return np.empty(0, dtype=np.float32)
+        batch_size = min(batch_size, NUMPY_BACKEND_MAX_ROWS)
+        return np.concatenate([self._forward(padded[start:start + batch_size])
+                               for start in range(0, len(padded), batch_size)]).astype(np.float32)
+
+
+def load_backend(backend_name: str, model_path: str, weights_dir: str):
+    """
+    Builds the inference backend selected by config.
+    :param backend_name: "keras" or "numpy".
+    """
+    logging.info("Loading the %s inference backend", backend_name)
+    if backend_name == KerasBackend.name:
+        return KerasBackend(model_path)
+    if backend_name == NumpyBackend.name:
+        return NumpyBackend(weights_dir)
+    raise ValueError(f"Unknown inference backend {backend_name!r}")
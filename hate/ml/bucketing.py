@@ -0,0 +1,46 @@
+import numpy as np
+from keras.utils import Sequence
+from hate.constants import RANDOM_STATE, PADDING_MULTIPLE
+from hate.ml.padding import sequence_lengths, trim_padding
+
+
+class LengthBucketedSequence(Sequence):
+    def __init__(self, padded: np.ndarray, labels, batch_size: int, shuffle: bool = True,
+                 seed: int = RANDOM_STATE, multiple: int = PADDING_MULTIPLE):
+        """
+        Feeds model.fit batches of similar-length sequences, each trimmed to
+        its own longest sequence instead of MAX_LEN. Requires a model that
+        masks padding (Embedding(mask_zero=True)).
+        :param padded: Pre-padded (rows, MAX_LEN) id matrix.
+        :param labels: One label per row.
+        :param shuffle: Reshuffle rows of equal length and the batch order every epoch.
+        """
+        self.padded = padded
+        self.labels = np.asarray(labels)
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.multiple = multiple
+        self.lengths = sequence_lengths(padded)
+        self.rng = np.random.default_rng(seed)
+        self._build_batches()
+
+    def _build_batches(self) -> None:
+        if self.shuffle:
+            # Sort by length, breaking ties randomly so buckets differ between epochs.
+            order = np.lexsort((self.rng.random(len(self.lengths)), self.lengths))
+        else:
+            order = np.argsort(self.lengths, kind="stable")
+        self.batches = [order[start:start + self.batch_size] for start in range(0, len(order), self.batch_size)]
+        if self.shuffle:
+            self.rng.shuffle(self.batches)
+
+    def __len__(self) -> int:
+        return len(self.batches)
+
+    def __getitem__(self, index: int):
+        rows = np.sort(self.batches[index])
+        return trim_padding(np.asarray(self.padded[rows]), self.multiple), self.labels[rows]
+
+    def on_epoch_end(self) -> None:
+        if self.shuffle:
+            self._build_batches()
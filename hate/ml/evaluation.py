@@ -0,0 +1,52 @@
+import numpy as np
+
+# Keras clips probabilities by this epsilon before taking the log in binary_crossentropy
+EPSILON = 1e-7
+
+
+def roc_auc(y_true: np.ndarray, scores: np.ndarray) -> float:
+    """
+    Area under the ROC curve from the rank-sum (Mann-Whitney U) statistic,
+    with tied scores sharing their average rank. NaN when only one class is present.
+    """
+    positives = int(y_true.sum())
+    negatives = len(y_true) - positives
+    if positives == 0 or negatives == 0:
+        return float("nan")
+    _, inverse, counts = np.unique(scores, return_inverse=True, return_counts=True)
+    average_ranks = np.cumsum(counts) - (counts - 1) / 2.0
+    rank_sum = average_ranks[inverse][y_true == 1].sum()
+    return float((rank_sum - positives * (positives + 1) / 2.0) / (positives * negatives))
+
+
+def binary_classification_metrics(y_true, scores, threshold: float = 0.5) -> dict:
+    """
+    Computes every evaluation metric from one vector of predicted scores.
+    :param y_true: 0/1 labels.
+    :param scores: Predicted probability of label 1, one per row.
+    :param threshold: Scores at or above it are predicted as 1.
+    :return: loss (binary cross-entropy), accuracy, precision, recall, f1, auc and
+             confusion_matrix as [[tn, fp], [fn, tp]], all JSON-serializable.
+    """
+    y_true = np.asarray(y_true).astype(np.int64).reshape(-1)
+    scores = np.asarray(scores, dtype=np.float64).reshape(-1)
+    if len(y_true) != len(scores):
+        raise ValueError(f"Got {len(y_true)} labels for {len(scores)} scores")
+
+    clipped = np.clip(scores, EPSILON, 1.0 - EPSILON)
+    loss = -np.mean(y_true * np.log(clipped) + (1 - y_true) * np.log(1.0 - clipped)) if len(y_true) else float("nan")
+
+    predicted = (scores >= threshold).astype(np.int64)
+    tn, fp, fn, tp = np.bincount(2 * y_true + predicted, minlength=4)[:4].tolist()
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    return {
+        "loss": float(loss),
+        "accuracy": (tp + tn) / len(y_true) if len(y_true) else float("nan"),
+        "precision": precision,
+        "recall": recall,
+        "f1": 2 * precision * recall / (precision + recall) if precision + recall else 0.0,
+        "auc": roc_auc(y_true, scores),
+        "confusion_matrix": [[tn, fp], [fn, tp]],
+        "rows": len(y_true),
+    }
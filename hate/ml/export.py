@@ -0,0 +1,162 @@
+import os
+import sys
+import json
+import argparse
+import numpy as np
+from hate.logger import logging
+from hate.exception import CustomException
+from hate.constants import MAX_LEN, NUMPY_WEIGHTS_FORMAT_VERSION, PARITY_TOLERANCE, QUANTIZATION_PARITY_TOLERANCE
+from hate.ml.backends import NumpyBackend, NUMPY_MANIFEST_NAME
+from hate.ml.padding import trim_padding
+from hate.ml.quantization import QUANTIZATION_MODES, quantize_rows, quantize_columns
+
+
+def _layer(model, class_name: str):
+    layers = [layer for layer in model.layers if layer.__class__.__name__ == class_name]
+    if len(layers) != 1:
+        raise ValueError(f"Expected exactly one {class_name} layer, found {len(layers)}")
+    return layers[0]
+
+
+def _activation_name(activation) -> str:
+    return activation if isinstance(activation, str) else activation.__name__
+
+
+def _quantize(weights: dict, quantization: str) -> dict:
+    """
+    Replaces the selected float32 weights with int8 values plus a "<name>_scale"
+    entry: per-row scales for the embedding table, per-output-unit scales for kernels.
+    Biases stay float32.
+    """
+    if quantization not in QUANTIZATION_MODES:
+        raise ValueError(f"Unknown quantization {quantization!r}, expected one of {QUANTIZATION_MODES}")
+    if quantization == "none":
+        return weights
+    weights = dict(weights)
+    weights["embeddings"], weights["embeddings_scale"] = quantize_rows(weights["embeddings"])
+    if quantization == "all":
+        for name in ("lstm_kernel", "lstm_recurrent_kernel", "dense_kernel"):
+            weights[name], weights[f"{name}_scale"] = quantize_columns(weights[name])
+    return weights
+
+
+def export_numpy_weights(model, weights_dir: str, quantization: str = "none") -> str:
+    """
+    Writes the weights of an Embedding -> LSTM -> Dense Keras model as .npy
+    files plus a manifest, in the layout NumpyBackend loads.
+    :param quantization: "none", "embeddings" (int8 embedding table) or "all" (int8 kernels too).
+    :return: The weights directory.
+    """
+    try:
+        embedding = _layer(model, "Embedding")
+        lstm = _layer(model, "LSTM")
+        dense = _layer(model, "Dense")
+        lstm_kernel, lstm_recurrent_kernel, lstm_bias = lstm.get_weights()
+        dense_kernel, dense_bias = dense.get_weights()
+        weights = {
+            "embeddings": embedding.get_weights()[0],
+            "lstm_kernel": lstm_kernel,
+            "lstm_recurrent_kernel": lstm_recurrent_kernel,
+            "lstm_bias": lstm_bias,
+            "dense_kernel": dense_kernel,
+            "dense_bias": dense_bias,
+        }
+        weights = _quantize(weights, quantization)
+
+        os.makedirs(weights_dir, exist_ok=True)
+        files = {}
+        for name, value in weights.items():
+            files[name] = f"{name}.npy"
+            dtype = np.int8 if value.dtype == np.int8 else np.float32
+            np.save(os.path.join(weights_dir, files[name]), np.ascontiguousarray(value, dtype=dtype))
+
+        manifest = {
+            "version": NUMPY_WEIGHTS_FORMAT_VERSION,
+            "weights": files,
+            "quantization": quantization,
+            "lstm_units": int(lstm.units),
+            "mask_zero": bool(embedding.mask_zero),
+            "lstm_activation": _activation_name(lstm.activation),
+            "lstm_recurrent_activation": _activation_name(lstm.recurrent_activation),
+            "dense_activation": _activation_name(dense.activation),
+        }
+        with open(os.path.join(weights_dir, NUMPY_MANIFEST_NAME), "w") as handle:
+            json.dump(manifest, handle, indent=2)
+        logging.info("Exported NumPy weights to %s (quantization: %s)", weights_dir, quantization)
+        return weights_dir
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+
+def check_parity(model, backend, padded: np.ndarray, tolerance: float = PARITY_TOLERANCE) -> float:
+    """
+    Scores padded with both the Keras model and the exported backend and
+    raises if any score differs by more than tolerance.
+    :return: The largest absolute score difference.
+    """
+    try:
+        expected = np.asarray(model.predict(padded, verbose=0), dtype=np.float32).reshape(-1)
+        actual = backend.predict(padded, batch_size=len(padded))
+        max_diff = float(np.max(np.abs(expected - actual))) if len(padded) else 0.0
+        logging.info("Backend parity: max abs score difference %.2e on %d rows", max_diff, len(padded))
+        if max_diff > tolerance:
+            raise ValueError(f"Exported backend differs from Keras by {max_diff:.2e} (tolerance {tolerance:.0e})")
+        return max_diff
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+
+def sample_padded_sequences(vocab_size: int, rows: int = 64, maxlen: int = MAX_LEN, seed: int = 42) -> np.ndarray:
+    """
+    Random pre-padded id sequences of varying length, for parity checks.
+    """
+    rng = np.random.default_rng(seed)
+    padded = np.zeros((rows, maxlen), dtype=np.int32)
+    for row in range(rows):
+        length = int(rng.integers(0, min(maxlen, 60) + 1))
+        if length:
+            padded[row, maxlen - length:] = rng.integers(1, vocab_size, size=length)
+    return padded
+
+
+def export_and_check(model, weights_dir: str, tolerance: float = None, quantization: str = "none") -> float:
+    """
+    Exports the NumPy weights of model and checks them against Keras. For
+    masked models it also checks that trimming the padding keeps the scores.
+    :param tolerance: Defaults to PARITY_TOLERANCE, or QUANTIZATION_PARITY_TOLERANCE
+                      for quantized exports.
+    """
+    if tolerance is None:
+        tolerance = PARITY_TOLERANCE if quantization == "none" else QUANTIZATION_PARITY_TOLERANCE
+    export_numpy_weights(model, weights_dir, quantization)
+    backend = NumpyBackend(weights_dir)
+    padded = sample_padded_sequences(backend.embeddings.shape[0])
+    max_diff = check_parity(model, backend, padded, tolerance)
+    if backend.supports_masking:
+        trimmed = trim_padding(padded)
+        trim_diff = float(np.max(np.abs(backend.predict(padded, len(padded)) - backend.predict(trimmed, len(trimmed)))))
+        logging.info("Trimmed padding (%d -> %d) changes scores by %.2e", padded.shape[1], trimmed.shape[1],
+                     trim_diff)
+        if trim_diff > tolerance:
+            raise ValueError(f"Trimming padding changes scores by {trim_diff:.2e} (tolerance {tolerance:.0e})")
+        max_diff = max(max_diff, check_parity(model, backend, trimmed, tolerance))
+    return max_diff
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a trained Keras model for the NumPy inference backend")
+    parser.add_argument("model_path", help="Path of the saved Keras model (model.h5)")
+    parser.add_argument("weights_dir", help="Destination directory for the exported weights")
+    parser.add_argument("--tolerance", type=float, default=None)
+    parser.add_argument("--quantization", choices=QUANTIZATION_MODES, default="none")
+    args = parser.parse_args()
+
+    import keras
+    model = keras.models.load_model(args.model_path)
+    max_diff = export_and_check(model, args.weights_dir, args.tolerance, args.quantization)
+    print(f"Exported {args.model_path} to {args.weights_dir} with quantization {args.quantization} "
+          f"(max abs score difference {max_diff:.2e})")
+
+
+if __name__ == "__main__":
+    main()
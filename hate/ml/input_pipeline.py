@@ -0,0 +1,193 @@
+import os
+import glob
+import json
+import hashlib
+import numpy as np
+import tensorflow as tf
+from hate.logger import logging
+from hate.constants import (MAX_LEN, RANDOM_STATE, TFDATA_NUM_PARALLEL_CALLS, TFDATA_THREADS,
+                            TFDATA_SHUFFLE_BUFFER, TFDATA_CACHE, TFDATA_SOURCE_CHUNK_SIZE)
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def configure_training_threads(intra_op_threads: int, inter_op_threads: int) -> None:
+    """
+    Sets TensorFlow's op thread pools; 0 leaves TensorFlow's default (all cores).
+    Must run before the first op executes.
+    """
+    if intra_op_threads:
+        tf.config.threading.set_intra_op_parallelism_threads(intra_op_threads)
+    if inter_op_threads:
+        tf.config.threading.set_inter_op_parallelism_threads(inter_op_threads)
+
+
+class TextDatasetBuilder:
+    def __init__(self, tokenizer, maxlen: int = MAX_LEN, mask_padding: bool = True,
+                 num_parallel_calls: int = TFDATA_NUM_PARALLEL_CALLS, threads: int = TFDATA_THREADS,
+                 shuffle_buffer: int = TFDATA_SHUFFLE_BUFFER, cache: str = TFDATA_CACHE, seed: int = RANDOM_STATE,
+                 source_chunk_size: int = TFDATA_SOURCE_CHUNK_SIZE):
+        """
+        Builds tf.data pipelines that tokenize and pad cleaned texts inside
+        the TensorFlow runtime, in parallel and overlapped with training, so
+        the full sequence matrix is never materialized in Python.
+        Tokenization reproduces Keras Tokenizer.texts_to_sequences with the
+        fitted word index; rows are pre-padded and pre-truncated like
+        pad_sequences.
+        :param tokenizer: Fitted Keras Tokenizer.
+        :param mask_padding: Pad each batch only to its longest row (model masks padding)
+                             instead of to maxlen.
+        :param num_parallel_calls: Parallel tokenization calls; -1 lets tf.data autotune.
+        :param threads: Size of the private tf.data thread pool; 0 uses the shared pool.
+        :param cache: "none", "memory", or a directory for an on-disk cache of tokenized rows.
+        :param source_chunk_size: Rows per chunk read from the text column (see _source).
+        """
+        if tokenizer.char_level:
+            raise ValueError("Character-level tokenizers are not supported by the tf.data input pipeline")
+        self.maxlen = maxlen
+        self.mask_padding = mask_padding
+        self.num_parallel_calls = tf.data.AUTOTUNE if num_parallel_calls < 0 else num_parallel_calls
+        self.threads = threads
+        self.shuffle_buffer = shuffle_buffer
+        self.cache = cache
+        self.seed = seed
+        self.source_chunk_size = source_chunk_size
+        self.lower = tokenizer.lower
+        self.split = tokenizer.split
+        # Every filtered character becomes the split character, as in text_to_word_sequence.
+        self.filters_pattern = "[" + "".join(f"\\x{{{ord(char):x}}}" for char in tokenizer.filters) + "]" \
+            if tokenizer.filters else None
+        num_words = tokenizer.num_words
+        words = [word for word, index in tokenizer.word_index.items() if not num_words or index < num_words]
+        ids = [tokenizer.word_index[word] for word in words]
+        # Unknown words are dropped unless the tokenizer maps them to its OOV token.
+        self.oov_id = tokenizer.word_index.get(tokenizer.oov_token, 0) if tokenizer.oov_token else 0
+        self.vocabulary_fingerprint = hashlib.sha256(json.dumps(
+            [words, self.lower, self.split, tokenizer.filters, self.oov_id]).encode("utf-8")).hexdigest()
+        self.table = tf.lookup.StaticHashTable(
+            tf.lookup.KeyValueTensorInitializer(tf.constant(words, dtype=tf.string),
+                                                tf.constant(ids, dtype=tf.int32)),
+            default_value=self.oov_id)
+
+    def _tokenize(self, text, label):
+        if self.lower:
+            text = tf.strings.lower(text, encoding="utf-8")
+        if self.filters_pattern:
+            text = tf.strings.regex_replace(text, self.filters_pattern, self.split)
+        tokens = tf.strings.split(text, sep=self.split)
+        tokens = tf.boolean_mask(tokens, tf.strings.length(tokens) > 0)
+        ids = self.table.lookup(tokens)
+        if not self.oov_id:
+            ids = tf.boolean_mask(ids, ids > 0)
+        # Keep the last maxlen ids and reverse them: padded_batch pads at the end,
+        # so reversing the padded batch back gives pre-padded rows.
+        return tf.reverse(ids[-self.maxlen:], axis=[0]), label
+
+    @staticmethod
+    def _restore_order(ids, labels):
+        return tf.reverse(ids, axis=[1]), labels
+
+    def _cached(self, dataset: tf.data.Dataset, texts, labels, name: str) -> tf.data.Dataset:
+        if self.cache == "none":
+            return dataset
+        if self.cache == "memory":
+            return dataset.cache()
+        cache_path = self._cache_path(texts, labels, name)
+        self._claim_cache(cache_path)
+        return dataset.cache(cache_path)
+
+    def _cache_path(self, texts, labels, name: str) -> str:
+        # tf.data reuses an existing cache file as-is, so its name must identify the content.
+        digest = hashlib.sha256(self.vocabulary_fingerprint.encode("utf-8"))
+        digest.update(str(self.maxlen).encode("utf-8"))
+        for text in texts:
+            digest.update(str(text).encode("utf-8"))
+            digest.update(b"\0")
+        digest.update(np.ascontiguousarray(labels).tobytes())
+        return os.path.join(self.cache, f"{name}-{digest.hexdigest()[:16]}")
+
+    @staticmethod
+    def _claim_cache(cache_path: str) -> None:
+        """
+        While tf.data fills an on-disk cache it holds "<cache_path>_<shard>.lockfile",
+        which it only removes after a full pass. A run killed in its first epoch
+        leaves it behind, and every later run on the same data would fail with
+        AlreadyExistsError. So the pid of the run writing the cache is recorded
+        in "<cache_path>.owner", and the lockfile and partial files of an owner
+        that is no longer running are removed. A live owner's files are left to
+        tf.data, which then reports the concurrent run.
+        """
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        owner_path = f"{cache_path}.owner"
+        if glob.glob(f"{glob.escape(cache_path)}_*.lockfile"):
+            try:
+                with open(owner_path, encoding="utf-8") as handle:
+                    owner = int(handle.read().strip())
+            except (FileNotFoundError, ValueError):
+                owner = None
+            if owner is not None and _process_alive(owner):
+                return
+            for path in glob.glob(f"{glob.escape(cache_path)}_*"):
+                os.remove(path)
+            logging.info("Removed the unfinished tf.data cache %s left by process %s", cache_path, owner)
+        with open(owner_path, "w", encoding="utf-8") as handle:
+            handle.write(str(os.getpid()))
+
+    def _source(self, texts, labels) -> tf.data.Dataset:
+        """
+        (text, label) rows read from the arrays by a generator, one chunk at a
+        time. from_tensor_slices would first copy the whole text column into
+        a single tf.string tensor, next to the column itself.
+        """
+        chunk_size = self.source_chunk_size
+
+        def chunks():
+            for start in range(0, len(labels), chunk_size):
+                yield [str(text) for text in texts[start:start + chunk_size]], labels[start:start + chunk_size]
+
+        signature = (tf.TensorSpec(shape=[None], dtype=tf.string), tf.TensorSpec(shape=[None], dtype=tf.float32))
+        return tf.data.Dataset.from_generator(chunks, output_signature=signature).unbatch()
+
+    def build(self, texts, labels, batch_size: int, shuffle: bool = True, name: str = "train") -> tf.data.Dataset:
+        """
+        Returns a dataset of (pre-padded int32 ids, label) batches.
+        Tokenized rows are cached after the first epoch; shuffling happens
+        after the cache with a bounded buffer, so every epoch is reshuffled.
+        :param texts: Cleaned texts; any sliceable sequence, e.g. an object array or a pandas Series.
+        :param name: Prefix of the on-disk cache file.
+        """
+        texts = np.asarray(texts, dtype=object)
+        labels = np.asarray(labels, dtype=np.float32)
+        dataset = self._source(texts, labels)
+        dataset = dataset.map(self._tokenize, num_parallel_calls=self.num_parallel_calls, deterministic=not shuffle)
+        dataset = self._cached(dataset, texts, labels, name)
+        if shuffle:
+            dataset = dataset.shuffle(self.shuffle_buffer, seed=self.seed, reshuffle_each_iteration=True)
+        padded_shapes = ([None] if self.mask_padding else [self.maxlen], [])
+        dataset = dataset.padded_batch(batch_size, padded_shapes=padded_shapes)
+        dataset = dataset.map(self._restore_order, num_parallel_calls=self.num_parallel_calls)
+        dataset = dataset.prefetch(tf.data.AUTOTUNE)
+
+        options = tf.data.Options()
+        if self.threads:
+            options.threading.private_threadpool_size = self.threads
+        return dataset.with_options(options)
+
+    def build_train_validation(self, texts, labels, batch_size: int, validation_split: float):
+        """
+        Splits off the last validation_split fraction of the rows, like Keras'
+        validation_split, and returns (train_dataset, validation_dataset).
+        """
+        texts = np.asarray(texts, dtype=object)
+        labels = np.asarray(labels)
+        split_at = int(len(labels) * (1 - validation_split))
+        return (self.build(texts[:split_at], labels[:split_at], batch_size, shuffle=True, name="train"),
+                self.build(texts[split_at:], labels[split_at:], batch_size, shuffle=False, name="validation"))
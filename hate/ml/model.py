@@ -13,11 +13,37 @@ class ModelArchitecture:
 
     def get_model(self):
         model = Sequential()
-        model.add(Embedding(MAX_WORDS, 100,input_length=MAX_LEN))
+        if MASK_PADDING:
+            # Padding ids are masked, so batches can be padded to any length
+            # (length bucketing, trimmed inference) without changing scores.
+            model.add(Input(shape=(None,), dtype="int32"))
+            model.add(Embedding(MAX_WORDS, 100, mask_zero=True))
+        else:
+            model.add(Embedding(MAX_WORDS, 100,input_length=MAX_LEN))
         model.add(SpatialDropout1D(0.2))
         model.add(LSTM(100,dropout=0.2,recurrent_dropout=0.2))
         model.add(Dense(1,activation=ACTIVATION))
         model.summary()
         model.compile(loss=LOSS,optimizer=RMSprop(),metrics=METRICS)
 
-        return model
\ No newline at end of file
+        return model
+
+    def load_for_fine_tuning(self, model_path: str, learning_rate: float):
+        """
+        Loads a trained model and recompiles it with a small learning rate,
+        so fine-tuning adjusts the weights instead of overwriting them.
+        """
+        import keras
+        model = keras.models.load_model(model_path)
+        model.compile(loss=LOSS,optimizer=RMSprop(learning_rate=learning_rate),metrics=METRICS)
+        return model
+
+    def get_callbacks(self, checkpoint_path: str, patience: int) -> list:
+        """
+        Early stopping on val_loss, restoring the best epoch's weights, and a
+        checkpoint of those weights after every improvement.
+        """
+        return [
+            EarlyStopping(monitor="val_loss", patience=patience, restore_best_weights=True, verbose=1),
+            ModelCheckpoint(checkpoint_path, monitor="val_loss", save_best_only=True, save_weights_only=True),
+        ]
\ No newline at end of file
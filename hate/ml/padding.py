@@ -0,0 +1,44 @@
+import numpy as np
+from hate.constants import PADDING_MULTIPLE
+
+
+def sequence_lengths(padded: np.ndarray) -> np.ndarray:
+    """
+    Number of real (non-zero) tokens in each row of a pre-padded id matrix.
+    """
+    return np.count_nonzero(padded, axis=1)
+
+
+def padded_width(longest: int, maxlen: int, multiple: int = PADDING_MULTIPLE) -> int:
+    """
+    Width needed for sequences of at most `longest` tokens, rounded up to a
+    multiple so only a handful of distinct shapes reach the model.
+    """
+    return min(maxlen, max(multiple, -(-longest // multiple) * multiple))
+
+
+def pad_ids(sequences, maxlen: int, trim: bool = False, multiple: int = PADDING_MULTIPLE) -> np.ndarray:
+    """
+    Writes id lists into a pre-padded, pre-truncated int32 matrix, like
+    keras pad_sequences. With trim=True the matrix is only as wide as the
+    longest sequence (see padded_width), for models that mask padding.
+    """
+    if trim:
+        maxlen = padded_width(max((len(ids) for ids in sequences), default=0), maxlen, multiple)
+    padded = np.zeros((len(sequences), maxlen), dtype=np.int32)
+    for row, ids in enumerate(sequences):
+        ids = ids[-maxlen:]
+        if len(ids):
+            padded[row, maxlen - len(ids):] = ids
+    return padded
+
+
+def trim_padding(padded: np.ndarray, multiple: int = PADDING_MULTIPLE) -> np.ndarray:
+    """
+    Drops leading padding columns shared by every row of a pre-padded matrix.
+    Only equivalent for models that mask padding (mask_zero=True).
+    """
+    if len(padded) == 0:
+        return padded
+    width = padded_width(int(sequence_lengths(padded).max()), padded.shape[1], multiple)
+    return padded[:, padded.shape[1] - width:]
@@ -0,0 +1,33 @@
+import numpy as np
+
+# Symmetric int8: values map to [-127, 127], so 0 stays exactly 0
+INT8_MAX = 127
+# Modes understood by export_numpy_weights: nothing, the embedding table, or every kernel
+QUANTIZATION_MODES = ("none", "embeddings", "all")
+
+
+def quantize_rows(matrix: np.ndarray) -> tuple:
+    """
+    int8 quantization with one float32 scale per row, so a rare word with
+    small weights keeps its precision next to frequent large-weight rows.
+    :return: (int8 matrix, float32 scales) with matrix ~= int8 * scales[:, None].
+    """
+    matrix = np.asarray(matrix, dtype=np.float32)
+    scales = np.abs(matrix).max(axis=1) / INT8_MAX
+    # All-zero rows (e.g. the padding id) would divide by zero; any scale reproduces them.
+    scales[scales == 0] = 1.0
+    quantized = np.clip(np.rint(matrix / scales[:, None]), -INT8_MAX, INT8_MAX).astype(np.int8)
+    return quantized, scales.astype(np.float32)
+
+
+def quantize_columns(kernel: np.ndarray) -> tuple:
+    """
+    int8 quantization of a (inputs, outputs) kernel with one scale per output unit.
+    :return: (int8 kernel, float32 scales) with kernel ~= int8 * scales[None, :].
+    """
+    quantized, scales = quantize_rows(np.asarray(kernel).T)
+    return np.ascontiguousarray(quantized.T), scales
+
+
+def dequantize_columns(quantized: np.ndarray, scales: np.ndarray) -> np.ndarray:
+    return np.asarray(quantized, dtype=np.float32) * np.asarray(scales, dtype=np.float32)
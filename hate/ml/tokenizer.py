@@ -0,0 +1,285 @@
+import os
+import sys
+import json
+import mmap
+import argparse
+from itertools import chain
+import numpy as np
+from hate.exception import CustomException
+from hate.ml.padding import padded_width
+from hate.constants import MAX_LEN, VOCAB_FORMAT_VERSION
+
+VOCAB_MAGIC = "#hate-vocab"
+# Binary sections of the vocabulary file start on 8-byte boundaries
+ALIGNMENT = 8
+# Odd 64-bit constant (2 ** 64 / golden ratio) of the word hash
+HASH_MULTIPLIER = 0x9E3779B97F4A7C15
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def _word_slots(words: np.ndarray, slot_bits: int) -> np.ndarray:
+    """
+    Home slot of each word of a fixed-width unicode array in a table of
+    2 ** slot_bits slots: a polynomial hash of the code points, computed for
+    all words at once (uint64 arithmetic wraps), whose top bits pick the slot.
+    """
+    width = words.dtype.itemsize // 4
+    codes = words.view(np.uint32).reshape(len(words), width).astype(np.uint64)
+    powers = np.array([pow(HASH_MULTIPLIER, power, 1 << 64) for power in range(width)], dtype=np.uint64)
+    return (codes @ powers * np.uint64(HASH_MULTIPLIER)) >> np.uint64(64 - slot_bits)
+
+
+def _lookup_arrays(words: list) -> tuple:
+    """
+    Lookup tables for words, where words[i] has id i + 1: the words in a
+    fixed-width unicode array indexed by id - 1, and an open-addressing hash
+    table of ids (0 for an empty slot) at most half full, probed linearly.
+    :return: (words array, slots array, longest probe sequence)
+    """
+    if any("\0" in word for word in words):
+        raise ValueError("Cannot export a word containing a NUL character")
+    table = np.array(words, dtype=f"<U{max(map(len, words), default=1)}")
+    slot_bits = max(1, (2 * len(words) - 1).bit_length())
+    slots = np.zeros(1 << slot_bits, dtype=np.int32)
+    mask = len(slots) - 1
+    max_probes = 0
+    for index, slot in enumerate(_word_slots(table, slot_bits).tolist(), start=1):
+        probes = 1
+        while slots[slot]:
+            slot = (slot + 1) & mask
+            probes += 1
+        slots[slot] = index
+        max_probes = max(max_probes, probes)
+    return table, slots, max_probes
+
+
+def _keras_vocabulary(tokenizer) -> tuple:
+    """
+    The words of a fitted Keras Tokenizer that texts_to_sequences can
+    return, in id order, and the settings it splits texts with. Only ids
+    below the tokenizer's num_words (MAX_WORDS in training) are kept since
+    Keras drops the rest anyway.
+    :return: (words, settings for VocabTokenizer)
+    """
+    if tokenizer.char_level:
+        raise ValueError("Character level tokenizers are not supported")
+    num_words = tokenizer.num_words
+    words = sorted(tokenizer.word_index.items(), key=lambda item: item[1])
+    if num_words:
+        words = [(word, index) for word, index in words if index < num_words]
+    for expected_index, (word, index) in enumerate(words, start=1):
+        if index != expected_index:
+            raise ValueError(f"Tokenizer word index is not contiguous at {word!r} ({index} != {expected_index})")
+    settings = {"num_words": num_words, "filters": tokenizer.filters, "lower": tokenizer.lower,
+                "split": tokenizer.split, "oov_token": tokenizer.oov_token}
+    return [word for word, _ in words], settings
+
+
+def export_vocabulary(tokenizer, vocab_path: str) -> int:
+    """
+    Writes the part of a fitted Keras Tokenizer that texts_to_sequences uses
+    (see _keras_vocabulary) to a compact, versioned file: a JSON header line
+    followed by binary lookup tables (see _lookup_arrays) that
+    VocabTokenizer.load maps into memory as they are.
+    :return: Number of words written.
+    """
+    try:
+        words, settings = _keras_vocabulary(tokenizer)
+        table, slots, max_probes = _lookup_arrays(words)
+
+        header = {
+            "version": VOCAB_FORMAT_VERSION,
+            **settings,
+            "size": len(words),
+            "width": table.dtype.itemsize // 4,
+            "slots": len(slots),
+            "max_probes": max_probes,
+        }
+        # Written next to vocab_path and renamed over it: a server may have the old file
+        # memory-mapped, and truncating it in place would pull the pages from under it.
+        tmp_path = f"{vocab_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as handle:
+            handle.write(f"{VOCAB_MAGIC} {json.dumps(header)}\n".encode("utf-8"))
+            for array in (table, slots):
+                handle.write(b"\0" * (_aligned(handle.tell()) - handle.tell()))
+                handle.write(array.tobytes())
+        os.replace(tmp_path, vocab_path)
+        return len(words)
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+
+class VocabTokenizer:
+    def __init__(self, table: np.ndarray, slots: np.ndarray, max_probes: int, num_words: int = None,
+                 filters: str = "", lower: bool = True, split: str = " ", oov_token: str = None):
+        """
+        Serving-time replacement for a fitted Keras Tokenizer. Produces the same
+        ids as texts_to_sequences followed by pad_sequences (pre-padding and
+        pre-truncation), written straight into one int32 matrix.
+        Words are looked up in the hash table of _lookup_arrays, a whole batch
+        at a time; load() leaves the tables in the memory-mapped file, so
+        forked workers share them instead of each building a dict.
+        Use VocabTokenizer.load() to build it from an exported vocabulary file.
+        """
+        self._table = table
+        self._slots = slots
+        self._max_probes = max_probes
+        self._slot_bits = len(slots).bit_length() - 1
+        self.num_words = num_words
+        self.filters = filters
+        self.lower = lower
+        self.split = split
+        self.oov_token = oov_token
+        self._translate_table = str.maketrans({character: split for character in filters})
+        self._oov_index = int(self.lookup([oov_token])[0]) or None if oov_token is not None else None
+
+    @classmethod
+    def from_keras(cls, tokenizer) -> "VocabTokenizer":
+        """
+        Builds the lookup tables of a fitted Keras Tokenizer in memory, for
+        when no exported vocabulary file exists.
+        """
+        words, settings = _keras_vocabulary(tokenizer)
+        return cls(*_lookup_arrays(words), **settings)
+
+    @classmethod
+    def load(cls, vocab_path: str) -> "VocabTokenizer":
+        """
+        Maps an exported vocabulary file read-only; only the header is parsed.
+        """
+        try:
+            with open(vocab_path, "rb") as handle:
+                mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+            header_end = mapped.find(b"\n")
+            header_line = mapped[:header_end if header_end != -1 else len(mapped)].decode("utf-8")
+            magic, _, header_json = header_line.partition(" ")
+            if magic != VOCAB_MAGIC:
+                raise ValueError(f"{vocab_path} is not a vocabulary file")
+            header = json.loads(header_json)
+            if header["version"] != VOCAB_FORMAT_VERSION:
+                raise ValueError(f"Unsupported vocabulary version {header['version']} in {vocab_path}")
+            tables = []
+            offset = header_end + 1
+            for dtype, count in ((np.dtype(f"<U{header['width']}"), header["size"]),
+                                 (np.dtype(np.int32), header["slots"])):
+                offset = _aligned(offset)
+                if offset + dtype.itemsize * count > len(mapped):
+                    raise ValueError(f"{vocab_path} is truncated")
+                tables.append(np.frombuffer(mapped, dtype=dtype, count=count, offset=offset))
+                offset += dtype.itemsize * count
+            return cls(*tables, header["max_probes"], num_words=header["num_words"], filters=header["filters"],
+                       lower=header["lower"], split=header["split"], oov_token=header["oov_token"])
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+    def lookup(self, words: list) -> np.ndarray:
+        """
+        Vocabulary ids of words, 0 for unknown words. num_words is not applied.
+        """
+        ids = np.zeros(len(words), dtype=np.int32)
+        if not len(self._table) or not len(words):
+            return ids
+        # Longer words would be cut to the table width and could match a prefix.
+        fits = np.fromiter(map(len, words), dtype=np.int64, count=len(words)) <= self._table.dtype.itemsize // 4
+        queries = np.array(words, dtype=self._table.dtype)
+        slots = _word_slots(queries, self._slot_bits).astype(np.int64)
+        pending = np.flatnonzero(fits)
+        mask = len(self._slots) - 1
+        for _ in range(self._max_probes):
+            candidates = self._slots[slots[pending]]
+            occupied = candidates > 0
+            found = occupied & (self._table[candidates - 1] == queries[pending])
+            ids[pending[found]] = candidates[found]
+            # An empty slot ends the probe sequence: the word is unknown.
+            keep = occupied & ~found
+            pending = pending[keep]
+            if not len(pending):
+                break
+            slots[pending] = (slots[pending] + 1) & mask
+        return ids
+
+    def _words(self, text: str) -> list:
+        if self.lower:
+            text = text.lower()
+        return [word for word in text.translate(self._translate_table).split(self.split) if word]
+
+    def _flat_ids(self, texts) -> tuple:
+        """
+        Ids of all texts, concatenated, with the number of ids of each text.
+        All words of the batch go through one lookup call.
+        """
+        word_lists = [self._words(text) for text in texts]
+        counts = np.fromiter(map(len, word_lists), dtype=np.int64, count=len(word_lists))
+        ids = self.lookup(list(chain.from_iterable(word_lists)))
+        known = ids > 0
+        if self.num_words:
+            known &= ids < self.num_words
+        if self._oov_index is not None:
+            ids[~known] = self._oov_index
+        elif not known.all():
+            rows = np.repeat(np.arange(len(counts)), counts)
+            counts = np.bincount(rows[known], minlength=len(counts)).astype(np.int64)
+            ids = ids[known]
+        return ids, counts
+
+    def text_to_ids(self, text: str) -> list:
+        """
+        Same result as Keras Tokenizer.texts_to_sequences([text])[0].
+        """
+        return self._flat_ids([text])[0].tolist()
+
+    def texts_to_sequences(self, texts) -> list:
+        """
+        Same result as Keras Tokenizer.texts_to_sequences(texts).
+        """
+        ids, counts = self._flat_ids(texts)
+        return [part.tolist() for part in np.split(ids, np.cumsum(counts)[:-1])] if len(counts) else []
+
+    def texts_to_padded(self, texts, maxlen: int = MAX_LEN, trim: bool = False) -> np.ndarray:
+        """
+        Tokenizes texts and returns a (len(texts), maxlen) int32 matrix,
+        pre-padded with zeros and pre-truncated like keras pad_sequences.
+        With trim=True the matrix is only as wide as the longest sequence
+        (rounded up, see padded_width), for models that mask padding.
+        """
+        ids, counts = self._flat_ids(texts)
+        width = padded_width(int(min(counts.max(), maxlen)) if len(counts) else 0, maxlen) if trim else maxlen
+        padded = np.zeros((len(counts), width), dtype=np.int32)
+        # Column of each id: the last id of a text lands in the last column, and
+        # ids that would land left of column 0 are truncated away.
+        rows = np.repeat(np.arange(len(counts)), counts)
+        columns = np.arange(len(ids)) + np.repeat(width - np.cumsum(counts), counts)
+        kept = columns >= 0
+        padded[rows[kept], columns[kept]] = ids[kept]
+        return padded
+
+    def matches(self, keras_tokenizer, texts, maxlen: int = MAX_LEN) -> bool:
+        """
+        True if this tokenizer gives exactly the ids Keras gives for texts.
+        """
+        from keras.utils import pad_sequences
+        expected = pad_sequences(keras_tokenizer.texts_to_sequences(texts), maxlen=maxlen)
+        return bool(np.array_equal(expected, self.texts_to_padded(texts, maxlen)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a pickled Keras Tokenizer to a compact vocabulary file")
+    parser.add_argument("tokenizer_path", help="Path of the pickled Keras Tokenizer")
+    parser.add_argument("vocab_path", help="Destination vocabulary file")
+    args = parser.parse_args()
+
+    import pickle
+    with open(args.tokenizer_path, "rb") as handle:
+        tokenizer = pickle.load(handle)
+    size = export_vocabulary(tokenizer, args.vocab_path)
+    print(f"Wrote {size} words to {args.vocab_path}")
+
+
+if __name__ == "__main__":
+    main()
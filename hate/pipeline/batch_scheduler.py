@@ -0,0 +1,141 @@
+import sys
+import asyncio
+from hate.logger import logging
+from hate.exception import CustomException
+from hate.entity.config_entity import PredictionConfig
+from hate.pipeline.executor import InferenceExecutor, InferenceBusyError
+
+
+class MicroBatchScheduler:
+    def __init__(self, predict_fn, max_batch_size: int = None, max_wait_ms: float = None,
+                 executor: InferenceExecutor = None, max_queue_size: int = None):
+        """
+        Collects concurrent prediction requests into micro-batches.
+        :param predict_fn: Callable taking a list of texts and returning one score per text.
+        :param max_batch_size: Largest number of texts scored in one forward pass.
+        :param max_wait_ms: How long the first request of a batch waits for company.
+        :param executor: Bounded executor the forward passes run on.
+        :param max_queue_size: Requests waiting for a batch beyond this are rejected.
+        """
+        prediction_config = PredictionConfig()
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size or prediction_config.MAX_BATCH_SIZE
+        self.max_wait = (prediction_config.MAX_WAIT_MS if max_wait_ms is None else max_wait_ms) / 1000.0
+        self.executor = executor or InferenceExecutor()
+        self.max_queue_size = max_queue_size or prediction_config.INFERENCE_MAX_PENDING
+        self._queue = None
+        self._worker = None
+        self._in_flight = None
+        self._dispatch_tasks = set()
+        # Requests taken off the queue for the batch being collected
+        self._collecting = []
+
+    async def start(self) -> None:
+        """
+        Starts the background task that drains the request queue.
+        Must be called from the running event loop (e.g. a FastAPI startup hook).
+        """
+        if self._worker is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+            # One batch per executor thread may be running at once.
+            self._in_flight = asyncio.Semaphore(self.executor.max_workers)
+            self._worker = asyncio.create_task(self._run())
+            logging.info("Started micro-batch scheduler (max_batch_size=%d, max_wait_ms=%.1f)", self.max_batch_size,
+                         self.max_wait * 1000)
+
+    async def stop(self) -> None:
+        """
+        Cancels the background task and waits for the batches already being
+        scored, so their callers get their scores. Requests still queued or
+        in a batch that was being collected are failed.
+        """
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+            if self._dispatch_tasks:
+                await asyncio.gather(*self._dispatch_tasks, return_exceptions=True)
+            error = RuntimeError("Micro-batch scheduler stopped before scoring this request")
+            pending = self._collecting
+            self._collecting = []
+            while not self._queue.empty():
+                pending.append(self._queue.get_nowait())
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(error)
+            if pending:
+                logging.info("Micro-batch scheduler stopped with %d unscored requests", len(pending))
+
+    async def submit(self, text: str) -> float:
+        """
+        Queues a single text and waits for its score.
+        """
+        if self._worker is None:
+            raise RuntimeError("Micro-batch scheduler is not running")
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((text, future))
+        except asyncio.QueueFull:
+            raise InferenceBusyError(f"Prediction queue is full ({self._queue.qsize()} waiting requests)")
+        return await future
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def _collect_batch(self) -> list:
+        """
+        Blocks for the first request, then keeps collecting until the batch is
+        full or max_wait has elapsed since the first request arrived.
+        """
+        loop = asyncio.get_running_loop()
+        # Kept on the scheduler so stop() can fail a batch cancelled half-way.
+        batch = self._collecting = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            # Drain whatever is already queued without yielding to the loop.
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            await self._in_flight.acquire()
+            try:
+                batch = await self._collect_batch()
+            except BaseException:
+                self._in_flight.release()
+                raise
+            self._collecting = []
+            task = asyncio.create_task(self._dispatch(batch))
+            # Keep a reference so the task is not garbage collected mid-flight.
+            self._dispatch_tasks.add(task)
+            task.add_done_callback(self._dispatch_tasks.discard)
+
+    async def _dispatch(self, batch: list) -> None:
+        texts = [text for text, _ in batch]
+        try:
+            # Run the forward pass off the event loop so new requests keep queueing.
+            scores = await self.executor.run(self.predict_fn, texts)
+        except Exception as e:
+            error = e if isinstance(e, InferenceBusyError) else CustomException(e, sys)
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        finally:
+            self._in_flight.release()
+        for (_, future), score in zip(batch, scores):
+            if not future.done():
+                future.set_result(float(score))
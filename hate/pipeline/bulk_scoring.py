@@ -0,0 +1,344 @@
+"""
+Offline scoring of large CSV, Parquet or JSONL files with the served model.
+
+    python -m hate.pipeline.bulk_scoring archive.parquet scores/ --keep-columns id
+
+The input is read in chunks. While one chunk is scored, a process pool
+cleans and tokenizes the next. Every chunk becomes one output part
+(scores/part-00000.parquet, ...) with the input row number, the label and
+the score, and progress is checkpointed after each part together with the
+input position where the next chunk starts. Rerunning the same command
+resumes from that position after the last finished part.
+"""
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import multiprocessing
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from hate.logger import logging, TEXT_FORMAT
+from hate.exception import CustomException
+from hate.entity.config_entity import BulkScoringConfig
+from hate.components.text_normalizer import get_text_normalizer
+from hate.ml.padding import pad_ids
+from hate.utils.main_utils import save_frame
+from hate.pipeline.prediction_pipeline import (PredictionPipeline, PREDICTION_CONFIG, load_tokenizer,
+                                               tokenizer_paths)
+
+# Per-process state of the cleaning workers, built once by _init_worker
+_WORKER = {}
+
+
+def _init_worker(vocab_path: str, tokenizer_path: str) -> None:
+    _WORKER["normalizer"] = get_text_normalizer()
+    _WORKER["tokenizer"] = load_tokenizer(vocab_path, tokenizer_path)
+
+
+def _clean_and_tokenize(texts: list) -> list:
+    normalizer = _WORKER["normalizer"]
+    return _WORKER["tokenizer"].texts_to_sequences([normalizer.normalize(text) for text in texts])
+
+
+def infer_file_format(file_path: str, file_extensions: dict) -> str:
+    extension = os.path.splitext(file_path)[1].lower()
+    for file_format, format_extension in file_extensions.items():
+        if extension == format_extension:
+            return file_format
+    raise ValueError(f"Cannot infer the file format of {file_path!r}, expected one of {sorted(file_extensions)}")
+
+
+def _read_records(handle, chunk_size: int, quoted: bool) -> bytes:
+    """
+    Reads up to chunk_size non-blank records from a binary file handle, so
+    that handle.tell() is where the next record starts.
+    :param quoted: CSV records: a newline inside double quotes does not end the record.
+    """
+    lines = []
+    records = 0
+    open_quotes = False
+    while records < chunk_size:
+        line = handle.readline()
+        if not line:
+            break
+        lines.append(line)
+        if quoted:
+            # "" escapes a quote inside a quoted field, which leaves the parity unchanged
+            open_quotes ^= line.count(b'"') % 2 == 1
+            if open_quotes:
+                continue
+        if line.strip():
+            records += 1
+    return b"".join(lines)
+
+
+def _iter_text_chunks(file_path: str, file_format: str, columns: list, chunk_size: int, position):
+    with open(file_path, "rb") as handle:
+        header = handle.readline() if file_format == "csv" else b""
+        if position:
+            handle.seek(position)
+        while True:
+            data = _read_records(handle, chunk_size, quoted=file_format == "csv")
+            if not data.strip():
+                return
+            if file_format == "csv":
+                chunk = pd.read_csv(io.BytesIO(header + data), usecols=columns)
+            else:
+                chunk = pd.read_json(io.BytesIO(data), lines=True, dtype=False)[columns]
+            yield chunk, handle.tell()
+
+
+def _iter_parquet_chunks(file_path: str, columns: list, chunk_size: int, position):
+    import pyarrow.parquet as pq
+    parquet_file = pq.ParquetFile(file_path)
+    first_group, skip = position or (0, 0)
+    for row_group in range(first_group, parquet_file.num_row_groups):
+        rows_read = 0
+        for batch in parquet_file.iter_batches(batch_size=chunk_size, row_groups=[row_group], columns=columns):
+            rows_read += batch.num_rows
+            if rows_read <= skip:
+                continue
+            chunk = batch.to_pandas()
+            if rows_read - skip < len(chunk):
+                chunk = chunk.iloc[len(chunk) - (rows_read - skip):]
+            group_done = rows_read == parquet_file.metadata.row_group(row_group).num_rows
+            yield chunk, [row_group + 1, 0] if group_done else [row_group, rows_read]
+        skip = 0
+
+
+def iter_chunks(file_path: str, file_format: str, columns: list, chunk_size: int, position=None):
+    """
+    Yields (DataFrame of at most chunk_size rows holding only columns, position
+    after it). Passing a yielded position back in resumes right after that
+    chunk without reading the rows before it: for CSV and JSONL it is the byte
+    offset of the next record, for Parquet [row group, rows already read in it].
+    CSV input must be UTF-8 (or ASCII) with a single header line.
+    :param position: Where to start; None starts at the first row.
+    """
+    if file_format in ("csv", "jsonl"):
+        yield from _iter_text_chunks(file_path, file_format, columns, chunk_size, position)
+    elif file_format == "parquet":
+        yield from _iter_parquet_chunks(file_path, columns, chunk_size, position)
+    else:
+        raise ValueError(f"Unsupported file format {file_format!r}")
+
+
+def score_sequences(backend, sequences: list, batch_size: int, maxlen: int, trim: bool) -> np.ndarray:
+    """
+    Scores token id sequences in forward passes of batch_size rows. Rows are
+    sorted by length first, so with trim every pass is padded only to its own
+    longest row; scores come back in input order.
+    """
+    lengths = np.fromiter(map(len, sequences), dtype=np.int64, count=len(sequences))
+    order = np.argsort(lengths, kind="stable")
+    scores = np.empty(len(sequences), dtype=np.float32)
+    for start in range(0, len(order), batch_size):
+        rows = order[start:start + batch_size]
+        padded = pad_ids([sequences[row] for row in rows], maxlen, trim=trim)
+        scores[rows] = backend.predict(padded, batch_size=len(rows))
+    return scores
+
+
+class BulkScorer:
+    def __init__(self, config: BulkScoringConfig = None, pipeline: PredictionPipeline = None):
+        """
+        :param config: Chunk, batch and pool sizes; defaults to BulkScoringConfig().
+        :param pipeline: Loaded (or loadable) PredictionPipeline; its response cache is not used.
+        """
+        self.config = config or BulkScoringConfig()
+        self.pipeline = pipeline or PredictionPipeline()
+        self.pool = None
+
+    def _pool(self) -> ProcessPoolExecutor:
+        # spawn, not fork: the keras backend has TensorFlow threads running in this process.
+        return ProcessPoolExecutor(max_workers=self.config.WORKERS, mp_context=multiprocessing.get_context("spawn"),
+                                   initializer=_init_worker, initargs=tokenizer_paths())
+
+    def _submit(self, texts: list):
+        """
+        Starts cleaning and tokenizing texts on the pool, one slice per worker.
+        :return: Futures whose results concatenate to the sequences, or None without a pool.
+        """
+        if self.pool is None:
+            return None
+        slice_size = -(-len(texts) // self.config.WORKERS) or 1
+        return [self.pool.submit(_clean_and_tokenize, texts[start:start + slice_size])
+                for start in range(0, len(texts), slice_size)]
+
+    def _sequences(self, texts: list, futures) -> list:
+        if futures is None:
+            normalizer = self.pipeline.text_normalizer
+            return self.pipeline.bundle.tokenizer.texts_to_sequences([normalizer.normalize(text) for text in texts])
+        sequences = []
+        for future in futures:
+            sequences.extend(future.result())
+        return sequences
+
+    def _progress_path(self, output_dir: str) -> str:
+        return os.path.join(output_dir, self.config.PROGRESS_NAME)
+
+    def _load_progress(self, output_dir: str, job: dict, restart: bool) -> dict:
+        """
+        Returns the checkpoint of an earlier run of the same job, or a fresh one.
+        Parts and checkpoints of a different job are only removed with restart.
+        """
+        progress_path = self._progress_path(output_dir)
+        if os.path.exists(progress_path) and not restart:
+            with open(progress_path) as handle:
+                progress = json.load(handle)
+            if progress["job"] != job:
+                raise ValueError(f"{output_dir} holds scores of a different input, model or settings; "
+                                 f"rerun with --restart to replace them")
+            if progress["rows_done"] and "position" not in progress:
+                raise ValueError(f"{output_dir} holds a checkpoint without an input position; "
+                                 f"rerun with --restart to replace it")
+            logging.info("Resuming %s after %d rows", output_dir, progress["rows_done"])
+            return progress
+        os.makedirs(output_dir, exist_ok=True)
+        for file_name in os.listdir(output_dir):
+            if file_name.startswith("part-") or file_name == self.config.PROGRESS_NAME:
+                os.remove(os.path.join(output_dir, file_name))
+        return {"job": job, "rows_done": 0, "parts": 0, "position": None}
+
+    def _save_progress(self, output_dir: str, progress: dict) -> None:
+        tmp_path = f"{self._progress_path(output_dir)}.tmp"
+        with open(tmp_path, "w") as handle:
+            json.dump(progress, handle, indent=2)
+        os.replace(tmp_path, self._progress_path(output_dir))
+
+    def _write_part(self, frame: pd.DataFrame, output_dir: str, output_format: str, index: int) -> str:
+        part_path = os.path.join(output_dir, f"part-{index:05d}{self.config.FILE_EXTENSIONS[output_format]}")
+        # A part is either complete or absent; a crash mid-write leaves only the .tmp file.
+        tmp_path = f"{part_path}.tmp"
+        if output_format == "jsonl":
+            frame.to_json(tmp_path, orient="records", lines=True, force_ascii=False)
+        else:
+            save_frame(frame, tmp_path, artifact_format=output_format)
+        os.replace(tmp_path, part_path)
+        return part_path
+
+    def run(self, input_path: str, output_dir: str, input_format: str = None, output_format: str = None,
+            text_column: str = None, keep_columns: list = None, restart: bool = False) -> dict:
+        """
+        Scores every row of input_path into parts under output_dir.
+        :param input_format: "csv", "parquet" or "jsonl"; inferred from the extension when None.
+        :param keep_columns: Input columns copied to the output next to row, label and score.
+        :param restart: Discard an earlier run's parts instead of resuming it.
+        :return: Rows scored by this run, seconds, rows_per_second and the total rows_done.
+        """
+        logging.info("Entered the run method of BulkScorer class")
+        try:
+            input_format = input_format or infer_file_format(input_path, self.config.FILE_EXTENSIONS)
+            output_format = output_format or self.config.OUTPUT_FORMAT
+            text_column = text_column or self.config.TEXT_COLUMN
+            keep_columns = [column for column in keep_columns or [] if column != text_column]
+            if not self.pipeline.is_ready:
+                self.pipeline.load()
+            bundle = self.pipeline.bundle
+            stat = os.stat(input_path)
+            job = {"input": os.path.abspath(input_path), "input_size": stat.st_size,
+                   "input_mtime_ns": stat.st_mtime_ns, "text_column": text_column, "keep_columns": keep_columns,
+                   "output_format": output_format, "model_version": bundle.version}
+            progress = self._load_progress(output_dir, job, restart)
+
+            chunks = iter_chunks(input_path, input_format, keep_columns + [text_column], self.config.CHUNK_SIZE,
+                                 progress.get("position"))
+            trim = PREDICTION_CONFIG.TRIM_PADDING and bundle.backend.supports_masking
+            start = time.perf_counter()
+            rows_scored = 0
+            self.pool = self._pool() if self.config.WORKERS > 1 else None
+            try:
+                pending = None
+                # Chunk n + 1 is cleaned on the pool while chunk n goes through the model.
+                for chunk, position in chunks:
+                    texts = chunk[text_column].fillna("").astype(str).tolist()
+                    submitted = (chunk, position, texts, self._submit(texts))
+                    if pending is not None:
+                        rows_scored += self._finish(pending, bundle, trim, output_dir, output_format, progress,
+                                                    start, rows_scored)
+                    pending = submitted
+                if pending is not None:
+                    rows_scored += self._finish(pending, bundle, trim, output_dir, output_format, progress,
+                                                start, rows_scored)
+            finally:
+                if self.pool is not None:
+                    self.pool.shutdown(cancel_futures=True)
+                    self.pool = None
+
+            seconds = time.perf_counter() - start
+            summary = {"rows": rows_scored, "seconds": seconds,
+                       "rows_per_second": rows_scored / seconds if seconds else 0.0,
+                       "rows_done": progress["rows_done"], "parts": progress["parts"]}
+            logging.info("Bulk scoring finished: %s", summary)
+            logging.info("Exited the run method of BulkScorer class")
+            return summary
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def _finish(self, pending: tuple, bundle, trim: bool, output_dir: str, output_format: str, progress: dict,
+                start: float, rows_scored: int) -> int:
+        """
+        Scores one chunk, writes its part and checkpoints the progress.
+        :return: Rows in the chunk.
+        """
+        chunk, position, texts, futures = pending
+        chunk_start = time.perf_counter()
+        sequences = self._sequences(texts, futures)
+        scores = score_sequences(bundle.backend, sequences, self.config.BATCH_SIZE, PREDICTION_CONFIG.MAX_LEN, trim)
+
+        frame = chunk.drop(columns=[progress["job"]["text_column"]]).reset_index(drop=True)
+        frame.insert(0, "row", np.arange(progress["rows_done"], progress["rows_done"] + len(chunk)))
+        frame["label"] = [PredictionPipeline.label_for(score) for score in scores]
+        frame["score"] = scores
+        self._write_part(frame, output_dir, output_format, progress["parts"])
+        progress["rows_done"] += len(chunk)
+        progress["parts"] += 1
+        progress["position"] = position
+        self._save_progress(output_dir, progress)
+
+        now = time.perf_counter()
+        rate = len(chunk) / (now - chunk_start) if now > chunk_start else 0.0
+        average = (rows_scored + len(chunk)) / (now - start) if now > start else 0.0
+        logging.info("%d rows scored (%d parts): %.0f rows/s, %.0f rows/s average this run",
+                     progress["rows_done"], progress["parts"], rate, average)
+        return len(chunk)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    config = BulkScoringConfig()
+    parser.add_argument("input_path", help="CSV, Parquet or JSONL file to score")
+    parser.add_argument("output_dir", help="Directory for the output parts and the progress checkpoint")
+    parser.add_argument("--input-format", choices=sorted(config.FILE_EXTENSIONS))
+    parser.add_argument("--output-format", choices=sorted(config.FILE_EXTENSIONS), default=config.OUTPUT_FORMAT)
+    parser.add_argument("--text-column", default=config.TEXT_COLUMN)
+    parser.add_argument("--keep-columns", nargs="*", default=[], help="Input columns copied to the output")
+    parser.add_argument("--chunk-size", type=int, default=config.CHUNK_SIZE)
+    parser.add_argument("--batch-size", type=int, default=config.BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=config.WORKERS)
+    parser.add_argument("--backend", choices=["keras", "numpy"], default=None)
+    parser.add_argument("--restart", action="store_true", help="Discard earlier progress instead of resuming")
+    args = parser.parse_args()
+
+    # The repo logger only writes to a file; show its progress records on the terminal too.
+    console = logging.StreamHandler()
+    console.setFormatter(logging.Formatter(TEXT_FORMAT))
+    console.setLevel(logging.INFO)
+    logging.getLogger().addHandler(console)
+
+    config.CHUNK_SIZE = args.chunk_size
+    config.BATCH_SIZE = args.batch_size
+    config.WORKERS = args.workers
+    scorer = BulkScorer(config, PredictionPipeline(backend_name=args.backend))
+    summary = scorer.run(args.input_path, args.output_dir, args.input_format, args.output_format,
+                         args.text_column, args.keep_columns, args.restart)
+    logging.info("Scored %d rows in %.1fs (%.0f rows/s); %d rows in %d parts under %s", summary["rows"],
+                 summary["seconds"], summary["rows_per_second"], summary["rows_done"], summary["parts"],
+                 args.output_dir)
+
+
+if __name__ == "__main__":
+    main()
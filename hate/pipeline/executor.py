@@ -0,0 +1,52 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from hate.logger import logging
+from hate.entity.config_entity import PredictionConfig
+
+
+class InferenceBusyError(Exception):
+    """
+    Raised when the inference executor is saturated and a request is shed
+    instead of queued, so callers can answer 503 straight away.
+    """
+
+
+class InferenceExecutor:
+    def __init__(self, max_workers: int = None, max_pending: int = None):
+        """
+        Bounded thread pool used to run blocking inference off the event loop.
+        Keras/TensorFlow release the GIL inside predict, so threads give real
+        concurrency while sharing one copy of the model.
+        :param max_workers: Number of inference threads.
+        :param max_pending: Maximum number of calls running or waiting; extra calls are rejected.
+        """
+        prediction_config = PredictionConfig()
+        self.max_workers = max_workers or prediction_config.INFERENCE_MAX_WORKERS
+        self.max_pending = max_pending or prediction_config.INFERENCE_MAX_PENDING
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="inference")
+        # Only touched from the event loop thread, so a plain counter is enough.
+        self._pending = 0
+        logging.info("Created inference executor (max_workers=%d, max_pending=%d)", self.max_workers,
+                     self.max_pending)
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    async def run(self, fn, *args, **kwargs):
+        """
+        Runs fn(*args, **kwargs) on the pool and awaits the result.
+        Raises InferenceBusyError instead of queueing when max_pending calls are in flight.
+        """
+        if self._pending >= self.max_pending:
+            raise InferenceBusyError(f"Inference queue is full ({self._pending} pending calls)")
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._pool, functools.partial(fn, *args, **kwargs))
+        finally:
+            self._pending -= 1
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=True)
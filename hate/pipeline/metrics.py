@@ -0,0 +1,213 @@
+import math
+import bisect
+import threading
+
+# Prometheus text exposition format content type
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 4096)
+
+
+def _format_labels(labelnames, labelvalues, extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(labelnames, labelvalues)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value))
+
+
+class _Metric:
+    metric_type = None
+
+    def __init__(self, name: str, documentation: str, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        (registry or REGISTRY).register(self)
+
+    def labels(self, *labelvalues):
+        """
+        Returns the child metric for the given label values (positional, in labelnames order).
+        """
+        child = self._children.get(labelvalues)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(labelvalues, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _default(self):
+        return self.labels()
+
+    def render(self, extra: str = "") -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        for labelvalues, child in list(self._children.items()):
+            lines.extend(child.render(self.name, self.labelnames, labelvalues, extra))
+        return lines
+
+
+class _ValueChild:
+    def __init__(self):
+        self._value = 0.0
+        self._function = None
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value += amount
+
+    def set(self, value: float) -> None:
+        self._value = value
+
+    def set_function(self, function) -> None:
+        """
+        Reads the value from function() at scrape time instead of storing it.
+        """
+        self._function = function
+
+    def get(self) -> float:
+        return self._function() if self._function is not None else self._value
+
+    def render(self, name, labelnames, labelvalues, extra: str = "") -> list:
+        return [f"{name}{_format_labels(labelnames, labelvalues, extra)} {_format_value(self.get())}"]
+
+
+class Counter(_Metric):
+    metric_type = "counter"
+
+    def _new_child(self):
+        return _ValueChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default().inc(amount)
+
+    def set_function(self, function) -> None:
+        self._default().set_function(function)
+
+
+class Gauge(Counter):
+    metric_type = "gauge"
+
+    def set(self, value: float) -> None:
+        self._default().set(value)
+
+
+class _HistogramChild:
+    def __init__(self, buckets):
+        self._buckets = buckets
+        self._counts = [0] * (len(buckets) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self._buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def render(self, name, labelnames, labelvalues, extra: str = "") -> list:
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+        lines, cumulative = [], 0
+        for upper_bound, count in zip(self._buckets + (math.inf,), counts):
+            cumulative += count
+            le = f'le="{_format_value(upper_bound)}"'
+            lines.append(f"{name}_bucket{_format_labels(labelnames, labelvalues, f'{extra},{le}' if extra else le)} "
+                         f"{cumulative}")
+        lines.append(f"{name}_sum{_format_labels(labelnames, labelvalues, extra)} {_format_value(total)}")
+        lines.append(f"{name}_count{_format_labels(labelnames, labelvalues, extra)} {cumulative}")
+        return lines
+
+
+class Histogram(_Metric):
+    metric_type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=LATENCY_BUCKETS, registry=None):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._default().observe(value)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        """
+        Minimal Prometheus-compatible registry. Observing a value is a bisect
+        and a short critical section, cheap enough to leave on in production.
+        """
+        self._metrics = {}
+
+    def register(self, metric: _Metric) -> None:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+
+    def get(self, name: str) -> _Metric:
+        return self._metrics[name]
+
+    def render(self, extra: str = "") -> str:
+        """
+        :param extra: Label pair added to every sample, e.g. 'worker="1234"'.
+        """
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render(extra))
+        return "\n".join(lines) + "\n"
+
+
+def merge_expositions(texts) -> str:
+    """
+    Merges renders of registries holding the same metrics (one per worker
+    process, told apart by an extra label) into one exposition: the text
+    format wants each metric's HELP and TYPE once, followed by all its samples.
+    """
+    families = {}
+    for text in texts:
+        name = None
+        for line in text.splitlines():
+            if line.startswith("# HELP "):
+                name = line.split(" ", 3)[2]
+                families.setdefault(name, ([line], []))
+            elif line.startswith("# TYPE "):
+                header = families[name][0]
+                if len(header) == 1:
+                    header.append(line)
+            elif line and name is not None:
+                families[name][1].append(line)
+    lines = []
+    for header, samples in families.values():
+        lines.extend(header)
+        lines.extend(samples)
+    return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+# Inference hot path metrics
+PREDICTION_STAGE_SECONDS = Histogram(
+    "hate_prediction_stage_seconds",
+    "Time spent in each stage of PredictionPipeline.predict_scores",
+    labelnames=("stage",))
+PREDICTION_BATCH_SIZE = Histogram(
+    "hate_prediction_batch_size",
+    "Number of texts per predict_scores call",
+    buckets=BATCH_SIZE_BUCKETS)
+REQUEST_SECONDS = Histogram(
+    "hate_request_seconds",
+    "End-to-end latency of prediction requests, including queueing",
+    labelnames=("route",))
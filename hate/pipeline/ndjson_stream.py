@@ -0,0 +1,203 @@
+import json
+import time
+import asyncio
+from starlette.responses import Response
+from starlette.requests import ClientDisconnect
+from hate.logger import logging
+from hate.pipeline.executor import InferenceBusyError
+from hate.entity.config_entity import PredictionConfig
+
+PREDICTION_CONFIG = PredictionConfig()
+
+
+class LineTooLongError(ValueError):
+    """
+    Raised when a request body line grows past STREAM_MAX_LINE_BYTES, which
+    would otherwise make the buffered line as large as the body.
+    """
+
+
+async def iter_lines(chunks, max_line_bytes: int):
+    """
+    Splits an async iterator of body chunks into lines, holding at most one
+    partial line between chunks.
+    :return: Async iterator of (1-based line number, line bytes without the newline).
+    """
+    buffer = bytearray()
+    line_number = 0
+    async for chunk in chunks:
+        buffer += chunk
+        start = 0
+        while True:
+            end = buffer.find(b"\n", start)
+            if end < 0:
+                break
+            line_number += 1
+            if end - start > max_line_bytes:
+                raise LineTooLongError(f"Line {line_number} is longer than {max_line_bytes} bytes")
+            yield line_number, bytes(buffer[start:end])
+            start = end + 1
+        del buffer[:start]
+        if len(buffer) > max_line_bytes:
+            raise LineTooLongError(f"Line {line_number + 1} is longer than {max_line_bytes} bytes")
+    if buffer:
+        yield line_number + 1, bytes(buffer)
+
+
+def parse_record(line: bytes) -> tuple:
+    """
+    Reads one request line: a JSON string, or an object with a "text" string
+    and an optional "id" that is echoed back.
+    :return: (text, id or None)
+    """
+    record = json.loads(line)
+    if isinstance(record, str):
+        return record, None
+    if isinstance(record, dict) and isinstance(record.get("text"), str):
+        return record["text"], record.get("id")
+    raise ValueError('Expected a JSON string or an object with a "text" string')
+
+
+def _ndjson(records: list) -> bytes:
+    return "".join(json.dumps(record) + "\n" for record in records).encode("utf-8")
+
+
+async def _score_with_retry(score, texts: list, retry_seconds: float, timeout_seconds: float):
+    """
+    A stream holds one batch at a time; waiting a little for the executor
+    beats failing half-way through the body.
+    Raises InferenceBusyError once the executor has been full for timeout_seconds.
+    """
+    deadline = time.monotonic() + timeout_seconds
+    while True:
+        try:
+            return await score(texts)
+        except InferenceBusyError:
+            if time.monotonic() + retry_seconds > deadline:
+                raise
+            await asyncio.sleep(retry_seconds)
+
+
+async def iter_request_body(receive):
+    """
+    Body chunks of an ASGI request, read straight from receive.
+    Raises ClientDisconnect if the client goes away before the body ends.
+    """
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            raise ClientDisconnect()
+        yield message.get("body", b"")
+        if not message.get("more_body", False):
+            return
+
+
+async def score_ndjson(chunks, score, label_for, batch_size: int = PREDICTION_CONFIG.STREAM_BATCH_SIZE,
+                       max_line_bytes: int = PREDICTION_CONFIG.STREAM_MAX_LINE_BYTES,
+                       retry_seconds: float = PREDICTION_CONFIG.STREAM_BUSY_RETRY_SECONDS,
+                       busy_timeout_seconds: float = PREDICTION_CONFIG.STREAM_BUSY_TIMEOUT_SECONDS):
+    """
+    Scores a newline-delimited JSON body in micro-batches and yields the
+    results as NDJSON, in input order, as soon as each batch is scored.
+    The body is only read as fast as results are consumed, so memory stays
+    bounded by batch_size and max_line_bytes whatever the body size.
+    Lines that are not valid records get an {"line", "error"} result; blank lines are skipped.
+    So do the lines of a batch the executor stayed too busy for (busy_timeout_seconds).
+    :param chunks: Async iterator of body bytes, e.g. iter_request_body(receive).
+    :param score: Async callable mapping a list of texts to their scores.
+    :param label_for: Maps a score to its label.
+    """
+    # (line number, id, text) for records to score, (line number, error) for rejected ones
+    batch = []
+    texts = []
+
+    async def flush() -> bytes:
+        try:
+            scores = await _score_with_retry(score, texts, retry_seconds, busy_timeout_seconds) if texts else []
+        except InferenceBusyError as e:
+            scores, busy_error = None, str(e)
+        scores = iter(scores) if scores is not None else None
+        results = []
+        for entry in batch:
+            if len(entry) == 2:
+                results.append({"line": entry[0], "error": entry[1]})
+                continue
+            line_number, record_id, _ = entry
+            if scores is None:
+                result = {"line": line_number, "error": busy_error}
+            else:
+                prediction_score = float(next(scores))
+                result = {"line": line_number, "label": label_for(prediction_score), "score": prediction_score}
+            if record_id is not None:
+                result["id"] = record_id
+            results.append(result)
+        batch.clear()
+        texts.clear()
+        return _ndjson(results)
+
+    # The status line is already sent when anything fails, so failures end the
+    # stream with a last error record telling the client it is incomplete.
+    incomplete = _ndjson([{"error": "Scoring failed; the stream is incomplete"}])
+    line_error = None
+    try:
+        async for line_number, line in iter_lines(chunks, max_line_bytes):
+            if not line.strip():
+                continue
+            try:
+                text, record_id = parse_record(line)
+            except ValueError as e:
+                batch.append((line_number, str(e)))
+            else:
+                batch.append((line_number, record_id, text))
+                texts.append(text)
+            if len(batch) >= batch_size:
+                yield await flush()
+    except LineTooLongError as e:
+        line_error = str(e)
+    except ClientDisconnect:
+        logging.info("Client disconnected from /predict/stream")
+        return
+    except Exception as e:
+        logging.error("Streaming prediction failed: %s", e)
+        yield incomplete
+        return
+
+    try:
+        if batch:
+            yield await flush()
+    except Exception as e:
+        logging.error("Streaming prediction failed: %s", e)
+        yield incomplete
+        return
+    if line_error is not None:
+        yield _ndjson([{"error": line_error}])
+
+
+class NdjsonScoringResponse(Response):
+    media_type = "application/x-ndjson"
+
+    def __init__(self, score, label_for, on_complete=None, **options):
+        """
+        Streams score_ndjson results for the request body. It reads the body
+        from receive itself: starlette's StreamingResponse runs a disconnect
+        listener on the same receive, which would swallow body messages.
+        :param on_complete: Called once the response has ended, however it ended.
+        :param options: Passed on to score_ndjson.
+        """
+        self.status_code = 200
+        self.background = None
+        self.score = score
+        self.label_for = label_for
+        self.on_complete = on_complete
+        self.options = options
+        self.init_headers()
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+            async for part in score_ndjson(iter_request_body(receive), self.score, self.label_for, **self.options):
+                await send({"type": "http.response.body", "body": part, "more_body": True})
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            if self.on_complete is not None:
+                self.on_complete()
@@ -0,0 +1,221 @@
+import os
+import sys
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from hate.logger import logging
+from hate.exception import CustomException
+
+# Replaced model versions remembered by a cache, so late lookups for them are recognised as stale
+MAX_RETIRED_VERSIONS = 16
+
+
+def artifact_version(*paths) -> str:
+    """
+    Fingerprint of the files a prediction depends on (size and mtime), so
+    every worker that loads the same model and tokenizer agrees on it.
+    """
+    digest = hashlib.sha1()
+    for path in paths:
+        if path and os.path.exists(path):
+            stat = os.stat(path)
+            digest.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns};".encode("utf-8"))
+        else:
+            digest.update(f"{path}:missing;".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+class MemoryPredictionCache:
+    name = "memory"
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        """
+        Bounded LRU cache of scores keyed by normalized text, with a TTL.
+        Entries belong to one model version; the first lookup of a new
+        version drops everything, so a reloaded model never sees stale
+        scores. Lookups that still carry a replaced version (requests that
+        started before a reload) are misses and leave the cache alone.
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._version = None
+        # Versions this cache has moved on from, oldest first
+        self._retired = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _check_version(self, version: str) -> bool:
+        """
+        Moves the cache forward to a version it has not served before.
+        Called with the lock held.
+        :return: False for a replaced version, whose lookups must miss.
+        """
+        if version == self._version:
+            return True
+        if version in self._retired:
+            return False
+        if self._version is not None:
+            self._retired[self._version] = None
+            while len(self._retired) > MAX_RETIRED_VERSIONS:
+                self._retired.popitem(last=False)
+        self._entries.clear()
+        self._version = version
+        return True
+
+    def get_many(self, version: str, keys) -> dict:
+        """
+        Returns {key: score} for the keys that are cached and not expired.
+        """
+        now = time.monotonic()
+        found = {}
+        with self._lock:
+            if not self._check_version(version):
+                self.misses += len(keys)
+                return found
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and entry[1] > now:
+                    self._entries.move_to_end(key)
+                    found[key] = entry[0]
+                elif entry is not None:
+                    del self._entries[key]
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, version: str, items: dict) -> None:
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            # Results computed by an older model must not land in the new version's cache.
+            if version != self._version:
+                return
+            for key, score in items.items():
+                self._entries[key] = (score, expires_at)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._version = None
+            self._retired.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {"backend": self.name, "size": len(self), "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds, "hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0}
+
+
+class SqlitePredictionCache(MemoryPredictionCache):
+    name = "sqlite"
+
+    def __init__(self, max_size: int, ttl_seconds: float, db_path: str):
+        """
+        On-disk cache shared by every uvicorn worker on the host. Same
+        semantics as MemoryPredictionCache; rows store the model version
+        they were computed with and are ignored for any other version.
+        """
+        super().__init__(max_size, ttl_seconds)
+        self.db_path = db_path
+        self._local = threading.local()
+        self._pid = os.getpid()
+        self._writes = 0
+        try:
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+            connection = self._connection()
+            connection.execute("CREATE TABLE IF NOT EXISTS predictions ("
+                               "version TEXT NOT NULL, key TEXT NOT NULL, score REAL NOT NULL, "
+                               "expires_at REAL NOT NULL, PRIMARY KEY (version, key))")
+            connection.commit()
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._pid != os.getpid():
+            # A forked worker must not reuse connections opened by its parent.
+            self._local = threading.local()
+            self._pid = os.getpid()
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_path, timeout=5.0, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def get_many(self, version: str, keys) -> dict:
+        keys = list(keys)
+        found = {}
+        connection = self._connection()
+        now = time.time()
+        # SQLite limits the number of bound parameters per statement.
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            rows = connection.execute(
+                f"SELECT key, score FROM predictions WHERE version = ? AND expires_at > ? "
+                f"AND key IN ({','.join('?' * len(chunk))})", [version, now, *chunk]).fetchall()
+            found.update(rows)
+        with self._lock:
+            self._check_version(version)
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, version: str, items: dict) -> None:
+        if not items:
+            return
+        with self._lock:
+            # Rows of a replaced version would only be evicted again, along with current ones.
+            if version in self._retired:
+                return
+        expires_at = time.time() + self.ttl_seconds
+        connection = self._connection()
+        try:
+            with connection:
+                connection.executemany("INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?)",
+                                       [(version, key, score, expires_at) for key, score in items.items()])
+            self._writes += len(items)
+            if self._writes >= max(1, self.max_size // 10):
+                self._writes = 0
+                self._evict(connection, version)
+        except sqlite3.OperationalError as e:
+            # A busy database only costs a cache write, never a prediction.
+            logging.info("Skipping prediction cache write: %s", e)
+
+    def _evict(self, connection: sqlite3.Connection, version: str) -> None:
+        with connection:
+            connection.execute("DELETE FROM predictions WHERE version != ? OR expires_at <= ?", (version, time.time()))
+            connection.execute("DELETE FROM predictions WHERE rowid IN (SELECT rowid FROM predictions "
+                               "ORDER BY expires_at DESC LIMIT -1 OFFSET ?)", (self.max_size,))
+
+    def clear(self) -> None:
+        with self._connection() as connection:
+            connection.execute("DELETE FROM predictions")
+        with self._lock:
+            self._version = None
+            self._retired.clear()
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+
+
+def build_prediction_cache(backend_name: str, max_size: int, ttl_seconds: float, db_path: str):
+    """
+    Builds the cache selected by config: "memory", "sqlite" or "none".
+    """
+    if backend_name == "none" or max_size <= 0:
+        return None
+    if backend_name == MemoryPredictionCache.name:
+        return MemoryPredictionCache(max_size, ttl_seconds)
+    if backend_name == SqlitePredictionCache.name:
+        return SqlitePredictionCache(max_size, ttl_seconds, db_path)
+    raise ValueError(f"Unknown prediction cache backend {backend_name!r}")
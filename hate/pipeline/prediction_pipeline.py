@@ -1,71 +1,239 @@
 import os
 import sys
-import keras
+import time
 import pickle
-from keras.utils import pad_sequences
-from hate.logger import logging
+import threading
+import numpy as np
+from datetime import datetime
+from dataclasses import dataclass
+from hate.logger import logging, LogSampler
 from hate.constants import MODEL_NAME  
 from hate.exception import CustomException
-from hate.components.data_transforamation import DataTransformation
-from hate.entity.config_entity import DataTransformationConfig
-from hate.entity.artifact_entity import DataIngestionArtifacts
+from hate.components.text_normalizer import get_text_normalizer
+from hate.entity.config_entity import PredictionConfig
+from hate.ml.tokenizer import VocabTokenizer
+from hate.ml.backends import load_backend
+from hate.ml.backends import NUMPY_MANIFEST_NAME
+from hate.pipeline.prediction_cache import artifact_version, build_prediction_cache
+from hate.pipeline.metrics import PREDICTION_STAGE_SECONDS, PREDICTION_BATCH_SIZE
+
+# Only what inference needs is imported here; keras/TensorFlow are imported
+# only when the keras backend is loaded, and the training stack never is.
 
 # Define the paths for your model and tokenizer
-MODEL_PATH = os.path.join("artifacts", "PredictModel", MODEL_NAME)
-TOKENIZER_PATH = "tokenizer.pickle"  
+PREDICTION_CONFIG = PredictionConfig()
+MODEL_PATH = PREDICTION_CONFIG.MODEL_PATH
+TOKENIZER_PATH = PREDICTION_CONFIG.TOKENIZER_PATH
+VOCAB_PATH = PREDICTION_CONFIG.VOCAB_PATH
+
+# Resolve the per-stage histograms once; observing is then a single call.
+CLEAN_SECONDS = PREDICTION_STAGE_SECONDS.labels("clean")
+CACHE_SECONDS = PREDICTION_STAGE_SECONDS.labels("cache")
+TOKENIZE_SECONDS = PREDICTION_STAGE_SECONDS.labels("tokenize")
+FORWARD_SECONDS = PREDICTION_STAGE_SECONDS.labels("forward")
+TOTAL_SECONDS = PREDICTION_STAGE_SECONDS.labels("total")
+# predict runs once per request, so its messages are sampled
+REQUEST_LOG = LogSampler()
+
+
+def tokenizer_paths() -> tuple:
+    """
+    (vocab_path, tokenizer_path) of the tokenizer that belongs to the served
+    model: the copies ModelPusher wrote next to it, or the trainer's output.
+    """
+    if os.path.exists(PREDICTION_CONFIG.PUSHED_VOCAB_PATH) or os.path.exists(PREDICTION_CONFIG.PUSHED_TOKENIZER_PATH):
+        return PREDICTION_CONFIG.PUSHED_VOCAB_PATH, PREDICTION_CONFIG.PUSHED_TOKENIZER_PATH
+    return VOCAB_PATH, TOKENIZER_PATH
+
+
+def load_tokenizer(vocab_path: str = VOCAB_PATH, tokenizer_path: str = TOKENIZER_PATH) -> VocabTokenizer:
+    """
+    Loads the compact vocabulary exported by ModelTrainer when it exists and
+    falls back to converting the pickled Keras Tokenizer otherwise.
+    """
+    if os.path.exists(vocab_path):
+        return VocabTokenizer.load(vocab_path)
+    logging.info("%s not found, falling back to the pickled tokenizer %s", vocab_path, tokenizer_path)
+    with open(tokenizer_path, 'rb') as handle:
+        return VocabTokenizer.from_keras(pickle.load(handle))
+
+
+@dataclass
+class ModelBundle:
+    backend: object
+    tokenizer: object
+    model_path: str
+    loaded_at: str
+    # Changes whenever the model or tokenizer files change; keys the prediction cache
+    version: str
 
-try:
-    GLOBAL_MODEL = keras.models.load_model(MODEL_PATH)
-    with open(TOKENIZER_PATH, 'rb') as handle:
-        GLOBAL_TOKENIZER = pickle.load(handle)
-except Exception as e:
-    raise CustomException(e, sys)
 
 # -----------------------------------------------
 # PredictionPipeline Class Definition
 # -----------------------------------------------
 
 class PredictionPipeline:
-    def __init__(self):
+    def __init__(self, model_path: str = MODEL_PATH, backend_name: str = None):
+        """
+        Nothing is loaded here; call load() (the API does it from a startup
+        hook) before predicting.
+        :param backend_name: Inference backend, "keras" or "numpy"; defaults to INFERENCE_BACKEND.
+        """
         self.model_name = MODEL_NAME
-        self.model_path = os.path.join("artifacts", "PredictModel")
-        # Create an instance of DataTransformation.
-        # IMPORTANT: Pass in actual configuration instances instead of the classes themselves.
-        self.data_transformation = DataTransformation(
-            data_transformation_config=DataTransformationConfig,  # Provide a configured instance if available
-            data_ingestion_artifacts=DataIngestionArtifacts        # Provide a configured instance if available
-        )
+        self.model_path = model_path
+        self.backend_name = backend_name or PREDICTION_CONFIG.BACKEND
+        self.text_normalizer = None
+        self.bundle = None
+        self._reload_lock = threading.Lock()
+        self.cache = build_prediction_cache(PREDICTION_CONFIG.CACHE_BACKEND, PREDICTION_CONFIG.CACHE_SIZE,
+                                            PREDICTION_CONFIG.CACHE_TTL_SECONDS, PREDICTION_CONFIG.CACHE_PATH)
+
+    @property
+    def is_ready(self) -> bool:
+        return self.bundle is not None
+
+    def current_version(self) -> str:
+        """
+        Version of the model and tokenizer files currently on disk, without loading them.
+        """
+        version = artifact_version(self.model_path,
+                                   os.path.join(PREDICTION_CONFIG.NUMPY_WEIGHTS_DIR, NUMPY_MANIFEST_NAME),
+                                   *tokenizer_paths())
+        return f"{self.backend_name}-{version}"
+
+    def _build_bundle(self, version: str) -> ModelBundle:
+        logging.info("Loading prediction artifacts from %s", self.model_path)
+        backend = load_backend(self.backend_name, self.model_path, PREDICTION_CONFIG.NUMPY_WEIGHTS_DIR)
+        # Cached scores are keyed by version, so a reload invalidates them automatically.
+        return ModelBundle(backend=backend,
+                           tokenizer=load_tokenizer(*tokenizer_paths()),
+                           model_path=self.model_path,
+                           loaded_at=datetime.now().isoformat(),
+                           version=version)
+
+    def _warm_up(self, bundle: ModelBundle) -> None:
+        # The first predict of a new model builds its graph; pay for it before any request does.
+        texts = [self.text_normalizer.normalize(text) for text in PREDICTION_CONFIG.WARMUP_TEXTS]
+        trim = PREDICTION_CONFIG.TRIM_PADDING and bundle.backend.supports_masking
+        bundle.backend.predict(bundle.tokenizer.texts_to_padded(texts, PREDICTION_CONFIG.MAX_LEN, trim=trim),
+                               batch_size=PREDICTION_CONFIG.CHUNK_SIZE)
+
+    def reload(self, force: bool = False) -> bool:
+        """
+        Loads the model and tokenizer currently on disk next to the served
+        ones, warms them up and swaps them in with a single assignment.
+        Calls already running keep the bundle they started with; the old
+        model is freed once they finish.
+        :param force: Reload even when the files have not changed.
+        :return: Whether a new bundle was swapped in.
+        """
+        try:
+            with self._reload_lock:
+                version = self.current_version()
+                if not force and self.bundle is not None and self.bundle.version == version:
+                    return False
+                self.text_normalizer = get_text_normalizer()
+                bundle = self._build_bundle(version)
+                self._warm_up(bundle)
+                self.bundle = bundle
+                logging.info("Serving model version %s", version)
+                return True
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def load(self) -> ModelBundle:
+        """
+        Loads the inference backend, the tokenizer and the text normalizer.
+        """
+        self.reload(force=True)
+        return self.bundle
+
+    def predict_scores(self, texts) -> np.ndarray:
+        """
+        Clean a list of texts, tokenize and pad them together and score the
+        stacked matrix with a single backend.predict call, which walks the
+        matrix in chunks of PREDICTION_CHUNK_SIZE rows.
+        Returns one float score per input text.
+        """
+        try:
+            bundle = self.bundle
+            if bundle is None:
+                raise RuntimeError("Prediction artifacts are not loaded yet")
+            if len(texts) == 0:
+                return np.empty(0, dtype=np.float32)
+            start = time.perf_counter()
+            PREDICTION_BATCH_SIZE.observe(len(texts))
+            transformed_texts = [self.text_normalizer.normalize(text) for text in texts]
+            cleaned = time.perf_counter()
+            CLEAN_SECONDS.observe(cleaned - start)
+            if self.cache is None:
+                scores = self._score(bundle, transformed_texts)
+                TOTAL_SECONDS.observe(time.perf_counter() - start)
+                return scores
+
+            # Duplicates (retweets, spam waves) are scored once per batch and then served from the cache.
+            unique_texts = list(dict.fromkeys(transformed_texts))
+            scores = self.cache.get_many(bundle.version, unique_texts)
+            missing_texts = [text for text in unique_texts if text not in scores]
+            CACHE_SECONDS.observe(time.perf_counter() - cleaned)
+            if missing_texts:
+                computed = dict(zip(missing_texts, self._score(bundle, missing_texts).tolist()))
+                self.cache.put_many(bundle.version, computed)
+                scores.update(computed)
+            result = np.array([scores[text] for text in transformed_texts], dtype=np.float32)
+            TOTAL_SECONDS.observe(time.perf_counter() - start)
+            return result
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def _score(self, bundle: ModelBundle, transformed_texts: list) -> np.ndarray:
+        start = time.perf_counter()
+        # Trimming is only score-preserving when the model masks padding.
+        trim = PREDICTION_CONFIG.TRIM_PADDING and bundle.backend.supports_masking
+        # Tokenizing writes ids straight into the padded matrix, so there is no separate pad stage.
+        padded = bundle.tokenizer.texts_to_padded(transformed_texts, PREDICTION_CONFIG.MAX_LEN, trim=trim)
+        tokenized = time.perf_counter()
+        scores = bundle.backend.predict(padded, batch_size=PREDICTION_CONFIG.CHUNK_SIZE)
+        TOKENIZE_SECONDS.observe(tokenized - start)
+        FORWARD_SECONDS.observe(time.perf_counter() - tokenized)
+        return scores
+
+    def cache_stats(self) -> dict:
+        return self.cache.stats() if self.cache is not None else {"backend": "none"}
+
+    def cache_hit_rate(self) -> float:
+        lookups = self.cache.hits + self.cache.misses if self.cache is not None else 0
+        return self.cache.hits / lookups if lookups else 0.0
+
+    @staticmethod
+    def label_for(prediction_score: float) -> str:
+        """
+        Map a raw model score to the label returned by the API.
+        """
+        if prediction_score > PREDICTION_CONFIG.THRESHOLD:
+            return "hate and abusive"
+        return "no hate"
+
+    def predict_batch(self, texts) -> list:
+        """
+        Score many texts at once.
+        Returns a list of {"label", "score"} dicts in the same order as the input.
+        """
+        try:
+            scores = self.predict_scores(list(texts))
+            return [{"label": self.label_for(score), "score": float(score)} for score in scores]
+        except Exception as e:
+            raise CustomException(e, sys) from e
 
     def predict(self, text: str) -> str:
         """
-        Load preprocessed text, convert to sequences using the global tokenizer, 
-        pad sequences, and make a prediction using the global model.
+        Clean the text, convert it to a padded sequence with the loaded
+        tokenizer and make a prediction using the loaded model.
         """
-        #logging.info("Running the predict function")
         try:
-            # Clean and transform the input text
-            transformed_text = self.data_transformation.concat_data_cleaning(text)
-            # The tokenizer expects a list of texts
-            text_list = [transformed_text]
-            
-            # Tokenize using the preloaded global tokenizer
-            sequences = GLOBAL_TOKENIZER.texts_to_sequences(text_list)
-            # Pad the sequences (ensure maxlen is set appropriately; here it is hardcoded to 300)
-            padded = pad_sequences(sequences, maxlen=300)
-            
-            # Use the preloaded global model to predict
-            pred = GLOBAL_MODEL.predict(padded)
-            # Extract the prediction score (assuming a single output value)
-            prediction_score = pred[0][0] if pred.ndim > 1 else pred[0]
-            #logging.info(f"Prediction score: {prediction_score}")
-            
-            # Return a label based on the prediction threshold
-            if prediction_score > 0.5:
-                #logging.info("Predicted: hate and abusive")
-                return "hate and abusive"
-            else:
-                #logging.info("Predicted: no hate")
-                return "no hate"
+            prediction_score = self.predict_scores([text])[0]
+            REQUEST_LOG.debug("Prediction score: %.4f", prediction_score)
+            return self.label_for(prediction_score)
         except Exception as e:
             raise CustomException(e, sys) from e
 
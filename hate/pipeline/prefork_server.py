@@ -0,0 +1,183 @@
+"""
+Pre-fork serving: load the model once, then fork workers that share it.
+
+    python -m hate.pipeline.prefork_server --workers 4 --port 8080
+
+The master imports the app and loads the prediction artifacts before
+forking, so every worker starts ready and shares those pages copy-on-write.
+Workers default to the numpy backend (PREFORK_INFERENCE_BACKEND), whose
+weights and vocabulary tables are used in place from mmap-ed files, which
+the kernel shares through the page cache. TensorFlow is not fork-safe once
+initialized, so with --backend keras the master only imports the app and
+builds the text normalizer, and each worker loads the model after the fork.
+
+Workers stay in step through the master: a worker that reloads the model
+signals the master, which forwards the signal to every other worker. Each
+worker labels its metrics with its pid and /metrics merges the snapshots of
+all of them; training jobs are coordinated through TRAINING_JOBS_DIR.
+"""
+import os
+import gc
+import sys
+import time
+import signal
+import socket
+import argparse
+import uvicorn
+from hate.logger import logging, flush_logs
+from hate.exception import CustomException
+from hate.constants import APP_HOST, APP_PORT, SERVING_WORKERS, PREFORK_INFERENCE_BACKEND, PREFORK_STATE_DIR
+from hate.pipeline.worker_group import WORKER_GROUP, RELOAD_SIGNAL, FORCED_RELOAD_SIGNAL
+
+# Handled by the master's loop instead of signal handlers
+MASTER_SIGNALS = {signal.SIGCHLD, signal.SIGTERM, signal.SIGINT, RELOAD_SIGNAL, FORCED_RELOAD_SIGNAL}
+
+
+def bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    """
+    Listening socket created once in the master and inherited by every
+    worker; the kernel spreads incoming connections across them.
+    """
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+class PreforkServer:
+    def __init__(self, workers: int = SERVING_WORKERS, host: str = APP_HOST, port: int = APP_PORT,
+                 backend: str = PREFORK_INFERENCE_BACKEND):
+        """
+        :param workers: Number of worker processes to fork.
+        :param backend: Inference backend of the workers, "numpy" or "keras".
+        """
+        self.workers = workers
+        self.host = host
+        self.port = port
+        self.backend = backend
+        self.worker_pids = set()
+        self.stopping = False
+        self.sock = None
+
+    def preload(self):
+        """
+        Imports the app and, when it is fork-safe, loads the prediction artifacts.
+        :return: The ASGI app the workers serve.
+        """
+        import app as app_module
+        from hate.components.text_normalizer import get_text_normalizer
+        pipeline = app_module.prediction_pipeline
+        pipeline.backend_name = self.backend
+        if self.backend == "keras":
+            # The stemmer and stop words are still shared; the model cannot be.
+            get_text_normalizer()
+            logging.info("keras backend: each worker loads its own model after the fork")
+        else:
+            pipeline.load()
+            logging.info("Loaded model version %s in the master", pipeline.bundle.version)
+        # Objects created so far are never collected in the workers, so the
+        # collector does not touch (and copy) the pages they live on.
+        gc.collect()
+        gc.freeze()
+        return app_module.app
+
+    def _run_worker(self, app) -> None:
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        # Ignored until the app's startup hook installs its reload handlers
+        signal.signal(RELOAD_SIGNAL, signal.SIG_IGN)
+        signal.signal(FORCED_RELOAD_SIGNAL, signal.SIG_IGN)
+        signal.pthread_sigmask(signal.SIG_UNBLOCK, MASTER_SIGNALS)
+        exit_code = 0
+        try:
+            config = uvicorn.Config(app, host=self.host, port=self.port, log_config=None)
+            uvicorn.Server(config).run(sockets=[self.sock])
+        except Exception as e:
+            logging.error("Worker %d failed: %s", os.getpid(), e)
+            exit_code = 1
+        finally:
+            flush_logs()
+            os._exit(exit_code)
+
+    def _spawn(self, app) -> None:
+        pid = os.fork()
+        if pid == 0:
+            self._run_worker(app)
+        self.worker_pids.add(pid)
+        logging.info("Started worker %d", pid)
+
+    def _signal_workers(self, signum: int, exclude: int = None) -> None:
+        for pid in list(self.worker_pids):
+            if pid == exclude:
+                continue
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+    def _stop(self) -> None:
+        self.stopping = True
+        self._signal_workers(signal.SIGTERM)
+
+    def _reap(self, app) -> None:
+        """
+        Collects exited workers and, unless stopping, restarts them.
+        """
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            self.worker_pids.discard(pid)
+            WORKER_GROUP.remove_worker(pid)
+            if not self.stopping:
+                logging.error("Worker %d exited with status %d, restarting it", pid, status)
+                # Do not spin if workers die straight after starting.
+                time.sleep(1)
+                self._spawn(app)
+
+    def run(self) -> None:
+        """
+        Preloads, forks the workers and restarts any that die until
+        SIGTERM/SIGINT. A reload signal from a worker is forwarded to all the others.
+        """
+        try:
+            app = self.preload()
+            self.sock = bind_socket(self.host, self.port)
+            WORKER_GROUP.configure(PREFORK_STATE_DIR)
+            # Blocked signals stay pending until sigwaitinfo collects them, with the sender's pid.
+            signal.pthread_sigmask(signal.SIG_BLOCK, MASTER_SIGNALS)
+            for _ in range(self.workers):
+                self._spawn(app)
+            logging.info("Serving on %s:%d with %d pre-forked workers", self.host, self.port, self.workers)
+
+            while self.worker_pids:
+                info = signal.sigwaitinfo(MASTER_SIGNALS)
+                if info.si_signo in (signal.SIGTERM, signal.SIGINT):
+                    self._stop()
+                elif info.si_signo in (RELOAD_SIGNAL, FORCED_RELOAD_SIGNAL):
+                    logging.info("Worker %d reloaded the model, reloading the other workers", info.si_pid)
+                    self._signal_workers(info.si_signo, exclude=info.si_pid)
+                else:
+                    self._reap(app)
+            self.sock.close()
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=SERVING_WORKERS)
+    parser.add_argument("--host", default=APP_HOST)
+    parser.add_argument("--port", type=int, default=APP_PORT)
+    parser.add_argument("--backend", choices=("numpy", "keras"), default=PREFORK_INFERENCE_BACKEND)
+    args = parser.parse_args()
+    PreforkServer(args.workers, args.host, args.port, args.backend).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,31 +1,71 @@
+import os
 import sys
 from hate.logger import logging
 from hate.exception import CustomException
+from hate.constants import CLEANING_LANGUAGE, MASK_PADDING, PADDING_MULTIPLE
+from hate.utils.stage_cache import StageCache
+from hate.ml.backends import NUMPY_MANIFEST_NAME
 from hate.components.data_ingestion import DataIngestion
 from hate.components.data_transforamation import DataTransformation
 from hate.components.model_trainer import ModelTrainer
 from hate.components.model_evaluation import ModelEvaluation
+from hate.components.model_pusher import ModelPusher
 from hate.entity.config_entity import (DataIngestionConfig,
                                        DataTransformationConfig,
                                        ModelTrainerConfig,
-                                       ModelEvaluationConfig)
+                                       ModelEvaluationConfig,
+                                       ModelPusherConfig)
 
 from hate.entity.artifact_entity import (DataIngestionArtifacts,
                                          DataTransformationArtifacts,
                                          ModelTrainerArtifacts,
-                                         ModelEvaluationArtifacts)
+                                         ModelEvaluationArtifacts,
+                                         ModelPusherArtifacts)
 
 class TrainPipeline:
-    def __init__(self):
+    STAGES = ("data_ingestion", "data_transformation", "model_trainer", "model_evaluation")
+
+    def __init__(self, force=False):
+        """
+        :param force: True to rerun every stage, or an iterable of stage names
+                      (see STAGES) to rerun those stages and every stage after them.
+                      Stages whose inputs and config are unchanged are otherwise
+                      reused from the stage manifest.
+        """
         self.data_ingestion_config = DataIngestionConfig()
         self.data_transformation_config = DataTransformationConfig()
         self.model_trainer_config = ModelTrainerConfig()
         self.model_evaluation_config =ModelEvaluationConfig()
+        self.model_pusher_config = ModelPusherConfig()
+        self.stage_cache = StageCache(force=self._forced_stages(force))
+        # Cache key of the last stage that ran; each stage's key includes its upstream key
+        self._stage_keys = {}
+
+    def _forced_stages(self, force) -> tuple:
+        if force is True:
+            return self.STAGES
+        if not force:
+            return ()
+        if isinstance(force, str):
+            force = (force,)
+        unknown = set(force) - set(self.STAGES)
+        if unknown:
+            raise ValueError(f"Unknown pipeline stages {sorted(unknown)}, expected some of {self.STAGES}")
+        # A rerun stage rewrites its outputs, so everything downstream reruns too.
+        return self.STAGES[min(self.STAGES.index(stage) for stage in force):]
 
     def start_data_ingestion(self) -> DataIngestionArtifacts:
         try:
             data_ingestion = DataIngestion(data_ingestion_config = self.data_ingestion_config)
-            data_ingestion_artifacts = data_ingestion.initiate_data_ingestion()
+            key = self.stage_cache.stage_key(
+                "data_ingestion",
+                dataset=StageCache.file_fingerprint(data_ingestion.ZIP_FILE_PATH),
+                config=StageCache.config_fingerprint(self.data_ingestion_config))
+            self._stage_keys["data_ingestion"] = key
+            data_ingestion_artifacts = self.stage_cache.run(
+                "data_ingestion", key, DataIngestionArtifacts, data_ingestion.initiate_data_ingestion,
+                lambda artifacts: [artifacts.zip_file_path] if artifacts.zip_file_path else
+                                  [artifacts.imbalance_data_file_path, artifacts.raw_data_file_path])
             return data_ingestion_artifacts
         except Exception as e:
             raise CustomException(e, sys) from e
@@ -36,31 +76,83 @@ class TrainPipeline:
                 data_ingestion_artifacts = data_ingestion_artifacts,
                 data_transformation_config=self.data_transformation_config
             )
-            data_transformation_artifacts = data_transformation.initiate_data_transformation()
+            key = self.stage_cache.stage_key(
+                "data_transformation",
+                upstream=self._stage_keys["data_ingestion"],
+                config=StageCache.config_fingerprint(self.data_transformation_config),
+                cleaning_language=CLEANING_LANGUAGE)
+            self._stage_keys["data_transformation"] = key
+            data_transformation_artifacts = self.stage_cache.run(
+                "data_transformation", key, DataTransformationArtifacts,
+                data_transformation.initiate_data_transformation,
+                lambda artifacts: [artifacts.transformed_data_path])
             return data_transformation_artifacts
         except Exception as e:
             raise CustomException(e, sys) from e
     
+    def _warm_start_fingerprint(self) -> list:
+        # A warm start depends on the model it starts from, its tokenizer and the rows it has seen.
+        config = self.model_trainer_config
+        if config.TRAINING_MODE != "warm_start" or not os.path.isfile(config.WARM_START_MODEL_PATH):
+            return None
+        return [StageCache.file_fingerprint(path) if os.path.isfile(path) else None
+                for path in (config.WARM_START_MODEL_PATH, config.WARM_START_TOKENIZER_PATH,
+                             config.WARM_START_TRAINED_TEXTS_PATH)]
+
     def start_model_trainer(self, data_transformation_artifacts: DataTransformationArtifacts) -> ModelTrainerArtifacts:
         try:
             model_trainer = ModelTrainer(data_transformation_artifacts=data_transformation_artifacts,
                                         model_trainer_config=self.model_trainer_config
                                         )
-            model_trainer_artifacts = model_trainer.initiate_model_trainer()
+            key = self.stage_cache.stage_key(
+                "model_trainer",
+                upstream=self._stage_keys["data_transformation"],
+                config=StageCache.config_fingerprint(self.model_trainer_config),
+                mask_padding=MASK_PADDING, padding_multiple=PADDING_MULTIPLE,
+                warm_start=self._warm_start_fingerprint())
+            self._stage_keys["model_trainer"] = key
+            # The tokenizer files live outside the run directory; a later run overwriting them invalidates this entry.
+            model_trainer_artifacts = self.stage_cache.run(
+                "model_trainer", key, ModelTrainerArtifacts, model_trainer.initiate_model_trainer,
+                lambda artifacts: [artifacts.trained_model_path, artifacts.x_test_path, artifacts.y_test_path,
+                                   artifacts.x_train_path, self.model_trainer_config.TOKENIZER_PATH,
+                                   self.model_trainer_config.VOCAB_PATH,
+                                   artifacts.trained_texts_path,
+                                   os.path.join(self.model_trainer_config.NUMPY_WEIGHTS_DIR, NUMPY_MANIFEST_NAME),
+                                   os.path.join(self.model_trainer_config.QUANTIZED_WEIGHTS_DIR, NUMPY_MANIFEST_NAME)
+                                   if self.model_trainer_config.WEIGHT_QUANTIZATION != "none" else None])
             return model_trainer_artifacts
         except Exception as e:
             raise CustomException(e, sys)  
     
     def start_model_evaluation(self, model_trainer_artifacts: ModelTrainerArtifacts, data_transformation_artifacts: DataTransformationArtifacts) -> ModelEvaluationArtifacts:
         try:
-            model_evaluation = ModelEvaluation(data_transformation_artifacts = data_transformation_artifacts,
-                                                model_evaluation_config=self.model_evaluation_config,
-                                                model_trainer_artifacts=model_trainer_artifacts)
-            model_evaluation_artifacts = model_evaluation.initiate_model_evaluation()
+            model_evaluation = ModelEvaluation(transformation_artifacts = data_transformation_artifacts,
+                                                evaluation_config=self.model_evaluation_config,
+                                                trainer_artifacts=model_trainer_artifacts)
+            best_model_path = os.path.join(self.model_evaluation_config.BEST_MODEL_DIR_PATH,
+                                           self.model_evaluation_config.MODEL_NAME)
+            key = self.stage_cache.stage_key(
+                "model_evaluation",
+                upstream=self._stage_keys["model_trainer"],
+                best_model=StageCache.file_fingerprint(best_model_path) if os.path.isfile(best_model_path) else None,
+                config=StageCache.config_fingerprint(self.model_evaluation_config))
+            model_evaluation_artifacts = self.stage_cache.run(
+                "model_evaluation", key, ModelEvaluationArtifacts, model_evaluation.initiate_model_evaluation,
+                lambda artifacts: [model_trainer_artifacts.trained_model_path])
             return model_evaluation_artifacts
         except Exception as e:
             raise CustomException(e, sys) from e
          
+    def start_model_pusher(self, model_trainer_artifacts: ModelTrainerArtifacts) -> ModelPusherArtifacts:
+        # Always runs: it is cheap, and the serving copy may have been replaced since the last run.
+        try:
+            model_pusher = ModelPusher(model_pusher_config=self.model_pusher_config,
+                                       model_trainer_artifacts=model_trainer_artifacts)
+            return model_pusher.initiate_model_pusher()
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
     def run_pipeline(self):
         logging.info("Entered the run_pipeline method of TrainPipeline class")
         try:
@@ -76,6 +168,7 @@ class TrainPipeline:
             ) 
             if not model_evaluation_artifacts.is_model_accepted:
                 raise Exception("Trained model is not better than the best model")
+            self.start_model_pusher(model_trainer_artifacts=model_trainer_artifacts)
             logging.info("Exited the run_pipeline method of TrainPipeline class") 
 
         except Exception as e:
@@ -0,0 +1,211 @@
+import os
+import sys
+import json
+import uuid
+import fcntl
+import threading
+import multiprocessing
+from datetime import datetime
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from hate.logger import logging
+from hate.exception import CustomException
+from hate.constants import TRAINING_JOBS_DIR
+
+
+def _run_train_pipeline(job_id: str, state_dir: str, force=False) -> None:
+    # The job only counts as running once this process has picked it up.
+    TrainingJobManager(state_dir=state_dir).mark_running(job_id)
+    # Imported here so the serving process never loads the training stack.
+    from hate.pipeline.train_pipeline import TrainPipeline
+    try:
+        TrainPipeline(force=force).run_pipeline()
+    except Exception as e:
+        # CustomException cannot be unpickled in the parent; send back its message only.
+        raise RuntimeError(str(e)) from None
+
+
+@dataclass
+class TrainingJobStatus:
+    job_id: str
+    state: str
+    submitted_at: str
+    started_at: str = None
+    finished_at: str = None
+    error: str = None
+    # API process that runs the job; a job whose process is gone has failed
+    pid: int = None
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class TrainingJobManager:
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    def __init__(self, on_success=None, state_dir: str = TRAINING_JOBS_DIR):
+        """
+        Runs TrainPipeline in a separate process, one job at a time, so a
+        training run never competes with the API's event loop for the GIL.
+        Job states live in state_dir, one JSON file per job, and every check
+        and update holds a lock file there: pre-forked API workers all see the
+        same jobs, and only one of them can start a run.
+        :param on_success: Called with the job id, on a background thread, after a job succeeds.
+        """
+        self.on_success = on_success
+        self.state_dir = state_dir
+        self._lock = threading.Lock()
+        self._pool = None
+
+    @contextmanager
+    def _locked(self):
+        # flock excludes other processes; the thread lock, other threads of this one.
+        with self._lock:
+            os.makedirs(self.state_dir, exist_ok=True)
+            with open(os.path.join(self.state_dir, ".lock"), "a") as handle:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _job_path(self, job_id: str) -> str:
+        return os.path.join(self.state_dir, f"{job_id}.json")
+
+    def _read(self, job_id: str) -> TrainingJobStatus:
+        if not job_id or not os.path.exists(self._job_path(job_id)):
+            return None
+        with open(self._job_path(job_id), encoding="utf-8") as handle:
+            job = TrainingJobStatus(**json.load(handle))
+        if job.state in (self.PENDING, self.RUNNING) and job.pid is not None and not _process_alive(job.pid):
+            job.state = self.FAILED
+            job.finished_at = datetime.now().isoformat()
+            job.error = f"The API process running this job ({job.pid}) exited"
+            self._write(job)
+        return job
+
+    def _write(self, job: TrainingJobStatus) -> None:
+        path = self._job_path(job.job_id)
+        with open(path + ".tmp", "w", encoding="utf-8") as handle:
+            json.dump(asdict(job), handle)
+        os.replace(path + ".tmp", path)
+
+    def _current_job_id(self) -> str:
+        path = os.path.join(self.state_dir, "current")
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as handle:
+            return handle.read().strip()
+
+    def _set_current_job_id(self, job_id: str) -> None:
+        path = os.path.join(self.state_dir, "current")
+        with open(path + ".tmp", "w", encoding="utf-8") as handle:
+            handle.write(job_id)
+        os.replace(path + ".tmp", path)
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn, not fork: the parent may already have TensorFlow threads running.
+            self._pool = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    def _submit_to_pool(self, job_id: str, force: bool):
+        try:
+            return self._get_pool().submit(_run_train_pipeline, job_id, self.state_dir, force)
+        except BrokenProcessPool:
+            # A training process died (e.g. killed for memory) and the pool refuses new work; replace it.
+            logging.info("The training process pool is broken; starting a new one")
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+            return self._get_pool().submit(_run_train_pipeline, job_id, self.state_dir, force)
+
+    def submit(self, force=False) -> TrainingJobStatus:
+        """
+        Starts a training job unless one is already pending or running, in
+        this or any other API process, in which case that job is returned.
+        :param force: Passed to TrainPipeline; True reruns stages even when cached.
+        """
+        try:
+            with self._locked():
+                current = self._read(self._current_job_id())
+                if current is not None and current.state in (self.PENDING, self.RUNNING):
+                    return current
+
+                job = TrainingJobStatus(job_id=uuid.uuid4().hex, state=self.PENDING,
+                                        submitted_at=datetime.now().isoformat(), pid=os.getpid())
+                self._write(job)
+                self._set_current_job_id(job.job_id)
+
+            try:
+                future = self._submit_to_pool(job.job_id, force)
+            except Exception as e:
+                # Otherwise the job would stay pending, and block every later submit, until this process exits
+                with self._locked():
+                    job.state = self.FAILED
+                    job.finished_at = datetime.now().isoformat()
+                    job.error = f"Could not start the training process: {e}"
+                    self._write(job)
+                raise
+            future.add_done_callback(lambda f, job_id=job.job_id: self._on_done(job_id, f))
+            logging.info("Submitted training job %s", job.job_id)
+            return job
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def mark_running(self, job_id: str) -> None:
+        """
+        Called from the training process when it starts the job.
+        """
+        with self._locked():
+            job = self._read(job_id)
+            if job is not None and job.state == self.PENDING:
+                job.state = self.RUNNING
+                job.started_at = datetime.now().isoformat()
+                self._write(job)
+
+    def _on_done(self, job_id: str, future) -> None:
+        with self._locked():
+            job = self._read(job_id)
+            job.finished_at = datetime.now().isoformat()
+            # exception() raises CancelledError for a cancelled future
+            if future.cancelled():
+                job.state = self.CANCELLED
+                logging.info("Training job %s was cancelled before it started", job_id)
+                self._write(job)
+                return
+            error = future.exception()
+            if error is None:
+                job.state = self.SUCCEEDED
+                logging.info("Training job %s succeeded", job_id)
+                if self.on_success is not None:
+                    threading.Thread(target=self.on_success, args=(job_id,), daemon=True).start()
+            else:
+                job.state = self.FAILED
+                job.error = str(error)
+                logging.info("Training job %s failed: %s", job_id, error)
+            self._write(job)
+
+    def status(self, job_id: str = None) -> dict:
+        """
+        Returns the status of the given job, or of the latest job when job_id is None.
+        """
+        with self._locked():
+            job = self._read(job_id or self._current_job_id())
+            return asdict(job) if job is not None else None
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
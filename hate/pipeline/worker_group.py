@@ -0,0 +1,118 @@
+import os
+import glob
+import time
+import fcntl
+import signal
+from hate.logger import logging
+from hate.constants import PREFORK_STATE_DIR
+from hate.pipeline.metrics import REGISTRY, merge_expositions
+
+# Sent by a worker to the master, which forwards it to every other worker
+RELOAD_SIGNAL = getattr(signal, "SIGUSR1", None)
+FORCED_RELOAD_SIGNAL = getattr(signal, "SIGUSR2", None)
+
+
+class WorkerGroup:
+    def __init__(self):
+        """
+        What the workers forked by hate.pipeline.prefork_server share. The
+        master calls configure() before forking; in a single-process server
+        it is never configured and every method acts on this process only.
+        """
+        self.master_pid = None
+        self.state_dir = None
+        self.metrics_dir = None
+        self._last_forced_reload = None
+
+    def configure(self, state_dir: str = PREFORK_STATE_DIR) -> None:
+        """
+        Called in the master before forking. Clears metric snapshots left by a previous run.
+        """
+        self.master_pid = os.getpid()
+        self.state_dir = state_dir
+        self.metrics_dir = os.path.join(state_dir, "metrics")
+        os.makedirs(self.metrics_dir, exist_ok=True)
+        for path in glob.glob(os.path.join(self.metrics_dir, "*.prom")):
+            os.remove(path)
+
+    @property
+    def active(self) -> bool:
+        """
+        True in a worker forked by a configured master.
+        """
+        return self.master_pid is not None and os.getpid() != self.master_pid
+
+    def request_reload(self, force: bool = False) -> None:
+        """
+        Asks the master to make every other worker reload too; the caller reloads itself.
+        """
+        if self.active:
+            os.kill(self.master_pid, FORCED_RELOAD_SIGNAL if force else RELOAD_SIGNAL)
+
+    def claim_forced_reload(self, min_interval: float) -> float:
+        """
+        Rate limit of forced reloads, shared by every worker: one forced reload
+        fans out to all of them.
+        :return: 0 when the caller may force a reload now, else the seconds to wait.
+        """
+        if not self.active:
+            last = self._last_forced_reload
+            wait = 0.0 if last is None else last + min_interval - time.monotonic()
+            if wait <= 0:
+                self._last_forced_reload = time.monotonic()
+            return max(wait, 0.0)
+        with open(os.path.join(self.state_dir, "forced_reload"), "a+") as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                handle.seek(0)
+                last = float(handle.read() or "-inf")
+                wait = last + min_interval - time.time()
+                if wait <= 0:
+                    handle.truncate(0)
+                    handle.write(repr(time.time()))
+                    handle.flush()
+                return max(wait, 0.0)
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _snapshot_path(self, pid: int) -> str:
+        return os.path.join(self.metrics_dir, f"{pid}.prom")
+
+    def write_metrics_snapshot(self) -> None:
+        # Written to a temporary file and renamed, so a reader never sees half a snapshot
+        path = self._snapshot_path(os.getpid())
+        with open(path + ".tmp", "w", encoding="utf-8") as handle:
+            handle.write(REGISTRY.render(f'worker="{os.getpid()}"'))
+        os.replace(path + ".tmp", path)
+
+    def render_metrics(self) -> str:
+        """
+        This process's metrics, or in a worker those of every worker, each
+        sample labelled with its worker's pid. Other workers' values are at
+        most METRICS_SNAPSHOT_INTERVAL_SECONDS old.
+        """
+        if not self.active:
+            return REGISTRY.render()
+        self.write_metrics_snapshot()
+        texts = []
+        for path in sorted(glob.glob(os.path.join(self.metrics_dir, "*.prom"))):
+            try:
+                with open(path, encoding="utf-8") as handle:
+                    texts.append(handle.read())
+            except FileNotFoundError:
+                # The master removed the snapshot of a worker that just exited
+                continue
+        return merge_expositions(texts)
+
+    def remove_worker(self, pid: int) -> None:
+        """
+        Called by the master when a worker exits; its counters leave /metrics with it.
+        """
+        try:
+            os.remove(self._snapshot_path(pid))
+        except FileNotFoundError:
+            pass
+        logging.debug("Removed the metric snapshot of worker %d", pid)
+
+
+WORKER_GROUP = WorkerGroup()
@@ -0,0 +1,144 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+from hate.logger import logging
+from hate.exception import CustomException
+from hate.constants import ARTIFACT_FILE_EXTENSIONS
+
+
+def text_hashes(texts) -> np.ndarray:
+    """
+    Stable 64-bit hash of every text, the same across runs and processes.
+    """
+    return pd.util.hash_pandas_object(pd.Series(texts, dtype=str), index=False).to_numpy(np.uint64)
+
+
+def split_by_text_hash(x: pd.Series, y: pd.Series, test_size: float, seed: int) -> tuple:
+    """
+    Train/test split where a text is a test row when its hash falls in the
+    lowest test_size share. Unlike a random split, adding rows never moves an
+    existing text to the other side, and duplicate texts stay together.
+    Training rows are shuffled: Keras validation_split takes the last rows.
+    :return: (x_train, x_test, y_train, y_test), keeping the input index.
+    """
+    test = text_hashes(x) % 1000 < round(test_size * 1000)
+    train_rows = np.random.default_rng(seed).permutation(np.flatnonzero(~test))
+    test_rows = np.flatnonzero(test)
+    return x.iloc[train_rows], x.iloc[test_rows], y.iloc[train_rows], y.iloc[test_rows]
+
+
+def artifact_file_name(name: str, artifact_format: str) -> str:
+    """
+    Appends the extension of the given artifact format to a file name stem.
+    """
+    if artifact_format not in ARTIFACT_FILE_EXTENSIONS:
+        raise ValueError(f"Unsupported artifact format {artifact_format!r}, "
+                         f"expected one of {sorted(ARTIFACT_FILE_EXTENSIONS)}")
+    return name + ARTIFACT_FILE_EXTENSIONS[artifact_format]
+
+
+def infer_artifact_format(file_path: str) -> str:
+    """
+    Returns the artifact format matching the extension of file_path.
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    for artifact_format, format_extension in ARTIFACT_FILE_EXTENSIONS.items():
+        if extension == format_extension:
+            return artifact_format
+    raise ValueError(f"Cannot infer artifact format from {file_path!r}")
+
+
+def save_frame(data, file_path: str, artifact_format: str = None, index: bool = False) -> None:
+    """
+    Writes a DataFrame (or Series) artifact in the given format.
+    :param data: DataFrame or Series to write.
+    :param file_path: Destination path.
+    :param artifact_format: "parquet" or "csv"; inferred from the extension when None.
+    :param index: Whether the index is stored alongside the columns.
+    """
+    try:
+        artifact_format = artifact_format or infer_artifact_format(file_path)
+        if isinstance(data, pd.Series):
+            data = data.to_frame()
+        os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+        if artifact_format == "parquet":
+            data.to_parquet(file_path, engine="pyarrow", index=index)
+        elif artifact_format == "csv":
+            data.to_csv(file_path, index=index, header=True)
+        else:
+            raise ValueError(f"Unsupported artifact format {artifact_format!r}")
+        logging.info("Saved %s artifact %s with shape %s", artifact_format, file_path, data.shape)
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+
+class FrameAppender:
+    def __init__(self, file_path: str, artifact_format: str = None):
+        """
+        Writes a DataFrame artifact chunk by chunk, so it never has to be held
+        in memory in full. The result reads back with load_frame like one
+        written by save_frame(index=False).
+        :param file_path: Destination path; an existing file is replaced.
+        :param artifact_format: "parquet" or "csv"; inferred from the extension when None.
+        """
+        self.file_path = file_path
+        self.artifact_format = artifact_format or infer_artifact_format(file_path)
+        if self.artifact_format not in ARTIFACT_FILE_EXTENSIONS:
+            raise ValueError(f"Unsupported artifact format {self.artifact_format!r}")
+        self.rows = 0
+        self._writer = None
+        self._schema = None
+        os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+    def append(self, frame: pd.DataFrame) -> None:
+        try:
+            if self.artifact_format == "parquet":
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+                # Every row group must share the schema of the first chunk.
+                table = pa.Table.from_pandas(frame, schema=self._schema, preserve_index=False)
+                if self._writer is None:
+                    self._schema = table.schema
+                    self._writer = pq.ParquetWriter(self.file_path, self._schema)
+                self._writer.write_table(table)
+            else:
+                frame.to_csv(self.file_path, mode="a", index=False, header=self.rows == 0)
+            self.rows += len(frame)
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        logging.info("Saved %s artifact %s with %d rows", self.artifact_format, self.file_path, self.rows)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def load_frame(file_path: str, artifact_format: str = None, index: bool = False, columns: list = None) -> pd.DataFrame:
+    """
+    Reads a DataFrame artifact written by save_frame.
+    :param file_path: Path of the artifact.
+    :param artifact_format: "parquet" or "csv"; inferred from the extension when None.
+    :param index: Whether the artifact was saved with its index.
+    :param columns: Optional subset of columns to read.
+    """
+    try:
+        artifact_format = artifact_format or infer_artifact_format(file_path)
+        if artifact_format == "parquet":
+            # Parquet restores a stored index by itself.
+            return pd.read_parquet(file_path, engine="pyarrow", columns=columns)
+        if artifact_format == "csv":
+            frame = pd.read_csv(file_path, index_col=0 if index else False)
+            return frame[columns] if columns else frame
+        raise ValueError(f"Unsupported artifact format {artifact_format!r}")
+    except Exception as e:
+        raise CustomException(e, sys) from e
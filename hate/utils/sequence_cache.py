@@ -0,0 +1,106 @@
+import os
+import sys
+import json
+import pickle
+import hashlib
+import numpy as np
+from hate.logger import logging
+from hate.exception import CustomException
+from hate.constants import SEQUENCE_CACHE_DIR
+
+
+class SequenceCache:
+    def __init__(self, cache_dir: str = SEQUENCE_CACHE_DIR):
+        """
+        Content-addressed on-disk cache of padded sequence matrices.
+        Entries are keyed by the tokenizer fingerprint, a hash of the input
+        texts and the padding length, and stored as .npy files that are read
+        back as read-only memmaps.
+        :param cache_dir: Directory shared across pipeline runs.
+        """
+        self.cache_dir = cache_dir
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._tokenizer_fingerprints = {}
+
+    @staticmethod
+    def data_fingerprint(texts) -> str:
+        """
+        Hash of an ordered sequence of texts.
+        """
+        digest = hashlib.sha256()
+        for text in texts:
+            digest.update(str(text).encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def tokenizer_fingerprint(self, tokenizer) -> str:
+        """
+        Hash of everything that affects texts_to_sequences: the settings and the word index.
+        """
+        key = id(tokenizer)
+        cached = self._tokenizer_fingerprints.get(key)
+        if cached is not None and cached[0] is tokenizer:
+            return cached[1]
+        settings = {
+            "num_words": tokenizer.num_words,
+            "filters": tokenizer.filters,
+            "lower": tokenizer.lower,
+            "split": tokenizer.split,
+            "char_level": tokenizer.char_level,
+            "oov_token": tokenizer.oov_token,
+        }
+        digest = hashlib.sha256(json.dumps(settings, sort_keys=True).encode("utf-8"))
+        # word_index preserves insertion order, which is index order.
+        digest.update(json.dumps(tokenizer.word_index).encode("utf-8"))
+        fingerprint = digest.hexdigest()
+        self._tokenizer_fingerprints[key] = (tokenizer, fingerprint)
+        return fingerprint
+
+    def _path(self, *parts) -> str:
+        return os.path.join(self.cache_dir, hashlib.sha256("-".join(map(str, parts)).encode("utf-8")).hexdigest())
+
+    def get_padded_sequences(self, tokenizer, texts, maxlen: int, compute_fn) -> np.ndarray:
+        """
+        Returns the padded sequence matrix for texts, computing it with
+        compute_fn(tokenizer, texts) only on a cache miss.
+        """
+        try:
+            texts = list(texts)
+            path = self._path("sequences", self.tokenizer_fingerprint(tokenizer),
+                              self.data_fingerprint(texts), maxlen) + ".npy"
+            if os.path.exists(path):
+                logging.info("Sequence cache hit: %s", path)
+                return np.load(path, mmap_mode="r")
+
+            logging.info("Sequence cache miss, tokenizing %d texts", len(texts))
+            matrix = np.asarray(compute_fn(tokenizer, texts))
+            self._atomic_write(path, lambda handle: np.save(handle, matrix))
+            return matrix
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def get_fitted_tokenizer(self, texts, num_words: int, fit_fn):
+        """
+        Returns a tokenizer fitted on texts, calling fit_fn(texts) only on a cache miss.
+        """
+        try:
+            texts = list(texts)
+            path = self._path("tokenizer", self.data_fingerprint(texts), num_words) + ".pickle"
+            if os.path.exists(path):
+                logging.info("Tokenizer cache hit: %s", path)
+                with open(path, "rb") as handle:
+                    return pickle.load(handle)
+
+            tokenizer = fit_fn(texts)
+            self._atomic_write(path, lambda handle: pickle.dump(tokenizer, handle, protocol=pickle.HIGHEST_PROTOCOL))
+            return tokenizer
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    @staticmethod
+    def _atomic_write(path: str, write_fn) -> None:
+        # Concurrent runs must never observe a half-written entry.
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as handle:
+            write_fn(handle)
+        os.replace(tmp_path, path)
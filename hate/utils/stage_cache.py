@@ -0,0 +1,125 @@
+import os
+import sys
+import json
+import hashlib
+from datetime import datetime
+from dataclasses import asdict
+from hate.logger import logging
+from hate.exception import CustomException
+from hate.constants import STAGE_CACHE_DIR, STAGE_MANIFEST_NAME, STAGE_MANIFEST_VERSION
+
+
+class StageCache:
+    def __init__(self, cache_dir: str = STAGE_CACHE_DIR, force=()):
+        """
+        Manifest of pipeline stage results keyed by a fingerprint of each
+        stage's inputs and config. A stage whose key is in the manifest, and
+        whose recorded output files are still on disk unchanged, is skipped
+        and its artifact entity rebuilt from the manifest.
+        :param cache_dir: Directory holding the manifest, shared across runs.
+        :param force: Names of stages to rerun even on a hit.
+        """
+        self.cache_dir = cache_dir
+        self.manifest_path = os.path.join(cache_dir, STAGE_MANIFEST_NAME)
+        self.force = set(force)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.manifest = self._load_manifest()
+
+    @staticmethod
+    def file_fingerprint(path: str, block_size: int = 1 << 20) -> str:
+        """
+        Hash of a file's content, read in blocks.
+        """
+        digest = hashlib.sha256()
+        with open(path, "rb") as handle:
+            for block in iter(lambda: handle.read(block_size), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def config_fingerprint(config) -> dict:
+        """
+        The settings of a config entity that decide what its stage outputs.
+        Paths are left out: they contain the run TIMESTAMP and say nothing
+        about what the stage computes. So are the names the config lists in
+        RUNTIME_SETTINGS (worker counts, chunk sizes), which only change how
+        fast the same outputs are produced.
+        """
+        runtime_settings = set(getattr(config, "RUNTIME_SETTINGS", ()))
+        return {name: value for name, value in sorted(vars(config).items())
+                if not name.endswith(("_DIR", "_PATH", "_DIR_PATH")) and name not in runtime_settings}
+
+    @staticmethod
+    def stage_key(stage: str, **inputs) -> str:
+        payload = json.dumps({"manifest_version": STAGE_MANIFEST_VERSION, "stage": stage, "inputs": inputs},
+                             sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _output_signature(path: str):
+        # Outputs are checked by size and mtime; re-hashing them would cost as much as a read.
+        if not os.path.exists(path):
+            return None
+        stat = os.stat(path)
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def _load_manifest(self) -> dict:
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path) as handle:
+                manifest = json.load(handle)
+            if manifest.get("version") == STAGE_MANIFEST_VERSION:
+                return manifest
+            logging.info("Ignoring stage manifest %s with version %s", self.manifest_path, manifest.get("version"))
+        return {"version": STAGE_MANIFEST_VERSION, "stages": {}}
+
+    def _save_manifest(self) -> None:
+        # Concurrent runs must never observe a half-written manifest.
+        tmp_path = f"{self.manifest_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as handle:
+            json.dump(self.manifest, handle, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def lookup(self, stage: str, key: str, artifact_cls):
+        """
+        Returns the cached artifact entity for stage and key, or None when the
+        stage is forced, unknown, or any of its outputs changed on disk.
+        """
+        if stage in self.force:
+            logging.info("Stage %s is forced to rerun", stage)
+            return None
+        entry = self.manifest["stages"].get(stage, {}).get(key)
+        if entry is None:
+            return None
+        for path, signature in entry["outputs"].items():
+            if self._output_signature(path) != signature:
+                logging.info("Stage %s cache entry is stale: %s changed", stage, path)
+                return None
+        return artifact_cls(**entry["artifacts"])
+
+    def store(self, stage: str, key: str, artifacts, outputs) -> None:
+        """
+        Records the artifact entity of a completed stage and the output files it depends on.
+        """
+        self.manifest["stages"].setdefault(stage, {})[key] = {
+            "artifacts": asdict(artifacts),
+            "outputs": {path: self._output_signature(path) for path in outputs},
+            "created_at": datetime.now().isoformat(),
+        }
+        self._save_manifest()
+
+    def run(self, stage: str, key: str, artifact_cls, compute_fn, outputs_fn):
+        """
+        Returns the cached artifact entity of stage, or computes it with
+        compute_fn() and records it.
+        :param outputs_fn: Maps the artifact entity to the files it points at.
+        """
+        try:
+            artifacts = self.lookup(stage, key, artifact_cls)
+            if artifacts is not None:
+                logging.info("Skipping stage %s, reusing cached artifacts (key %s)", stage, key[:12])
+                return artifacts
+            artifacts = compute_fn()
+            self.store(stage, key, artifacts, [path for path in outputs_fn(artifacts) if path])
+            return artifacts
+        except Exception as e:
+            raise CustomException(e, sys) from e
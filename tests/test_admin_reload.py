@@ -0,0 +1,69 @@
+import json
+import asyncio
+import pytest
+from types import SimpleNamespace
+
+pytest.importorskip("fastapi")
+import app as server
+
+
+def post_reload(client_host: str, force: bool = False, token: str = None) -> tuple:
+    """
+    Sends POST /admin/reload from client_host and returns (status, headers, body).
+    """
+    headers = [(b"x-admin-token", token.encode("utf-8"))] if token is not None else []
+    query = b"force=true" if force else b""
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+             "scheme": "http", "path": "/admin/reload", "raw_path": b"/admin/reload", "query_string": query,
+             "root_path": "", "headers": headers, "client": (client_host, 50000), "server": ("127.0.0.1", 80)}
+    response = {}
+    body = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = {key.decode(): value.decode() for key, value in message["headers"]}
+        elif message["type"] == "http.response.body":
+            body.append(message.get("body", b""))
+
+    asyncio.run(server.app(scope, receive, send))
+    return response["status"], response["headers"], json.loads(b"".join(body))
+
+
+@pytest.fixture
+def ready_pipeline(monkeypatch):
+    reloads = []
+    bundle = SimpleNamespace(version="v1", model_path="model.h5", loaded_at="now")
+    monkeypatch.setattr(server.prediction_pipeline, "bundle", bundle)
+    monkeypatch.setattr(server.prediction_pipeline, "reload", lambda force=False: reloads.append(force) or True)
+    monkeypatch.setattr(server.WORKER_GROUP, "_last_forced_reload", None)
+    return reloads
+
+
+def test_without_token_only_local_clients_may_reload(ready_pipeline, monkeypatch):
+    monkeypatch.setattr(server, "ADMIN_TOKEN", None)
+    assert post_reload("203.0.113.7")[0] == 403
+    assert post_reload("127.0.0.1")[0] == 200
+    assert ready_pipeline == [False]
+
+
+def test_configured_token_is_required_from_every_client(ready_pipeline, monkeypatch):
+    monkeypatch.setattr(server, "ADMIN_TOKEN", "secret")
+    assert post_reload("127.0.0.1")[0] == 401
+    assert post_reload("203.0.113.7", token="wrong")[0] == 401
+    assert post_reload("203.0.113.7", token="secret")[0] == 200
+    assert ready_pipeline == [False]
+
+
+def test_forced_reloads_are_rate_limited(ready_pipeline, monkeypatch):
+    monkeypatch.setattr(server, "ADMIN_TOKEN", None)
+    assert post_reload("127.0.0.1", force=True)[0] == 200
+    status, headers, _ = post_reload("127.0.0.1", force=True)
+    assert status == 429
+    assert 0 < int(headers["retry-after"]) <= server.FORCED_RELOAD_MIN_INTERVAL_SECONDS
+    # Unforced reloads are not limited
+    assert post_reload("127.0.0.1")[0] == 200
+    assert ready_pipeline == [True, False]
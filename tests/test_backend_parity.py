@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("tensorflow")
+from hate.constants import MAX_LEN, PARITY_TOLERANCE, QUANTIZATION_PARITY_TOLERANCE
+from hate.ml.model import ModelArchitecture
+from hate.ml.export import export_numpy_weights
+from hate.ml.backends import KerasBackend, NumpyBackend
+from hate.ml.tokenizer import VocabTokenizer
+
+TEXTS = [
+    "you are all a bunch of idiots and i hate every one of you",
+    "what a lovely day for a walk in the park",
+    "",
+    "go back to where you came from",
+    "thanks for the follow, great to meet you",
+    "idiots",
+    "the match last night was unbelievable, what a goal in the last minute",
+]
+# Longer than MAX_LEN words, so it is truncated
+LONG_TEXT = "nobody asked for your stupid opinion " * 60
+
+
+@pytest.fixture(scope="module")
+def served_model(tmp_path_factory):
+    """
+    The training architecture with spread-out weights, saved and loaded back
+    the way it is served, plus a tokenizer fitted on TEXTS.
+    """
+    from keras.preprocessing.text import Tokenizer
+    model = ModelArchitecture().get_model()
+    rng = np.random.default_rng(7)
+    model.set_weights([rng.normal(0.0, 0.3, weight.shape).astype(np.float32) for weight in model.get_weights()])
+    model_path = str(tmp_path_factory.mktemp("model") / "model.h5")
+    model.save(model_path)
+    tokenizer = Tokenizer(num_words=model.layers[0].input_dim)
+    tokenizer.fit_on_texts(TEXTS + [LONG_TEXT])
+    return model, KerasBackend(model_path), VocabTokenizer.from_keras(tokenizer)
+
+
+@pytest.mark.parametrize("texts, trim", [(TEXTS + [LONG_TEXT], False), (TEXTS, True)])
+@pytest.mark.parametrize("quantization, tolerance", [("none", PARITY_TOLERANCE),
+                                                     ("embeddings", QUANTIZATION_PARITY_TOLERANCE),
+                                                     ("all", QUANTIZATION_PARITY_TOLERANCE)])
+def test_numpy_backend_matches_keras(served_model, tmp_path, quantization, tolerance, texts, trim):
+    model, keras_backend, tokenizer = served_model
+    numpy_backend = NumpyBackend(export_numpy_weights(model, str(tmp_path / "weights"), quantization))
+    assert keras_backend.supports_masking and numpy_backend.supports_masking
+    padded = tokenizer.texts_to_padded(texts, MAX_LEN, trim=trim)
+    # The empty text is all padding; trimmed batches are narrower than MAX_LEN
+    assert (padded == 0).all(axis=1).any()
+    assert (padded.shape[1] < MAX_LEN) == trim
+
+    expected = keras_backend.predict(padded, batch_size=len(padded))
+    actual = numpy_backend.predict(padded, batch_size=3)
+    assert np.ptp(expected) > 0.1
+    np.testing.assert_allclose(actual, expected, rtol=0, atol=tolerance)
@@ -0,0 +1,29 @@
+import time
+import asyncio
+import pytest
+from hate.pipeline.batch_scheduler import MicroBatchScheduler
+from hate.pipeline.executor import InferenceExecutor
+
+
+def slow_scores(texts):
+    time.sleep(0.2)
+    return [len(text) for text in texts]
+
+
+def test_stop_scores_in_flight_batches_and_fails_the_rest():
+    async def run():
+        executor = InferenceExecutor(max_workers=2)
+        scheduler = MicroBatchScheduler(slow_scores, max_batch_size=3, max_wait_ms=1000, executor=executor)
+        await scheduler.start()
+        # The first three fill a batch that starts scoring; the fourth waits for company in the next batch.
+        requests = [asyncio.ensure_future(scheduler.submit(text)) for text in ("a", "bb", "ccc", "dddd")]
+        await asyncio.sleep(0.05)
+        await asyncio.wait_for(scheduler.stop(), timeout=5)
+        assert all(request.done() for request in requests)
+        executor.shutdown()
+        return requests
+
+    requests = asyncio.run(run())
+    assert [request.result() for request in requests[:3]] == [1.0, 2.0, 3.0]
+    with pytest.raises(RuntimeError, match="stopped"):
+        requests[3].result()
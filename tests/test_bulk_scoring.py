@@ -0,0 +1,35 @@
+import pandas as pd
+import pytest
+from hate.pipeline.bulk_scoring import iter_chunks
+
+FRAME = pd.DataFrame({"id": range(23), "tweet": [f"tweet {index}\nsecond line" if index % 5 == 0 else f"tweet {index}"
+                                                 for index in range(23)]})
+
+
+def write(tmp_path, file_format: str) -> str:
+    path = str(tmp_path / f"input.{file_format}")
+    if file_format == "csv":
+        FRAME.to_csv(path, index=False)
+    elif file_format == "jsonl":
+        FRAME.to_json(path, orient="records", lines=True)
+    else:
+        FRAME.to_parquet(path, index=False, row_group_size=10)
+    return path
+
+
+def rows(chunks) -> list:
+    return [row for chunk in chunks for row in chunk[["id", "tweet"]].itertuples(index=False, name=None)]
+
+
+@pytest.mark.parametrize("file_format", ["csv", "jsonl", "parquet"])
+def test_every_position_resumes_right_after_its_chunk(tmp_path, file_format):
+    pytest.importorskip("pyarrow")
+    path = write(tmp_path, file_format)
+    expected = list(FRAME.itertuples(index=False, name=None))
+    chunks = list(iter_chunks(path, file_format, ["id", "tweet"], chunk_size=4))
+    assert rows(chunk for chunk, _ in chunks) == expected
+    done = 0
+    for chunk, position in chunks:
+        done += len(chunk)
+        resumed = iter_chunks(path, file_format, ["id", "tweet"], chunk_size=4, position=position)
+        assert rows(chunk for chunk, _ in resumed) == expected[done:]
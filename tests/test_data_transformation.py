@@ -0,0 +1,16 @@
+import warnings
+import pandas as pd
+from hate.entity.config_entity import DataTransformationConfig
+from hate.components.data_transforamation import DataTransformation
+
+
+def test_raw_labels_become_binary():
+    config = DataTransformationConfig()
+    raw = pd.DataFrame({"Unnamed: 0": range(6), "count": 3, "hate_speech": 0, "offensive_language": 0,
+                        "neither": 0, "class": [0, 1, 2, 2, 1, 0], "tweet": [f"tweet {index}" for index in range(6)]})
+    with warnings.catch_warnings():
+        # pandas reports a chained inplace replace, which would leave the labels unchanged
+        warnings.simplefilter("error")
+        cleaned = DataTransformation(config, None).clean_raw_frame(raw)
+    assert set(cleaned.columns) == {"tweet", config.LABEL}
+    assert cleaned[config.LABEL].tolist() == [1, 1, 0, 0, 1, 1]
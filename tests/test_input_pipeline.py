@@ -0,0 +1,63 @@
+import os
+import sys
+import subprocess
+import numpy as np
+import pytest
+
+pytest.importorskip("tensorflow")
+from keras.preprocessing.text import Tokenizer
+from hate.ml.input_pipeline import TextDatasetBuilder
+
+TEXTS = [f"tweet number {index} " + "word " * (index % 7) for index in range(40)]
+LABELS = np.arange(40) % 2
+
+KILLED_RUN = """
+import os, sys, numpy as np
+from keras.preprocessing.text import Tokenizer
+from hate.ml.input_pipeline import TextDatasetBuilder
+texts = [f"tweet number {index} " + "word " * (index % 7) for index in range(40)]
+tokenizer = Tokenizer(num_words=50)
+tokenizer.fit_on_texts(texts)
+dataset = TextDatasetBuilder(tokenizer, maxlen=8, cache=sys.argv[1]).build(texts, np.arange(40) % 2, batch_size=4,
+                                                                          shuffle=False, name="train")
+iterator = iter(dataset)
+next(iterator)
+os._exit(9)
+"""
+
+
+def builder(cache_dir: str) -> TextDatasetBuilder:
+    tokenizer = Tokenizer(num_words=50)
+    tokenizer.fit_on_texts(TEXTS)
+    return TextDatasetBuilder(tokenizer, maxlen=8, cache=cache_dir)
+
+
+def rows(dataset) -> int:
+    return sum(len(labels) for _, labels in dataset.as_numpy_iterator())
+
+
+def test_cache_left_by_a_killed_run_is_rebuilt(tmp_path):
+    cache_dir = str(tmp_path / "tfdata")
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, TF_CPP_MIN_LOG_LEVEL="3", PYTHONPATH=repo_root)
+    subprocess.run([sys.executable, "-c", KILLED_RUN, cache_dir], env=env, cwd=str(tmp_path),
+                   timeout=300, check=False)
+    assert any(name.endswith(".lockfile") for name in os.listdir(cache_dir))
+
+    dataset = builder(cache_dir).build(TEXTS, LABELS, batch_size=4, shuffle=False, name="train")
+    assert rows(dataset) == rows(dataset) == len(TEXTS)
+    assert not any(name.endswith(".lockfile") for name in os.listdir(cache_dir))
+
+
+def test_cache_of_a_running_owner_is_left_alone(tmp_path):
+    cache_dir = str(tmp_path / "tfdata")
+    text_builder = builder(cache_dir)
+    cache_path = text_builder._cache_path(TEXTS, LABELS.astype(np.float32), "train")
+    os.makedirs(cache_dir)
+    lockfile = f"{cache_path}_0.lockfile"
+    with open(lockfile, "w") as handle:
+        handle.write("Created at: 0")
+    with open(f"{cache_path}.owner", "w") as handle:
+        handle.write(str(os.getppid()))
+    text_builder._claim_cache(cache_path)
+    assert os.path.exists(lockfile)
@@ -0,0 +1,103 @@
+import json
+import asyncio
+import pytest
+
+pytest.importorskip("fastapi")
+from fastapi import FastAPI
+from hate.pipeline.executor import InferenceBusyError
+from hate.pipeline.ndjson_stream import NdjsonScoringResponse
+
+
+async def fake_score(texts):
+    return [len(text) / 100 for text in texts]
+
+
+def label_for(score):
+    return "hate and abusive" if score > 0.5 else "no hate"
+
+
+def stream_app(score=fake_score, **options):
+    app = FastAPI()
+
+    @app.post("/predict/stream")
+    async def predict_stream():
+        return NdjsonScoringResponse(score, label_for, **options)
+
+    return app
+
+
+def post_chunks(app, chunks: list) -> tuple:
+    """
+    Sends the body as one ASGI message per chunk and returns (status, result records).
+    """
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+             "scheme": "http", "path": "/predict/stream", "raw_path": b"/predict/stream", "query_string": b"",
+             "root_path": "", "headers": [(b"content-type", b"application/x-ndjson")],
+             "client": ("127.0.0.1", 0), "server": ("127.0.0.1", 80)}
+    messages = [{"type": "http.request", "body": chunk, "more_body": index < len(chunks) - 1}
+                for index, chunk in enumerate(chunks)]
+    status = []
+    body = []
+
+    async def receive():
+        if messages:
+            # Yield to the loop between chunks, like a socket would.
+            await asyncio.sleep(0)
+            return messages.pop(0)
+        await asyncio.get_running_loop().create_future()
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+        elif message["type"] == "http.response.body":
+            body.append(message.get("body", b""))
+
+    asyncio.run(asyncio.wait_for(app(scope, receive, send), timeout=10))
+    records = [json.loads(line) for line in b"".join(body).decode("utf-8").splitlines()]
+    return status[0], records
+
+
+def split(payload: bytes, size: int) -> list:
+    return [payload[start:start + size] for start in range(0, len(payload), size)]
+
+
+def test_multi_chunk_body_returns_every_line_in_order():
+    lines = [json.dumps({"text": f"text number {index} " + "x" * (index % 13), "id": index})
+             for index in range(200)]
+    payload = ("\n".join(lines) + "\n").encode("utf-8")
+    # 7-byte chunks split almost every line across messages
+    status, records = post_chunks(stream_app(batch_size=16), split(payload, 7))
+    assert status == 200
+    assert [record["id"] for record in records] == list(range(200))
+    assert [record["line"] for record in records] == list(range(1, 201))
+    assert all("score" in record and "label" in record for record in records)
+
+
+def test_invalid_lines_and_last_line_without_newline():
+    payload = b'"plain string"\nnot json\n\n{"no_text": 1}\n{"text": "last"}'
+    status, records = post_chunks(stream_app(batch_size=2), split(payload, 5))
+    assert status == 200
+    assert [record["line"] for record in records] == [1, 2, 4, 5]
+    assert "error" in records[1] and "error" in records[2]
+    assert records[3]["score"] == pytest.approx(len("last") / 100)
+
+
+def test_busy_executor_gives_up_with_error_records():
+    async def busy(texts):
+        raise InferenceBusyError("Inference queue is full")
+
+    app = stream_app(score=busy, retry_seconds=0.01, busy_timeout_seconds=0.05)
+    status, records = post_chunks(app, [b'"a"\n"b"\n'])
+    assert status == 200
+    assert [record["line"] for record in records] == [1, 2]
+    assert all("Inference queue is full" in record["error"] for record in records)
+
+
+def test_scoring_failure_after_too_long_line_ends_with_error_record():
+    async def failing(texts):
+        raise RuntimeError("model crashed")
+
+    app = stream_app(score=failing, max_line_bytes=10)
+    status, records = post_chunks(app, [b'"ok"\n', b"x" * 50])
+    assert status == 200
+    assert records == [{"error": "Scoring failed; the stream is incomplete"}]
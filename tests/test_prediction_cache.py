@@ -0,0 +1,31 @@
+from hate.pipeline.prediction_cache import MemoryPredictionCache, SqlitePredictionCache
+
+
+def test_stale_version_lookup_is_a_miss_and_keeps_the_cache():
+    cache = MemoryPredictionCache(max_size=10, ttl_seconds=60)
+    cache.get_many("v1", ["a"])
+    cache.put_many("v1", {"a": 0.1})
+    cache.get_many("v2", ["a"])
+    cache.put_many("v2", {"a": 0.2})
+    # A request that started before the reload still carries v1
+    assert cache.get_many("v1", ["a"]) == {}
+    cache.put_many("v1", {"b": 0.3})
+    assert cache.get_many("v2", ["a", "b"]) == {"a": 0.2}
+
+
+def test_new_version_clears_the_cache():
+    cache = MemoryPredictionCache(max_size=10, ttl_seconds=60)
+    cache.get_many("v1", ["a"])
+    cache.put_many("v1", {"a": 0.1})
+    assert cache.get_many("v2", ["a"]) == {}
+    assert len(cache) == 0
+
+
+def test_sqlite_cache_ignores_writes_of_a_replaced_version(tmp_path):
+    cache = SqlitePredictionCache(max_size=10, ttl_seconds=60, db_path=str(tmp_path / "cache.sqlite"))
+    cache.get_many("v1", ["a"])
+    cache.get_many("v2", ["a"])
+    cache.put_many("v2", {"a": 0.2})
+    cache.put_many("v1", {"a": 0.1})
+    assert cache.get_many("v2", ["a"]) == {"a": 0.2}
+    assert len(cache) == 1
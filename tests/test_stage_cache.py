@@ -0,0 +1,11 @@
+from hate.entity.config_entity import DataTransformationConfig
+from hate.utils.stage_cache import StageCache
+
+
+def test_transformation_key_ignores_worker_and_chunk_settings():
+    config = DataTransformationConfig()
+    fingerprint = StageCache.config_fingerprint(config)
+    config.WORKERS, config.CHUNK_SIZE, config.STREAMING_CHUNK_SIZE = 99, 7, 3
+    assert StageCache.config_fingerprint(config) == fingerprint
+    config.LABEL = "other"
+    assert StageCache.config_fingerprint(config) != fingerprint
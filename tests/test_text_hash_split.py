@@ -0,0 +1,24 @@
+import numpy as np
+import pandas as pd
+from hate.utils.main_utils import split_by_text_hash, text_hashes
+
+
+def frame(start: int, stop: int) -> tuple:
+    texts = pd.Series([f"tweet number {index}" for index in range(start, stop)], name="tweet")
+    return texts, pd.Series(np.arange(start, stop) % 2, name="label")
+
+
+def test_appended_rows_never_move_trained_texts_into_the_test_set():
+    x, y = frame(0, 3000)
+    x_train, x_test, y_train, y_test = split_by_text_hash(x, y, test_size=0.3, seed=42)
+    assert abs(len(x_test) / len(x) - 0.3) < 0.05
+    assert sorted(x_train.index.tolist() + x_test.index.tolist()) == list(range(len(x)))
+    assert (y_train == x_train.str.split().str[-1].astype(int) % 2).all()
+    trained = text_hashes(x_train)
+
+    more_x, more_y = frame(3000, 5000)
+    grown_x, grown_y = pd.concat([x, more_x], ignore_index=True), pd.concat([y, more_y], ignore_index=True)
+    _, grown_test, _, _ = split_by_text_hash(grown_x, grown_y, test_size=0.3, seed=42)
+    assert not np.isin(text_hashes(grown_test), trained).any()
+    # The old test rows stay test rows
+    assert set(x_test).issubset(set(grown_test))
@@ -0,0 +1,81 @@
+import random
+import string
+import numpy as np
+import pytest
+from types import SimpleNamespace
+from hate.ml.padding import pad_ids
+from hate.ml.tokenizer import VocabTokenizer, export_vocabulary
+
+FILTERS = '!"#$%&()*+,-./:;<=>?@[\\]^_`{|}~\t\n'
+
+
+def keras_like_tokenizer(words, num_words=None, oov_token=None):
+    word_index = {word: index for index, word in enumerate(words, start=1)}
+    return SimpleNamespace(char_level=False, num_words=num_words, word_index=word_index, filters=FILTERS,
+                           lower=True, split=" ", oov_token=oov_token)
+
+
+def reference_sequences(tokenizer, texts):
+    # Keras Tokenizer.texts_to_sequences, written out
+    table = str.maketrans({character: tokenizer.split for character in tokenizer.filters})
+    oov_index = tokenizer.word_index.get(tokenizer.oov_token)
+    sequences = []
+    for text in texts:
+        ids = []
+        for word in text.lower().translate(table).split(tokenizer.split):
+            if not word:
+                continue
+            index = tokenizer.word_index.get(word)
+            if index is not None and (not tokenizer.num_words or index < tokenizer.num_words):
+                ids.append(index)
+            elif oov_index is not None:
+                ids.append(oov_index)
+        sequences.append(ids)
+    return sequences
+
+
+def random_texts(words, count, rng):
+    unknown = ["".join(rng.choice(string.ascii_lowercase) for _ in range(9)) for _ in range(20)]
+    return [" ".join(rng.choice(words + unknown) for _ in range(rng.randint(0, 60))) + rng.choice(["", "!", " ?"])
+            for _ in range(count)]
+
+
+@pytest.mark.parametrize("num_words,oov_token", [(None, None), (40, None), (40, "<oov>")])
+def test_exported_vocabulary_reproduces_keras_ids(tmp_path, num_words, oov_token):
+    rng = random.Random(0)
+    words = ([oov_token] if oov_token else []) + [f"w{index}" for index in range(60)] + ["naïve", "日本"]
+    tokenizer = keras_like_tokenizer(words, num_words, oov_token)
+    vocab_path = str(tmp_path / "tokenizer.vocab")
+    export_vocabulary(tokenizer, vocab_path)
+    vocab_tokenizer = VocabTokenizer.load(vocab_path)
+    texts = random_texts(words, 200, rng) + ["", "NAÏVE 日本 w1"]
+
+    expected = reference_sequences(tokenizer, texts)
+    assert vocab_tokenizer.texts_to_sequences(texts) == expected
+    assert vocab_tokenizer.text_to_ids(texts[-1]) == expected[-1]
+    assert VocabTokenizer.from_keras(tokenizer).texts_to_sequences(texts) == expected
+    for maxlen in (5, 50, 100):
+        np.testing.assert_array_equal(vocab_tokenizer.texts_to_padded(texts, maxlen), pad_ids(expected, maxlen))
+        np.testing.assert_array_equal(vocab_tokenizer.texts_to_padded(texts, maxlen, trim=True),
+                                      pad_ids(expected, maxlen, trim=True))
+
+
+def test_empty_batch_and_truncated_file(tmp_path):
+    tokenizer = keras_like_tokenizer(["a", "b"])
+    vocab_path = tmp_path / "tokenizer.vocab"
+    export_vocabulary(tokenizer, str(vocab_path))
+    assert VocabTokenizer.load(str(vocab_path)).texts_to_padded([], 10).shape == (0, 10)
+    vocab_path.write_bytes(vocab_path.read_bytes()[:-1])
+    with pytest.raises(Exception, match="truncated"):
+        VocabTokenizer.load(str(vocab_path))
+
+
+def test_reexport_leaves_a_loaded_vocabulary_intact(tmp_path):
+    vocab_path = str(tmp_path / "tokenizer.vocab")
+    export_vocabulary(keras_like_tokenizer([f"w{index}" for index in range(100)]), vocab_path)
+    served = VocabTokenizer.load(vocab_path)
+    # A training run exports a smaller vocabulary over the file the server has mapped
+    export_vocabulary(keras_like_tokenizer(["a", "b"]), vocab_path)
+    assert served.texts_to_sequences(["w1 w99 a"]) == [[2, 100]]
+    assert VocabTokenizer.load(vocab_path).texts_to_sequences(["w1 w99 a"]) == [[1]]
+    assert [path.name for path in tmp_path.iterdir()] == ["tokenizer.vocab"]
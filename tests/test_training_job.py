@@ -0,0 +1,79 @@
+import pytest
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from hate.pipeline import training_job
+from hate.pipeline.training_job import TrainingJobManager, TrainingJobStatus
+
+
+class PendingPool:
+    def submit(self, function, *args):
+        return Future()
+
+
+def test_training_jobs_are_shared_between_processes(tmp_path):
+    first = TrainingJobManager(state_dir=str(tmp_path))
+    second = TrainingJobManager(state_dir=str(tmp_path))
+    first._pool = PendingPool()
+    job = first.submit()
+    # Another API worker sees the job and does not start a second one
+    assert second.submit().job_id == job.job_id
+    assert second.status(job.job_id)["state"] == job.state
+
+
+def test_job_of_an_exited_process_is_failed(tmp_path):
+    manager = TrainingJobManager(state_dir=str(tmp_path))
+    manager._write(TrainingJobStatus(job_id="gone", state=manager.RUNNING, submitted_at="now", pid=2 ** 22 + 1))
+    manager._set_current_job_id("gone")
+    status = manager.status()
+    assert status["state"] == manager.FAILED
+    assert "exited" in status["error"]
+
+
+def test_job_stays_pending_until_the_training_process_starts_it(tmp_path):
+    manager = TrainingJobManager(state_dir=str(tmp_path))
+    manager._pool = PendingPool()
+    job = manager.submit()
+    assert manager.status(job.job_id)["state"] == manager.PENDING
+    manager.mark_running(job.job_id)
+    status = manager.status(job.job_id)
+    assert status["state"] == manager.RUNNING and status["started_at"] is not None
+
+
+def test_cancelled_job_is_recorded_as_cancelled(tmp_path):
+    manager = TrainingJobManager(state_dir=str(tmp_path))
+    future = Future()
+    manager._pool = PendingPool()
+    manager._pool.submit = lambda function, *args: future
+    job = manager.submit()
+    future.cancel()
+    assert manager.status(job.job_id)["state"] == manager.CANCELLED
+
+
+class BrokenPool:
+    def submit(self, function, *args):
+        raise BrokenProcessPool("A process in the process pool was terminated abruptly")
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+
+def test_broken_pool_is_replaced_before_the_next_job(tmp_path, monkeypatch):
+    monkeypatch.setattr(training_job, "ProcessPoolExecutor", lambda **options: PendingPool())
+    manager = TrainingJobManager(state_dir=str(tmp_path))
+    manager._pool = BrokenPool()
+    job = manager.submit()
+    assert isinstance(manager._pool, PendingPool)
+    assert manager.status(job.job_id)["state"] == manager.PENDING
+
+
+def test_job_that_cannot_start_is_failed(tmp_path):
+    manager = TrainingJobManager(state_dir=str(tmp_path))
+    manager._get_pool = lambda: BrokenPool()
+    with pytest.raises(Exception):
+        manager.submit()
+    status = manager.status()
+    assert status["state"] == manager.FAILED
+    assert "Could not start" in status["error"]
+    # The failed job no longer blocks a new one
+    manager._get_pool = lambda: PendingPool()
+    assert manager.submit().job_id != status["job_id"]
@@ -0,0 +1,17 @@
+from hate.pipeline.metrics import MetricsRegistry, Counter, Histogram, merge_expositions
+
+
+def worker_render(pid: int, hits: int) -> str:
+    registry = MetricsRegistry()
+    Counter("hits_total", "Hits", registry=registry).inc(hits)
+    Histogram("latency_seconds", "Latency", buckets=(0.1,), registry=registry).observe(0.05)
+    return registry.render(f'worker="{pid}"')
+
+
+def test_merged_metrics_keep_one_header_per_family():
+    merged = merge_expositions([worker_render(1, 2), worker_render(2, 3)]).splitlines()
+    assert merged.count("# HELP hits_total Hits") == 1
+    assert merged.count("# TYPE latency_seconds histogram") == 1
+    hits = merged.index("# TYPE hits_total counter")
+    assert merged[hits + 1:hits + 3] == ['hits_total{worker="1"} 2.0', 'hits_total{worker="2"} 3.0']
+    assert 'latency_seconds_bucket{worker="2",le="0.1"} 1' in merged